@@ -144,6 +144,47 @@ _FEWSHOT = """\
 "order me a pizza" → {"intent":"UNKNOWN"}
 """
 
+# Deterministic spoken acks (system.ack_mode): keyed on intent, LOCAL_ACTION
+# further on its action. QUERY is answered by the dispatcher from the semantic
+# map; TIME/DATE/CHITCHAT by the engine — none of those need a template.
+_ACTION_ACKS = {
+    "STAND_UP": "Standing up.", "SIT_DOWN": "Sitting down.",
+    "LIE_DOWN": "Lying down.", "STRETCH": "Stretching.",
+    "SHAKE": "Shaking.", "JUMP": "Jumping.", "POUNCE": "Pouncing.",
+    "TURN": "Turning.", "MOVE": "Moving.",
+}
+_INTENT_ACKS = {
+    "NAVIGATE": "Going to {goal}.",
+    "FIND": "Looking for {target}.",
+    "FOLLOW": "Following {target}.",
+    "STOP": "Stopping.",
+    "CANCEL": "Cancelled.",
+    "UNKNOWN": "Sorry, I can't do that.",
+}
+
+
+def _ack_template(intent: dict) -> Optional[str]:
+    ij = intent if isinstance(intent, dict) else {}
+    name = ij.get("intent")
+    if name == "LOCAL_ACTION":
+        return _ACTION_ACKS.get(ij.get("action"))
+    tmpl = _INTENT_ACKS.get(name)
+    if tmpl is None:
+        return None
+    desc = {k: ((ij.get(k) or {}).get("description") or "").strip()
+            for k in ("goal", "target")}
+    if any(not desc[k] for k in desc if "{%s}" % k in tmpl):
+        return None
+    return tmpl.format(**{k: _the(v) for k, v in desc.items()})
+
+
+def _the(desc: str) -> str:
+    """'door' → 'the door'; descriptions already carrying a determiner
+    ('the person', 'my keys') are spoken as said."""
+    first = desc.split(" ", 1)[0].lower()
+    return desc if first in ("the", "a", "an", "my", "your", "this", "that") \
+        else f"the {desc}"
+
 
 class DogProvider:
     """fsttm.domains provider for the Go2 robot-dog deployment."""
@@ -173,6 +214,9 @@ class DogProvider:
         name = (intent or {}).get("intent") if isinstance(intent, dict) else None
         return name if name in _ENGINE_META else None
 
+    def ack_template(self, intent: dict) -> Optional[str]:
+        return _ack_template(intent)
+
     def chitchat_system(self, assistant_name: str) -> Optional[str]:
         return (f"You are {assistant_name}, a friendly robot dog's voice. "
                 f"Reply to the person's remark in ONE short, warm spoken "
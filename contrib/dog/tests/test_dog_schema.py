@@ -54,6 +54,19 @@ def test_meta_intents_produce_no_command():
     assert PROVIDER.meta_intent({"intent": "FIND"}) is None
 
 
+def test_ack_templates():
+    ack = PROVIDER.ack_template
+    assert ack({"intent": "LOCAL_ACTION", "action": "SIT_DOWN"}) == "Sitting down."
+    assert ack({"intent": "NAVIGATE", "goal": {"type": "REGION",
+                                               "description": "kitchen"}}) == \
+        "Going to the kitchen."
+    assert ack({"intent": "FOLLOW", "target": {"type": "PERSON",
+                                               "description": "the person"}}) == \
+        "Following the person."
+    assert ack({"intent": "FIND", "target": {"type": "OBJECT"}}) is None
+    assert ack({"intent": "QUERY"}) is None         # dispatcher answers it
+
+
 def test_prompt_teaches_the_language():
     p = PROVIDER.build_prompt()
     for kw in ("LOCAL_ACTION", "NAVIGATE", "FIND", "FOLLOW", "constraints",
@@ -10,9 +10,11 @@ against the hvac-react backend.
 The assembled prompt and schema are BYTE-IDENTICAL to the pre-plugin
 fsttm.intents output — guarded by tests/test_golden_prompt.py.
 """
+import re
 from typing import Optional
 
 from fsttm.domain import DomainContext, DomainDispatcher
+from fsttm.fastintent import normalize
 
 from fsttm_hvac import registry
 from fsttm_hvac.registry import all_names, _enabled_modules  # noqa: F401
@@ -191,6 +193,170 @@ Translate this intent JSON to a spoken acknowledgment (8 words max, no JSON):
 {"intent":"UNKNOWN","area":0} → Sorry, I can't do that.\
 """
 
+# Deterministic spoken acks (system.ack_mode template / template-then-llm):
+# the same register as the table above, filled from the intent's fields so the
+# second LLM pass can be skipped. A template whose field is missing yields None
+# (template-then-llm then falls back to the LLM ack). Engine-answered intents
+# (TIME/DATE clock, STATUS telemetry, CHITCHAT, manual/RAG) never reach these.
+ACK_TEMPLATES = {
+    "WARMER":              "Turning up the heat{side}.",
+    "COOLER":              "Cooling things down{side}.",
+    "SET_TEMPERATURE":     "Setting{zone} temperature to {temp} degrees.",
+    "FAN_UP":              "Turning the fan up{side}.",
+    "FAN_DOWN":            "Turning the fan down{side}.",
+    "SET_FAN":             "Fan set to level {fan_level}.",
+    "AC_ON":               "Turning on the air conditioning.",
+    "AC_OFF":              "Turning off the air conditioning.",
+    "MAX_AC_TOGGLE":       "Toggling max A C.",
+    "VENT_FACE":           "Air to the face vents.",
+    "VENT_FEET":           "Air to the feet.",
+    "VENT_DEFROST":        "Activating windshield defrost.",
+    "VENT_SPLIT":          "Air to face and feet.",
+    "VENT_DEFROST_MAX":    "Toggling max defrost.",
+    "RECIRCULATE_ON":      "Recirculating cabin air.",
+    "RECIRCULATE_OFF":     "Switching to fresh air.",
+    "AUTO_ON":             "Switching to automatic climate mode.",
+    "AUTO_OFF":            "Switching to manual climate mode.",
+    "SYNC_TOGGLE":         "Toggling zone sync.",
+    "POWER_ON":            "Climate on.",
+    "POWER_OFF":           "Climate off.",
+    "REAR_DEFROST_TOGGLE": "Toggling rear defrost.",
+    "LIGHTS_ON":           "{light} on.",
+    "LIGHTS_OFF":          "{light} off.",
+    "DOOR_LOCK":           "{doors} locked.",
+    "DOOR_UNLOCK":         "{doors} unlocked.",
+    "WINDOW_OPEN":         "Opening {windows}.",
+    "WINDOW_CLOSE":        "Closing {windows}.",
+    "SEAT_HEAT_UP":        "{seat} heat increased.",
+    "SEAT_HEAT_DOWN":      "{seat} heat reduced.",
+    "SEAT_COOL_UP":        "{seat} cooling increased.",
+    "SEAT_COOL_DOWN":      "{seat} cooling reduced.",
+    "UNKNOWN":             "Sorry, I can't do that.",
+}
+
+# area → zone word ("" = all zones / unaddressed).
+_ACK_ZONES = {1: "driver", 4: "passenger", 16: "rear left", 64: "rear right",
+              256: "trunk"}
+_ACK_SIDES = {1: " on the driver side", 4: " on the passenger side",
+              16: " in the rear left", 64: " in the rear right"}
+_ACK_LIGHTS = {"head": "Headlights", "fog": "Fog lights",
+               "hazard": "Hazard lights", "cabin": "Cabin light"}
+
+
+def ack_template(intent):
+    """Deterministic spoken ack for `intent`, or None when there's no template
+    (or a field it needs is missing)."""
+    name = (intent or {}).get("intent") if isinstance(intent, dict) else None
+    tmpl = ACK_TEMPLATES.get(name)
+    if tmpl is None:
+        return None
+    zone = _ACK_ZONES.get(intent.get("area"), "")
+    temp = intent.get("temp")
+    if isinstance(temp, (int, float)) and float(temp).is_integer():
+        temp = int(temp)
+    fields = {
+        "zone": f" {zone}" if zone else "",
+        "side": _ACK_SIDES.get(intent.get("area"), ""),
+        "temp": temp,
+        "fan_level": intent.get("fan_level"),
+        "light": _ACK_LIGHTS.get(intent.get("light_type", "head")),
+        "doors": f"{zone.capitalize()} door" if zone else "All doors",
+        "windows": f"the {zone} window" if zone else "the windows",
+        "seat": f"{zone.capitalize()} seat" if zone else "Seat",
+    }
+    if any(fields[k] is None for k in fields if "{%s}" % k in tmpl):
+        return None
+    return tmpl.format(**fields)
+
+
+# ── slot filling for the non-LLM fast path (fsttm.fastintent) ────────────────
+# The fast classifier only predicts the intent NAME; these rules complete the
+# intent dict from the utterance, mirroring the zone table and the few-shot
+# field discipline. Anything they can't read unambiguously → None → the LLM.
+_ZONE_RULES = [       # first match wins: the two-word zones before "left/right"
+    (r"\b(rear|back) left\b", 16), (r"\b(rear|back) right\b", 64),
+    (r"\b(trunk|boot)\b", 256),
+    (r"\b(passenger|right|his|her)\b", 4),
+    (r"\b(my|mine|driver|drivers|left)\b", 1),
+]
+_NUMBER_WORDS = {w: i for i, w in enumerate(
+    "zero one two three four five six seven eight nine ten eleven twelve "
+    "thirteen fourteen fifteen sixteen seventeen eighteen nineteen".split())}
+_TENS = {"twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60,
+         "seventy": 70, "eighty": 80, "ninety": 90, "hundred": 100}
+_LIGHT_RULES = [(r"\bfog\b", "fog"), (r"\b(hazard|emergency|flashers?)\b", "hazard"),
+                (r"\b(cabin|interior|dome|reading)\b", "cabin")]
+_DELTA_INTENTS = {"WARMER", "COOLER", "FAN_UP", "FAN_DOWN", "SEAT_HEAT_UP",
+                  "SEAT_HEAT_DOWN", "SEAT_COOL_UP", "SEAT_COOL_DOWN"}
+
+
+def _numbers(words):
+    """[(index, value)] for digit tokens and spelled-out numbers (up to 100)."""
+    out, i = [], 0
+    while i < len(words):
+        w = words[i]
+        if w.isdigit():
+            out.append((i, int(w)))
+        elif w in _TENS:
+            n = _TENS[w]
+            if i + 1 < len(words) and words[i + 1] in _NUMBER_WORDS and n < 100:
+                n += _NUMBER_WORDS[words[i + 1]]
+                i += 1
+            out.append((i, n))
+        elif w in _NUMBER_WORDS:
+            out.append((i, _NUMBER_WORDS[w]))
+        i += 1
+    return out
+
+
+def zone_of(text):
+    """area code for the zone the utterance names (0 = all / none named)."""
+    for pat, area in _ZONE_RULES:
+        if re.search(pat, text):
+            return area
+    return 0
+
+
+def fill_slots(name, text):
+    """Complete intent dict for intent `name` from the raw utterance, or None
+    when a needed value is missing or a number can't be placed."""
+    t = normalize(text)
+    words = t.split()
+    nums = _numbers(words)
+    intent = {"intent": name, "area": zone_of(t)}
+    if name in _META_INTENTS:
+        return {"intent": name, "area": 0} if not nums else None
+    if name in MANUAL_INTENTS:
+        return None                         # the topic needs the LLM
+    if name in _DELTA_INTENTS:
+        by = [v for i, v in nums if i > 0 and words[i - 1] == "by"]
+        if len(nums) != len(by) or not 1 <= (by or [1])[0] <= 3:
+            return None
+        intent["delta"] = (by or [1])[0]
+    elif name == "SET_TEMPERATURE":
+        if len(nums) != 1 or not 16 <= nums[0][1] <= 28:
+            return None
+        intent["temp"] = nums[0][1]
+    elif name == "SET_FAN":
+        if len(nums) != 1 or not 1 <= nums[0][1] <= 7:
+            return None
+        intent["fan_level"] = nums[0][1]
+    elif name == "WINDOW_OPEN":
+        if nums:
+            if len(nums) != 1 or "percent" not in words or nums[0][1] > 100:
+                return None
+            intent["position"] = nums[0][1]
+        elif re.search(r"\b(fully|all the way|completely)\b", t):
+            intent["position"] = 100
+        else:
+            intent["position"] = 50
+    elif nums:
+        return None
+    if name in ("LIGHTS_ON", "LIGHTS_OFF"):
+        intent["light_type"] = next((lt for pat, lt in _LIGHT_RULES
+                                     if re.search(pat, t)), "head")
+    return intent
+
 
 class HvacProvider:
     """fsttm.domains provider for the HVAC/vehicle deployment."""
@@ -212,6 +378,12 @@ class HvacProvider:
     def translate(self, intent, enabled=None):
         return translate(intent, enabled)
 
+    def ack_template(self, intent) -> Optional[str]:
+        return ack_template(intent)
+
+    def fill_slots(self, name, text) -> Optional[dict]:
+        return fill_slots(name, text)
+
     def meta_intent(self, intent) -> Optional[str]:
         name = (intent or {}).get("intent") if isinstance(intent, dict) else None
         return name if name in _ENGINE_META else None
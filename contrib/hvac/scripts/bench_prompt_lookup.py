@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Prompt-lookup speculative decoding vs create_completion on manual-RAG answers.
+
+Same retrieval + answer prompt + sampling as rag_demo.py and the live manual
+path (temperature 0.2, top_k 40, top_p 0.9, the manual stop strings). Each
+question's prompt is evaluated once up front, so both sides reuse the KV
+prefix and the timings compare decoding, not prompt eval. Both sides run with
+the same seed, so the answers should match; a rare divergence is batched-vs-
+single-token float rounding tipping a near-tie, not a different distribution.
+With --draft-model the same lengths are also run with a small draft GGUF
+(fsttm.speculative.DraftModel) in place of prompt lookup.
+
+Usage:
+    python scripts/bench_prompt_lookup.py \\
+        --store models/manual.npz \\
+        --embed models/nomic-embed-text-v1.5.Q4_K_M.gguf \\
+        --llm models/Phi-3-mini-4k-instruct-Q6_K.gguf \\
+        --draft 4 8 --runs 3 [--draft-model models/draft.gguf] \\
+        ["another question" ...]
+"""
+import argparse
+import time
+
+from fsttm.rag.retrieve import Retriever, build_answer_prompt
+from fsttm.speculative import DraftModel, stream_completion
+
+# rag_demo.py's example plus the manual questions of bench_models.py
+QUESTIONS = [
+    "what is the cost of grabbing the floor",
+    "how do I open the trunk",
+    "how do I charge the car",
+    "explain the tyre pressure warning light",
+    "where is the windshield washer fluid",
+]
+SAMPLING = dict(max_tokens=120, temperature=0.2, top_k=40, top_p=0.9,
+                stop=["\n", "Question:", "Manual excerpts:", "Spoken answer:"])
+
+
+def run_baseline(llm, prompt, seed):
+    llm.set_seed(seed)
+    t = time.monotonic()
+    out = llm.create_completion(prompt, seed=seed, **SAMPLING)
+    s = time.monotonic() - t
+    return out["choices"][0]["text"], out["usage"]["completion_tokens"], s
+
+
+def run_lookup(llm, prompt, seed, draft, drafter=None):
+    llm.set_seed(seed)
+    st = {}
+    text = "".join(stream_completion(llm, prompt, draft_tokens=draft,
+                                     drafter=drafter, stats=st, **SAMPLING))
+    return text, st
+
+
+def main():
+    ap = argparse.ArgumentParser("prompt-lookup decoding benchmark")
+    ap.add_argument("question", nargs="*", help="default: the built-in set")
+    ap.add_argument("--store", required=True)
+    ap.add_argument("--embed", required=True)
+    ap.add_argument("--llm", required=True, help="chat GGUF for the answer")
+    ap.add_argument("--name", default="Nina")
+    ap.add_argument("-k", type=int, default=3)
+    ap.add_argument("--draft", type=int, nargs="+", default=[8],
+                    help="draft lengths to compare")
+    ap.add_argument("--draft-model", default=None,
+                    help="small GGUF with the same vocabulary as --llm")
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--n-gpu-layers", type=int, default=0)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    r = Retriever(args.store, args.embed, k=args.k)
+    from llama_cpp import Llama
+    llm = Llama(model_path=args.llm, n_ctx=4096, n_batch=2048,
+                n_gpu_layers=args.n_gpu_layers, verbose=False)
+
+    variants = [("lookup", d, None) for d in args.draft]
+    if args.draft_model:
+        dm = DraftModel(args.draft_model, n_ctx=4096, n_batch=2048,
+                        n_gpu_layers=args.n_gpu_layers)
+        if not dm.compatible(llm):
+            ap.error(f"{args.draft_model}: vocabulary differs from {args.llm}")
+        variants += [("draft", d, dm) for d in args.draft]
+
+    totals = {"base": [0, 0.0]}
+    totals.update({v[:2]: [0, 0.0, 0, 0, 0] for v in variants})
+    same = n = 0
+    for q in args.question or QUESTIONS:
+        context, _ = r.context(q)
+        if not context:
+            print(f"-- {q!r}: nothing retrieved, skipped")
+            continue
+        prompt = build_answer_prompt(args.name, q, context)
+        llm.create_completion(prompt, max_tokens=1)     # prompt into the KV
+        print(f"\nQ: {q}")
+        for run in range(args.runs):
+            seed = args.seed + run
+            ref, ntok, s = run_baseline(llm, prompt, seed)
+            totals["base"][0] += ntok
+            totals["base"][1] += s
+            line = f"   run {run}: base {ntok / s:6.1f} tok/s"
+            for kind, d, drafter in variants:
+                text, st = run_lookup(llm, prompt, seed, d, drafter)
+                t = totals[kind, d]
+                t[0] += st["tokens"]
+                t[1] += st["s"]
+                t[2] += st["drafted"]
+                t[3] += st["accepted"]
+                t[4] += st["passes"]
+                n += 1
+                same += text == ref
+                acc = st["accepted"] / st["drafted"] if st["drafted"] else 0.0
+                line += (f" | {kind} {d}: {st['tokens'] / st['s']:6.1f} tok/s"
+                         f" acc {acc:4.0%}" + ("" if text == ref else " (differs)"))
+            print(line)
+        print(f"A: {ref.strip()}")
+
+    if not n:
+        return
+    base_tps = totals["base"][0] / totals["base"][1]
+    print(f"\ncreate_completion: {base_tps:6.1f} tok/s")
+    for kind, d, _ in variants:
+        ntok, s, drafted, accepted, passes = totals[kind, d]
+        tps = ntok / s
+        label = "prompt lookup" if kind == "lookup" else "draft model  "
+        print(f"{label} {d:2d}: {tps:6.1f} tok/s ({tps / base_tps:.2f}x) "
+              f"accept {accepted / max(drafted, 1):.0%} "
+              f"{ntok / max(passes, 1):.2f} tok/pass")
+    print(f"identical answers: {same}/{n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,10 +14,14 @@ Run on a GPU box (taycann):
     .venv/bin/python scripts/opt_intent.py --model Phi-3-mini-Q6
     .venv/bin/python scripts/opt_intent.py --prompt baseline,fewshot
     .venv/bin/python scripts/opt_intent.py --json-temp 0,0.1,0.3   # sweep pass-1 temp
+    .venv/bin/python scripts/opt_intent.py --encoding canonical,compact
     .venv/bin/python scripts/opt_intent.py --out results.json
 
-The matrix is (model × prompt-variant × json-temp). Each cell runs the labelled
-set through approach_a and reports intent%, field%, p50/p95 latency.
+The matrix is (model × prompt-variant × encoding × json-temp). Each cell runs the
+labelled set through approach_a and reports intent%, field%, p50/p95 latency and
+JSON tokens per intent. The compact encoding (fsttm.wire, config
+system.intent_encoding) is scored on the EXPANDED canonical dict, exactly what
+translate() sees, so the accuracy columns compare like with like.
 """
 import argparse
 import json
@@ -115,15 +119,28 @@ def _pct(n, d):
     return 100.0 * n / d if d else 0.0
 
 
-def run_cell(model, sys_prompt, grammar, json_temp, two_pass):
-    """Run the labelled set once. Returns a result dict."""
+def _json_tokens(model, intent):
+    """Tokens of the intent JSON as the grammar emits it (compact separators)."""
+    if not isinstance(intent, dict):
+        return 0
+    text = json.dumps(intent, separators=(",", ":"), ensure_ascii=False)
+    return len(model.tokenize(text.encode(), add_bos=False, special=False))
+
+
+def run_cell(model, sys_prompt, grammar, schema, codec, json_temp, two_pass):
+    """Run the labelled set once. codec: fsttm.wire codec for the compact
+    encoding (None = canonical). Returns a result dict."""
     intent_ok = field_ok = 0
     lats = []
+    toks = []
     misses = []
     for utt, exp_intent, exp_fields in CASES:
         intent, tts, tj, tt = two_pass.approach_a(
-            model, sys_prompt, utt, grammar, json_temp=json_temp)
+            model, sys_prompt, utt, grammar, json_temp=json_temp, schema=schema)
         lats.append(tj)   # pass-1 latency is what intent accuracy costs
+        toks.append(_json_tokens(model, intent))
+        if codec is not None and intent is not None:
+            intent = codec.decode(intent)
         got = intent.get("intent") if isinstance(intent, dict) else None
         i_ok = (got == exp_intent)
         f_ok = i_ok and _field_match(intent, exp_fields)
@@ -140,6 +157,8 @@ def run_cell(model, sys_prompt, grammar, json_temp, two_pass):
         "field_pct": _pct(field_ok, n),
         "intent_ok": intent_ok, "field_ok": field_ok, "n": n,
         "p50_ms": round(p50), "p95_ms": round(p95),
+        "tok_per_intent": round(sum(toks) / n, 1),
+        "ms_per_intent": round(sum(lats) / n),
         "misses": misses,
     }
 
@@ -153,6 +172,9 @@ def main():
                          "intents.PROMPT_VARIANTS)")
     ap.add_argument("--json-temp", default="0",
                     help="comma list of pass-1 temperatures to sweep")
+    ap.add_argument("--encoding", default="canonical,compact",
+                    help="comma list of intent wire encodings "
+                         "(fsttm.wire.ENCODINGS)")
     ap.add_argument("--n-ctx", type=int, default=4096)
     ap.add_argument("--domains", default=None,
                     help="comma list e.g. climate,lights,body (default all)")
@@ -163,8 +185,10 @@ def main():
     args = ap.parse_args()
 
     from llama_cpp import Llama
-    from fsttm_hvac import provider as intents, two_pass
-    from fsttm_hvac.provider import build_grammar as make_hvac_grammar
+    from fsttm import two_pass
+    from fsttm.domain import compile_grammar
+    from fsttm.wire import codec_for
+    from fsttm_hvac import provider as intents
 
     # --config: pull domains (and the gpt model path) straight from a deployment
     # config so the sweep measures exactly what ships there.
@@ -179,7 +203,17 @@ def main():
         print(f"=== config {args.config}: domains={cfg_domains} model={cfg_model}")
 
     domains = (args.domains.split(",") if args.domains else cfg_domains)
-    grammar = make_hvac_grammar(domains)
+    schema = intents.build_schema(domains)
+    codec = codec_for(schema)
+    # encoding → (schema, grammar, codec); the compact grammar is compiled from
+    # the wire schema, the canonical one is what production has always used.
+    encodings = {}
+    for enc in args.encoding.split(","):
+        if enc == "compact":
+            wire_schema = codec.encode_schema(schema)
+            encodings[enc] = (wire_schema, compile_grammar(wire_schema), codec)
+        else:
+            encodings[enc] = (schema, compile_grammar(schema), None)
     model_keys = args.model.split(",") if args.model else list(MODELS)
     # Default: sweep every real config variant (intents.PROMPT_VARIANTS).
     prompt_keys = args.prompt.split(",") if args.prompt else list(intents.PROMPT_VARIANTS)
@@ -196,16 +230,22 @@ def main():
         model = Llama(model_path=path, n_ctx=args.n_ctx, n_gpu_layers=-1,
                       verbose=False)
         print(f"    loaded in {time.monotonic()-t0:.1f}s")
-        for pk in prompt_keys:
+        cells = [(pk, enc) for pk in prompt_keys for enc in encodings]
+        for pk, enc in cells:
+            sch, grammar, cdc = encodings[enc]
             sys_prompt = PROMPTS[pk](intents, domains)
+            if cdc is not None:
+                sys_prompt = cdc.encode_prompt(sys_prompt)
             ptoks = len(model.tokenize(sys_prompt.encode(), add_bos=True, special=True))
             for jt in temps:
-                r = run_cell(model, sys_prompt, grammar, jt, two_pass)
-                r.update(model=mk, prompt=pk, json_temp=jt, prompt_toks=ptoks)
+                r = run_cell(model, sys_prompt, grammar, sch, cdc, jt, two_pass)
+                r.update(model=mk, prompt=pk, encoding=enc, json_temp=jt,
+                         prompt_toks=ptoks)
                 rows.append(r)
-                print(f"  [{mk} · {pk} · t={jt}] intent {r['intent_ok']}/{r['n']} "
+                print(f"  [{mk} · {pk} · {enc} · t={jt}] intent {r['intent_ok']}/{r['n']} "
                       f"({r['intent_pct']:.0f}%) | field {r['field_ok']}/{r['n']} "
                       f"({r['field_pct']:.0f}%) | p50 {r['p50_ms']}ms p95 {r['p95_ms']}ms "
+                      f"| {r['tok_per_intent']} tok/intent {r['ms_per_intent']}ms/intent "
                       f"| prompt {ptoks}tok")
                 for utt, ei, ef, got in r["misses"]:
                     print(f"        MISS {utt!r}: exp {ei}{ef or ''} got {json.dumps(got)}")
@@ -217,16 +257,17 @@ def main():
     print("\n" + "=" * 72)
     print("RANKED (by field% → intent% → latency)")
     print("=" * 72)
-    print(f"{'model':16s} {'prompt':9s} {'jt':4s} {'field%':>7s} "
-          f"{'intent%':>8s} {'p50':>6s} {'p95':>6s} {'ptok':>6s}")
+    print(f"{'model':16s} {'prompt':9s} {'enc':9s} {'jt':4s} {'field%':>7s} "
+          f"{'intent%':>8s} {'p50':>6s} {'p95':>6s} {'tok/i':>6s} {'ptok':>6s}")
     for r in rows:
-        print(f"{r['model']:16s} {r['prompt']:9s} {r['json_temp']:<4} "
+        print(f"{r['model']:16s} {r['prompt']:9s} {r['encoding']:9s} {r['json_temp']:<4} "
               f"{r['field_pct']:6.0f}% {r['intent_pct']:7.0f}% "
-              f"{r['p50_ms']:5d}m {r['p95_ms']:5d}m {r['prompt_toks']:6d}")
+              f"{r['p50_ms']:5d}m {r['p95_ms']:5d}m {r['tok_per_intent']:6.1f} "
+              f"{r['prompt_toks']:6d}")
     if rows:
         best = rows[0]
         print(f"\nSWEET POINT: {best['model']} · prompt={best['prompt']} · "
-              f"json_temp={best['json_temp']} → "
+              f"encoding={best['encoding']} · json_temp={best['json_temp']} → "
               f"field {best['field_pct']:.0f}% / intent {best['intent_pct']:.0f}% "
               f"@ p50 {best['p50_ms']}ms")
 
@@ -0,0 +1,98 @@
+"""
+Train / evaluate the non-LLM intent fast path (fsttm.fastintent) for HVAC.
+
+Training data: the few-shot lines and trigger tables of the assembled intent
+prompt (what the runtime trains on by itself) plus, with --with-cases, the
+labelled opt_intent.py set. The held-out report trains on the prompt ONLY and
+scores the opt_intent.py cases, per confidence threshold:
+
+  fired%    utterances the fast path answers (the rest go to the LLM)
+  correct%  of those, intent AND the checked fields right (fill_slots)
+  ms        mean classify + fill time
+
+No model or GPU needed:
+    python contrib/hvac/scripts/train_fast_intent.py
+    python contrib/hvac/scripts/train_fast_intent.py --domains climate,lights
+    python contrib/hvac/scripts/train_fast_intent.py --with-cases --out fast.json
+
+Point config system.fast_intent_model at the --out file to use it instead of
+the prompt-trained model.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, ".")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def evaluate(model, cases, thresholds, provider):
+    from fsttm.fastintent import fast_intent
+    from opt_intent import _field_match
+    rows = []
+    for th in thresholds:
+        fired = correct = 0
+        misses = []
+        t0 = time.monotonic()
+        for utt, exp_intent, exp_fields in cases:
+            intent, name, prob = fast_intent(model, provider, utt, th)
+            if intent is None:
+                continue
+            fired += 1
+            ok = intent["intent"] == exp_intent and _field_match(intent, exp_fields)
+            correct += ok
+            if not ok:
+                misses.append((utt, exp_intent, exp_fields, intent, prob))
+        ms = (time.monotonic() - t0) * 1000 / max(len(cases), 1)
+        rows.append({"threshold": th, "fired": fired, "correct": correct,
+                     "n": len(cases), "ms": ms, "misses": misses})
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Fast intent classifier tooling")
+    ap.add_argument("--domains", default=None,
+                    help="comma list e.g. climate,lights,body (default all)")
+    ap.add_argument("--variant", default="few-shot-extra",
+                    help="prompt variant whose examples train the model")
+    ap.add_argument("--thresholds", default="0.3,0.4,0.5,0.6,0.7,0.8,0.9")
+    ap.add_argument("--with-cases", action="store_true",
+                    help="also train the saved model on the opt_intent.py set")
+    ap.add_argument("--out", default=None, help="write the trained model JSON")
+    args = ap.parse_args()
+
+    from fsttm.fastintent import FastIntent, examples_from_prompt
+    from fsttm_hvac import provider as intents
+    from opt_intent import CASES
+
+    domains = args.domains.split(",") if args.domains else None
+    labels = set(intents.build_schema(domains)["properties"]["intent"]["enum"])
+    prompt = intents.build_prompt(domains, variant=args.variant)
+    examples = examples_from_prompt(prompt, labels)
+    cases = [c for c in CASES if c[1] in labels]
+    print(f"prompt examples: {len(examples)} over "
+          f"{len({y for _, y in examples})} intents; held-out cases: {len(cases)}")
+
+    t0 = time.monotonic()
+    model = FastIntent.train(examples)
+    print(f"trained in {(time.monotonic() - t0) * 1000:.0f}ms "
+          f"({len(model.vocab)} features)")
+
+    thresholds = [float(t) for t in args.thresholds.split(",")]
+    print(f"\n{'thresh':>6s} {'fired%':>7s} {'correct%':>9s} {'ms':>6s}")
+    for r in evaluate(model, cases, thresholds, intents.PROVIDER):
+        fired = 100.0 * r["fired"] / max(r["n"], 1)
+        corr = 100.0 * r["correct"] / max(r["fired"], 1)
+        print(f"{r['threshold']:6.2f} {fired:6.0f}% {corr:8.0f}% {r['ms']:6.2f}")
+        for utt, ei, ef, got, p in r["misses"]:
+            print(f"        MISS {utt!r}: exp {ei}{ef or ''} got {got} p={p:.2f}")
+
+    if args.out:
+        train = examples + ([(u, i) for u, i, _ in cases] if args.with_cases else [])
+        FastIntent.train(train).save(args.out)
+        print(f"\nwrote {args.out} ({len(train)} examples)")
+
+
+if __name__ == "__main__":
+    main()
@@ -108,6 +108,107 @@ def test_history_fifo_order():
         assert "first user" not in turns_text or h.turn_count() == 3
 
 
+class _CharTokenizer:
+    """Stand-in model: 1 char = 1 token, counts tokenize() calls."""
+    model_path = "Phi-3-mini-4k-instruct-Q6_K.gguf"
+
+    def __init__(self):
+        self.calls = 0
+        self.input_ids = []
+        self.n_tokens = 0
+
+    def tokenize(self, b, add_bos=True, special=False):
+        self.calls += 1
+        return ([1] if add_bos else []) + [ord(c) for c in b.decode()]
+
+    def detokenize(self, toks):
+        return "".join(chr(t) for t in toks).encode()
+
+
+def test_history_chat_tokens_prefix_stable_across_turns():
+    """Past turns tokenize once and keep identical ids, so the next prompt
+    extends the previous one and only the new turn needs evaluation."""
+    m = _CharTokenizer()
+    h = ConversationHistory(n_ctx=4096)
+    prev, _ = h.build_chat_tokens(m, "Be brief.", "hello")
+    h.add_turn("hello", "hi there")
+    toks, stop = h.build_chat_tokens(m, "Be brief.", "how are you?")
+    assert toks[:len(prev)] == prev
+    text, _ = h.build_chat_prompt(m.model_path, "Be brief.", "how are you?")
+    assert toks == m.tokenize(text.encode())
+    assert "<|end|>" in stop
+    calls = m.calls
+    h.add_turn("how are you?", "fine")
+    h.build_chat_tokens(m, "Be brief.", "bye")
+    assert m.calls - calls == 2        # new past turn + new user head only
+
+
+def test_history_note_reply_keeps_generated_tokens():
+    m = _CharTokenizer()
+    h = ConversationHistory(n_ctx=4096)
+    prompt, _ = h.build_chat_tokens(m, "S", "hi")
+    gen = [ord(c) for c in "yo!"]
+    m.input_ids, m.n_tokens = prompt + gen, len(prompt) + len(gen)
+    h.add_turn("hi", "yo!")
+    h.note_reply(m, "hi", "yo!")
+    nxt, _ = h.build_chat_tokens(m, "S", "again")
+    assert nxt[:m.n_tokens] == m.input_ids
+
+
+def test_history_bound_counts_are_exact():
+    """Bound to a tokenizer, the running total equals the real prompt size
+    and trimming keeps sys + history + new turn + headroom under threshold."""
+    m = _CharTokenizer()
+    h = ConversationHistory(n_ctx=400, ctx_threshold=0.9)
+    h.bind(m)
+    for i in range(12):
+        h.add_turn(f"user {i}", f"reply number {i}")
+    prompt, _ = h.build_chat_tokens(m, "Sys.", "new")
+    assert h.total_tokens("Sys.") + len(m.tokenize(
+        "<|user|>\nnew<|end|>\n<|assistant|>\n".encode(), add_bos=False)) \
+        == len(prompt)
+    assert len(prompt) + 64 <= h.threshold_toks
+    before = h.total_tokens("Sys.")
+    h.replace_last_reply("no")
+    assert h.total_tokens("Sys.") == before - len("reply number 11") + len("no")
+    assert h._turns[-1][1] == "no"
+
+
+class _ShiftCtx:
+    def __init__(self):
+        self.ops = []
+
+    def kv_cache_seq_rm(self, seq, p0, p1):
+        self.ops.append(("rm", seq, p0, p1))
+        return True
+
+    def kv_cache_seq_shift(self, seq, p0, p1, delta):
+        self.ops.append(("shift", seq, p0, p1, delta))
+
+
+def test_history_trim_shifts_kv_instead_of_reeval():
+    import numpy as np
+    m = _CharTokenizer()
+    m._ctx = _ShiftCtx()
+    h = ConversationHistory(n_ctx=200, ctx_threshold=0.8)   # budget ≈ 160 - 64
+    for i in range(3):
+        h.add_turn(f"user message {i}", f"assistant reply {i}")
+    prompt, _ = h.build_chat_tokens(m, "S", "q")             # fits, no trim
+    m.input_ids = np.array(prompt + [0] * 400, dtype=np.intc)
+    m.n_tokens = len(prompt)
+    h.add_turn("q", "a much longer assistant reply " * 10)
+    nxt, _ = h.build_chat_tokens(m, "S", "next")
+    assert "user message 0" not in str(h._turns)
+    n_sys = len(m.tokenize("<|system|>\nS<|end|>\n".encode()))
+    dropped = h.shift_kv(m)
+    assert dropped > 0
+    assert ("rm", 0, n_sys, n_sys + dropped) in m._ctx.ops
+    assert list(m.input_ids[:n_sys]) == nxt[:n_sys]
+    kept = nxt[:m.n_tokens]
+    assert list(m.input_ids[:len(kept)]) == kept        # survivors line up
+    assert h.shift_kv(m) == 0                           # consumed
+
+
 # ── Intent + context integration tests (requires model) ──────────────────────
 
 SKIP_MODEL = pytest.mark.skipif(
@@ -65,3 +65,43 @@ def test_meta_and_unknown_produce_no_command():
     assert intents.translate({"intent": "STATUS", "area": 0}) == []
     assert intents.translate({"intent": "UNKNOWN", "area": 0}) == []
     assert intents.translate({"intent": "NOPE", "area": 0}) == []
+
+
+def test_ack_templates_fill_zone_and_fields():
+    ack = intents.PROVIDER.ack_template
+    assert ack({"intent": "WARMER", "area": 1, "delta": 1}) == \
+        "Turning up the heat on the driver side."
+    assert ack({"intent": "SET_TEMPERATURE", "area": 4, "temp": 22.0}) == \
+        "Setting passenger temperature to 22 degrees."
+    assert ack({"intent": "LIGHTS_ON", "area": 0, "light_type": "cabin"}) == \
+        "Cabin light on."
+    assert ack({"intent": "WINDOW_CLOSE", "area": 0}) == "Closing the windows."
+    # missing field → no template (template-then-llm falls back to pass 2)
+    assert ack({"intent": "SET_TEMPERATURE", "area": 0}) is None
+    # engine/dispatcher-answered intents have no template
+    assert ack({"intent": "STATUS", "area": 0}) is None
+    assert ack({"intent": "HOWTO", "area": 0, "topic": "x"}) is None
+
+
+def test_every_control_intent_has_an_ack_template():
+    enum = intents.build_schema(None)["properties"]["intent"]["enum"]
+    control = [i for i in enum if i not in intents._META_INTENTS
+               and i not in intents.MANUAL_INTENTS]
+    assert set(control) <= set(intents.ACK_TEMPLATES)
+
+
+def test_fill_slots_from_utterance():
+    """Non-LLM fast path: the classifier names the intent, fill_slots reads
+    the zone / numbers back out of the raw text."""
+    assert intents.fill_slots("SEAT_HEAT_UP", "warm my seat") == {
+        "intent": "SEAT_HEAT_UP", "area": 1, "delta": 1}
+    assert intents.fill_slots("SET_TEMPERATURE", "set temperature to 22") == {
+        "intent": "SET_TEMPERATURE", "area": 0, "temp": 22}
+    assert intents.fill_slots("WARMER", "warmer by 2")["delta"] == 2
+    assert intents.fill_slots("LIGHTS_ON", "turn on the cabin lights") == {
+        "intent": "LIGHTS_ON", "area": 0, "light_type": "cabin"}
+
+
+def test_fill_slots_refuses_what_it_cannot_place():
+    assert intents.fill_slots("SET_FAN", "set fan to 9") is None     # out of range
+    assert intents.fill_slots("HOWTO", "how do I pair my phone") is None
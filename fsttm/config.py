@@ -26,6 +26,28 @@ class STT(BaseModel):
     # Parasite phrases — whole-string whisper hallucinations to drop as noise
     # (in addition to []/()/** sound-annotation auto-detection). Null = defaults.
     parasites: Optional[List[str]] = None
+    # Streaming STT: re-transcribe the utterance every partial_ms while it is
+    # spoken (PartialText) so the final pass only covers the uncommitted tail.
+    stream: bool = False
+    partial_ms: int = 500
+    # Encoder context sized to the utterance: its length + ctx_margin seconds
+    # instead of whisper's fixed 30 s window (largest gain on CPU-only
+    # builds). null → full window.
+    ctx_margin: Optional[float] = None
+    # Pre-STT speech gate (fsttm.speech_gate): utterances with under
+    # min_voiced_ms of voiced (loud, harmonic) audio — coughs, clicks, hiss —
+    # are dropped before whisper runs; in stream mode no partial pass runs
+    # until the utterance so far passes.
+    speech_gate: bool = False
+    min_voiced_ms: int = 150
+    # Model tiering: a second, faster whisper model (e.g. "tiny.en") takes
+    # utterances up to fast_max_s, and every utterance while fast_backlog
+    # transcribes are queued. A fast result below escalate_below confidence
+    # is redone by `model` (null → never). fast_model null → one model.
+    fast_model: Optional[str] = None
+    fast_max_s: float = 3.0
+    fast_backlog: int = 2
+    escalate_below: Optional[float] = 0.5
 
 
 class TTS(BaseModel):
@@ -91,6 +113,31 @@ class GptParams(BaseModel):
     n_threads: int = 6
     n_predict: int = 512
     safeword: str = ""
+    # Directory for the primed intent-prefix KV state, keyed by model, n_ctx
+    # and prompt hash. A warm boot loads it instead of re-evaluating the
+    # prefix. null → off.
+    prefix_cache: Optional[str] = None
+    # Chat FIFO trim: shift the KV past the dropped turns (keeping the system
+    # prompt) instead of re-evaluating the remaining history. false → re-eval.
+    ctx_shift: bool = True
+    # Chat history budget as a fraction of n_ctx. Turns are counted with the
+    # model's tokenizer, so this can run close to 1.0 without overflowing.
+    ctx_threshold: float = 0.80
+    # Intent prefixes kept primed at once, one per assembled prompt (domain
+    # set / prompt variant), evicted LRU; and the fraction of n_ctx they may
+    # occupy together. Switching back to a resident prompt is instant.
+    prefix_slots: int = 3
+    prefix_budget: float = 0.5
+    # Prompt-lookup speculative decoding for manual and chat answers: tokens
+    # drafted per verify pass from n-gram matches in the prompt. 0 → off.
+    prompt_lookup: int = 0
+    # Draft-model speculative decoding for manual and chat answers: a small
+    # GGUF with the main model's vocabulary drafts draft_tokens per verify
+    # pass (used instead of prompt lookup). An answer whose acceptance falls
+    # below draft_min_accept stops drafting. null → off.
+    draft_model: Optional[str] = None
+    draft_tokens: int = 4
+    draft_min_accept: float = 0.3
 
 
 class System(BaseModel):
@@ -115,12 +162,51 @@ class System(BaseModel):
     # Intent prompt variant: "one-shot" (lean, fastest), "few-shot" (production,
     # +accuracy), or "few-shot-extra" (max coverage).
     prompt_variant: str = "few-shot"
+    # Intent JSON wire encoding: "canonical" (full key/enum names) or "compact"
+    # (short keys + enum codes derived from the schema, see fsttm.wire;
+    # expanded back to the canonical dict before translate()).
+    intent_encoding: str = "canonical"
+    # Spoken ack after an intent: "llm" (second LLM pass, every turn),
+    # "template" (provider ack_template only; never runs pass 2), or
+    # "template-then-llm" (template when the provider has one, else pass 2).
+    ack_mode: str = "llm"
+    # Non-LLM intent fast path (fsttm.fastintent): "off", "shadow" (classify
+    # every intent turn and log agreement with the LLM, never act) or "on"
+    # (answer at prob >= fast_intent_threshold without the LLM, else fall
+    # back to it). fast_intent_model: a model JSON saved by
+    # contrib/hvac/scripts/train_fast_intent.py; null → trained at startup
+    # from the intent prompt's few-shot examples and trigger tables.
+    fast_intent: str = "off"
+    fast_intent_threshold: float = 0.5
+    fast_intent_model: Optional[str] = None
+    # Exact-repeat intent cache: entries kept (0 = off) and their max age in
+    # seconds (null = no expiry). A repeated command (same normalized text,
+    # intent_domains and prompt) is answered without the LLM.
+    intent_cache: int = 256
+    intent_cache_ttl: Optional[float] = 3600.0
+    # Semantic intent memory: a paraphrase of a known command (prompt
+    # examples + utterances the LLM resolved) is recalled by embedding
+    # similarity, its numbers / zone re-read from the text, without the LLM.
+    # intent_recall_embed: GGUF embedding model; null → the domain's manual
+    # RAG embed model (domains.<domain>.manual.embed), shared with the RAG.
+    intent_recall: bool = False
+    intent_recall_threshold: float = 0.85
+    intent_recall_embed: Optional[str] = None
+    # Speculative intent: with stt.stream on, start the intent pass on a
+    # partial transcript once all of it is agreed (the user paused), during
+    # the VAD hangover. The final transcript commits it when it normalizes to
+    # the same text; otherwise it is discarded. Intent mode only.
+    speculative_intent: bool = False
     attention: bool = False             # wake-word layer; start ASLEEP when true.
                                         # Once woken it stays AWAKE unless
                                         # sleep_intent re-enables sleeping.
     sleep_intent: bool = False          # LLM system-intent grammar decides when
                                         # to go back to sleep — needs attention.
                                         # Off → never re-sleeps (always awake).
+    # sleep_intent in ONE pass: SLEEP / MUTE join the domain intent enum and
+    # prompt, so a wake-prefixed command is not preceded by a separate
+    # classification call. Intent mode only (plain chat keeps the classifier).
+    fold_system_intents: bool = False
     wake_words: List[str] = ["nina", "hey nina", "hi nina"]
 
 
@@ -6,8 +6,11 @@ diverge. The engine dispatches on the DOMAIN PROVIDER's translate() output
 (command dicts with a "cmd" discriminator) and its meta_intent() mapping —
 never on hardcoded intent names.
 
-Flow per IntentResult:
+Flow per intent:
   side_effects()   — dispatcher.handle(intent, commands): backend POSTs etc.
+                     Run on the early IntentParsed (right after the JSON pass),
+                     so it overlaps the spoken-ack generation.
+  then per IntentResult:
   try_defer()      — CHITCHAT → engine streams a persona reply;
                      dispatcher.defer_narration() → e.g. RAG-grounded answer.
                      True means "someone else narrates" (skip the ack).
@@ -95,6 +98,19 @@ class IntentFlow:
             pass
 
     # ── narration ─────────────────────────────────────────────────────────
+    def streams_ack(self, intent: dict) -> bool:
+        """True when spoken() will be the LLM ack itself — no clock/telemetry
+        answer, no chitchat or RAG narration — so the ack can be narrated as
+        it decodes. Pure: safe to ask before the IntentResult arrives."""
+        if not intent or self.is_chitchat(intent) or self.is_deferred_marker(intent):
+            return False
+        if self.provider.meta_intent(intent) in (META_TIME, META_DATE):
+            return False
+        try:
+            return self.dispatcher.local_answer(intent) is None
+        except Exception:
+            return False
+
     def try_defer(self, intent: dict) -> bool:
         """CHITCHAT → engine persona reply; else offer the dispatcher the
         chance to narrate (RAG). True = narration handled elsewhere."""
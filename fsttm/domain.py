@@ -115,6 +115,13 @@ class DomainProvider(Protocol):
     def build_prompt(self, enabled=None, variant=None) -> str: ...
     def translate(self, intent: dict, enabled=None) -> list: ...
     def meta_intent(self, intent: dict) -> Optional[str]: ...
+    # Deterministic spoken ack for an intent, or None (→ the LLM's pass-2 ack).
+    # Optional: the engine treats a provider without it as having no templates.
+    def ack_template(self, intent: dict) -> Optional[str]: ...
+    # Complete intent dict for intent NAME `name` from the raw utterance (the
+    # non-LLM fast path, fsttm.fastintent), or None → the LLM decodes it.
+    # Optional: without it the fast path never answers.
+    def fill_slots(self, name: str, text: str) -> Optional[dict]: ...
     def chitchat_system(self, assistant_name: str) -> Optional[str]: ...
     def make_dispatcher(self, ctx: DomainContext) -> DomainDispatcher: ...
 
@@ -169,6 +176,12 @@ class NullProvider:
         return name if name in (META_TIME, META_DATE, META_CHITCHAT,
                                 META_UNKNOWN) else None
 
+    def ack_template(self, intent) -> Optional[str]:
+        return None
+
+    def fill_slots(self, name, text) -> Optional[dict]:
+        return {"intent": name}
+
     def chitchat_system(self, assistant_name: str) -> Optional[str]:
         return None
 
@@ -0,0 +1,205 @@
+"""
+Grammar fast-forward for the intent JSON pass.
+
+Most of the intent JSON is dictated by the schema, not chosen by the model:
+`{"intent":"`, `","area":`, the tail of an enum value once its prefix is
+unique, the closing brace when no optional key remains. Sampling those one
+decode step at a time (~20–40 ms/token on the Jetson) is pure overhead.
+
+forced_text(schema, text) walks the partial JSON against the schema — the same
+shape llama_cpp's json_schema_to_gbnf emits (required keys first, then optional
+keys in property order, compact separators as in the few-shot examples) — and
+returns the continuation every grammar-valid completion must start with.
+forced_tokens() turns that into token ids that line up with the text already
+generated, so two_pass can evaluate the whole run in ONE batched eval and
+feed the ids to the grammar sampler with accept().
+
+Anything the walker doesn't model (extra properties, length limits, unknown
+types) yields no forced text — fast-forward simply stays out of the way.
+"""
+from __future__ import annotations  # PEP 563: lazy annotations for Python 3.8 (list[]/tuple[])
+import json
+import os
+
+
+class _Incomplete(Exception):
+    """Reached the end of the text; `forced` is the continuation the schema
+    dictates from here ('' when the model has a choice)."""
+    def __init__(self, forced: str = ""):
+        super().__init__(forced)
+        self.forced = forced
+
+
+class _Mismatch(Exception):
+    """Text outside what the walker models — stop forcing."""
+
+
+def _ws(t: str, i: int) -> int:
+    return i + 1 if i < len(t) and t[i] == " " else i   # space ::= " "?
+
+
+def _choice(cands: list[str], t: str, i: int) -> int:
+    """Match one of the literal `cands` at t[i:]; on running out of text raise
+    the completion they all share."""
+    rest = t[i:]
+    ext = [c for c in cands if c.startswith(rest)]
+    if ext and (len(ext) > 1 or ext[0] != rest):
+        if rest in ext:
+            raise _Incomplete("")          # complete, but a longer one may follow
+        raise _Incomplete(os.path.commonprefix(ext)[len(rest):])
+    full = [c for c in cands if rest.startswith(c)]
+    if not full:
+        raise _Mismatch(rest[:16])
+    return i + len(max(full, key=len))
+
+
+def _string(t: str, i: int) -> int:
+    if i >= len(t):
+        raise _Incomplete('"')
+    if t[i] != '"':
+        raise _Mismatch(t[i])
+    j = i + 1
+    while j < len(t):
+        if t[j] == "\\":
+            j += 2
+            continue
+        if t[j] == '"':
+            return j + 1
+        j += 1
+    raise _Incomplete("")
+
+
+def _number(t: str, i: int) -> int:
+    j = i
+    while j < len(t) and t[j] in "-+.eE0123456789":
+        j += 1
+    if j >= len(t):
+        raise _Incomplete("")
+    if j == i:
+        raise _Mismatch(t[i])
+    return j
+
+
+def _object(s: dict, t: str, i: int) -> int:
+    if i >= len(t):
+        raise _Incomplete("{")
+    if t[i] != "{":
+        raise _Mismatch(t[i])
+    if s.get("additionalProperties", True) is not False:
+        raise _Mismatch("additionalProperties")
+    props = s.get("properties", {})
+    required = s.get("required", [])
+    req = [k for k in props if k in required]
+    opt = [k for k in props if k not in required]
+    n_req, last_opt, first = 0, -1, True
+    i = _ws(t, i + 1)
+    while True:
+        pending = n_req < len(req)
+        remaining = [req[n_req]] if pending else opt[last_opt + 1:]
+        if not first:
+            if i >= len(t):
+                raise _Incomplete("," if pending else ("}" if not remaining else ""))
+            if t[i] == "}" and not pending:
+                return i + 1
+            if t[i] != ",":
+                raise _Mismatch(t[i])
+            i = _ws(t, i + 1)
+        elif not pending:
+            if i >= len(t):
+                raise _Incomplete("" if remaining else "}")
+            if t[i] == "}":
+                return i + 1
+        if not remaining:
+            raise _Mismatch("no key left")
+        j = _choice([json.dumps(k) for k in remaining], t, i)
+        key = json.loads(t[i:j])
+        i = _ws(t, j)
+        if i >= len(t):
+            raise _Incomplete(":")
+        if t[i] != ":":
+            raise _Mismatch(t[i])
+        i = _ws(t, _value(props[key], t, _ws(t, i + 1)))
+        if pending:
+            n_req += 1
+        else:
+            last_opt = opt.index(key)
+        first = False
+
+
+def _array(s: dict, t: str, i: int) -> int:
+    if i >= len(t):
+        raise _Incomplete("[")
+    if t[i] != "[":
+        raise _Mismatch(t[i])
+    if any(k in s for k in ("minItems", "maxItems", "prefixItems")):
+        raise _Mismatch("array bounds")
+    items = s.get("items", {})
+    i = _ws(t, i + 1)
+    if i >= len(t):
+        raise _Incomplete("")
+    if t[i] == "]":
+        return i + 1
+    while True:
+        i = _ws(t, _value(items, t, i))
+        if i >= len(t):
+            raise _Incomplete("")
+        if t[i] == "]":
+            return i + 1
+        if t[i] != ",":
+            raise _Mismatch(t[i])
+        i = _ws(t, i + 1)
+
+
+def _value(s: dict, t: str, i: int) -> int:
+    if "enum" in s:
+        return _choice([json.dumps(v) for v in s["enum"]], t, i)
+    typ = s.get("type")
+    if typ == "object":
+        return _object(s, t, i)
+    if typ == "array":
+        return _array(s, t, i)
+    if typ == "string" and not any(k in s for k in ("pattern", "format",
+                                                     "minLength", "maxLength")):
+        return _string(t, i)
+    if typ in ("integer", "number"):
+        return _number(t, i)
+    if typ == "boolean":
+        return _choice(["true", "false"], t, i)
+    raise _Mismatch(f"type {typ!r}")
+
+
+def forced_text(schema: dict, text: str) -> str:
+    """The continuation of the partial JSON `text` that the schema forces
+    (possibly several pieces chained, e.g. enum tail + `,"area":`)."""
+    out = ""
+    while True:
+        try:
+            _value(schema, text + out, 0)
+            return out                       # value complete: nothing forced
+        except _Incomplete as inc:
+            if not inc.forced:
+                return out
+            out += inc.forced
+        except (_Mismatch, RecursionError, ValueError, KeyError):
+            return out
+
+
+def forced_tokens(model, schema: dict, ids: list[int]) -> list[int]:
+    """Token ids for the schema-forced run after the generated `ids`, or []
+    when nothing is forced or the run doesn't start on a clean token boundary
+    (the model then simply samples the next token itself)."""
+    try:
+        text = model.detokenize(ids).decode("utf-8")
+    except UnicodeDecodeError:
+        return []                             # mid-codepoint: wait a token
+    forced = forced_text(schema, text)
+    if not forced:
+        return []
+    base = model.tokenize(text.encode(), add_bos=False, special=False)
+    full = model.tokenize((text + forced).encode(), add_bos=False, special=False)
+    if full[:len(base)] != base or len(full) == len(base):
+        return []
+    run = full[len(base):]
+    if model.detokenize(full)[len(model.detokenize(base)):] != forced.encode():
+        return []
+    return run
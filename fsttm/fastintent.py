@@ -0,0 +1,201 @@
+"""
+Non-LLM intent fast path.
+
+Every intent-mode utterance otherwise pays the full grammar-constrained LLM
+decode, even "AC on". FastIntent is a character n-gram TF-IDF + multinomial
+logistic-regression classifier over the intent NAMES (numpy only, trains in
+well under a second). The llama driver runs it ahead of IntentGenerate:
+
+  prob >= threshold and the provider can fill the slots (fill_slots) →
+      IntentParsed + IntentResult with the template ack, no LLM at all
+  otherwise → the normal two-pass LLM path
+
+Training data comes from the assembled intent prompt itself
+(examples_from_prompt): the few-shot lines `"utterance" → {json}` and the
+domain trigger tables `| INTENT | "phrase", "phrase" | … |`. So the classifier
+always covers exactly the enabled domains. contrib/hvac/scripts/train_fast_intent.py
+adds the opt_intent.py labelled set, reports accuracy / coverage per threshold
+and saves a model JSON that config `system.fast_intent_model` loads instead.
+
+Modes (config system.fast_intent): "off" | "shadow" — classify, log agreement
+with the LLM's intent, never act | "on".
+"""
+from __future__ import annotations  # PEP 563: lazy annotations for Python 3.8 (list[]/tuple[])
+import json
+import logging
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+from fsttm.wire import WireCodec
+
+log = logging.getLogger(__name__)
+
+MODES = ("off", "shadow", "on")
+
+_FEWSHOT_LINE = re.compile(r'^\s*"(?P<text>[^"]+)"\s*→\s*(?P<json>\{.*\})\s*$')
+_TABLE_ROW = re.compile(r'^\|\s*(?P<label>[A-Z][A-Z0-9_]*)\s*\|(?P<rest>.*)\|\s*$')
+_QUOTED = re.compile(r'"([^"]+)"')
+
+
+def normalize(text: str) -> str:
+    """Lower-case, apostrophes dropped, everything else non-alphanumeric → one
+    space. Shared by training and prediction (and the intent caches)."""
+    t = text.lower().replace("'", "").replace("’", "")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", t).split())
+
+
+def _expand(phrase: str) -> list:
+    """"warm/heat my seat" → ["warm my seat", "heat my seat"] (one slash
+    group at a time, so "turn on/off AC" gives "turn on AC", "turn off AC")."""
+    words = phrase.split()
+    for i, w in enumerate(words):
+        if "/" in w and not w.startswith("/") and not w.endswith("/"):
+            return [p for alt in w.split("/")
+                    for p in _expand(" ".join(words[:i] + [alt] + words[i + 1:]))]
+    return [phrase]
+
+
+def examples_from_prompt(prompt: str, labels=None) -> list:
+    """(utterance, intent name) pairs taught by an intent system prompt: the
+    few-shot example lines and the trigger-phrase table rows. `labels` (the
+    schema's intent enum) filters table rows whose first column is not an
+    intent (zone / light_type tables). A compact prompt
+    (system.intent_encoding) has its examples decoded through its legend."""
+    codec = WireCodec.from_legend(prompt)
+    out = []
+    for line in prompt.splitlines():
+        m = _FEWSHOT_LINE.match(line)
+        if m:
+            try:
+                obj = json.loads(m.group("json"))
+                name = (codec.decode(obj) if codec else obj).get("intent")
+            except (ValueError, AttributeError):
+                name = None
+            if name:
+                out.append((m.group("text"), name))
+            continue
+        m = _TABLE_ROW.match(line)
+        if m and (labels is None or m.group("label") in labels):
+            cells = m.group("rest").split("|")
+            for phrase in _QUOTED.findall(cells[0] if cells else ""):
+                out += [(p, m.group("label")) for p in _expand(phrase)]
+    return out
+
+
+def _features(text: str, lo: int = 2, hi: int = 4) -> Counter:
+    """Char n-grams of the padded words plus the words themselves."""
+    t = normalize(text)
+    feats = Counter("w:" + w for w in t.split())
+    padded = f" {t} "
+    for n in range(lo, hi + 1):
+        feats.update(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return feats
+
+
+class FastIntent:
+    """TF-IDF over char n-grams → softmax regression over intent names."""
+
+    def __init__(self, vocab: dict, idf: np.ndarray, labels: list,
+                 W: np.ndarray, b: np.ndarray, min_coverage: float = 0.5):
+        self.vocab, self.idf, self.labels = vocab, idf, list(labels)
+        self.W, self.b = W, b
+        self.min_coverage = min_coverage
+
+    # ── training ─────────────────────────────────────────────────────────
+    @classmethod
+    def train(cls, examples: list, epochs: int = 300, lr: float = 1.0,
+              l2: float = 1e-4) -> "FastIntent":
+        feats = [_features(t) for t, _ in examples]
+        vocab: dict = {}
+        df: Counter = Counter()
+        for f in feats:
+            df.update(f.keys())
+        for k in sorted(df):
+            vocab[k] = len(vocab)
+        idf = np.array([math.log((1 + len(feats)) / (1 + df[k])) + 1.0
+                        for k in sorted(df)], dtype=np.float32)
+        labels = sorted({y for _, y in examples})
+        X = np.stack([_vector(f, vocab, idf) for f in feats])
+        Y = np.zeros((len(examples), len(labels)), dtype=np.float32)
+        for i, (_, y) in enumerate(examples):
+            Y[i, labels.index(y)] = 1.0
+        W = np.zeros((len(vocab), len(labels)), dtype=np.float32)
+        b = np.zeros(len(labels), dtype=np.float32)
+        for _ in range(epochs):           # full-batch gradient descent
+            P = _softmax(X @ W + b)
+            G = (P - Y) / len(examples)
+            W -= lr * (X.T @ G + l2 * W)
+            b -= lr * G.sum(axis=0)
+        return cls(vocab, idf, labels, W, b)
+
+    # ── prediction ───────────────────────────────────────────────────────
+    def predict(self, text: str) -> tuple:
+        """(intent name, probability). The probability is 0 when fewer than
+        min_coverage of the utterance's n-grams were ever seen in training —
+        an out-of-vocabulary utterance is not a confident match."""
+        f = _features(text)
+        total = sum(f.values())
+        if not total:
+            return None, 0.0
+        seen = sum(c for k, c in f.items() if k in self.vocab)
+        p = _softmax((_vector(f, self.vocab, self.idf) @ self.W + self.b)[None])[0]
+        i = int(p.argmax())
+        prob = float(p[i]) if seen / total >= self.min_coverage else 0.0
+        return self.labels[i], prob
+
+    # ── persistence ──────────────────────────────────────────────────────
+    def to_json(self) -> dict:
+        return {"vocab": self.vocab, "idf": self.idf.tolist(),
+                "labels": self.labels, "W": self.W.tolist(),
+                "b": self.b.tolist(), "min_coverage": self.min_coverage}
+
+    @classmethod
+    def from_json(cls, d: dict) -> "FastIntent":
+        return cls(d["vocab"], np.array(d["idf"], dtype=np.float32),
+                   d["labels"], np.array(d["W"], dtype=np.float32),
+                   np.array(d["b"], dtype=np.float32),
+                   d.get("min_coverage", 0.5))
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "FastIntent":
+        with open(path) as f:
+            return cls.from_json(json.load(f))
+
+
+def _vector(f: Counter, vocab: dict, idf: np.ndarray) -> np.ndarray:
+    v = np.zeros(len(vocab), dtype=np.float32)
+    for k, c in f.items():
+        j = vocab.get(k)
+        if j is not None:
+            v[j] = (1.0 + math.log(c)) * idf[j]      # sublinear tf
+    n = np.linalg.norm(v)
+    return v / n if n else v
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def fast_intent(model: FastIntent, provider, text: str,
+                threshold: float) -> tuple:
+    """(intent dict or None, name, prob): the intent is None below the
+    threshold or when the provider cannot fill its slots from the text."""
+    name, prob = model.predict(text)
+    if name is None or prob < threshold:
+        return None, name, prob
+    fill = getattr(provider, "fill_slots", None)
+    try:
+        intent = fill(name, text) if fill is not None else None
+    except Exception:
+        log.exception("fill_slots failed for %s %r", name, text)
+        intent = None
+    return intent, name, prob
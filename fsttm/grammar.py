@@ -8,9 +8,18 @@ repeat, …) can be added here without touching domain intents.
 
 The domain intent schema/grammar/prompt/translation live with the active
 domain provider (fsttm.domain / contrib packages).
+
+Folded mode (system.fold_system_intents): instead of a separate classify pass
+before the intent, SLEEP / MUTE are appended to the domain intent enum and a
+short section to the intent prompt, so ONE grammar pass decides both. Only a
+wake-prefixed utterance is decoded with the folded grammar; every other one
+keeps the plain domain grammar and can never put the assistant to sleep.
 """
 from __future__ import annotations
 
+import copy
+import json
+
 from fsttm.domain import compile_grammar
 
 SYSTEM_INTENT_SCHEMA = {
@@ -53,3 +62,57 @@ def make_system_prompt(name: str = "Nina") -> str:
 
 # Default-name prompt for callers without config access.
 SYSTEM_INTENT_PROMPT = make_system_prompt()
+
+
+# ── folded system intents (one grammar pass) ─────────────────────────────────
+# Folded intent name → SystemIntent action.
+SYSTEM_ACTIONS = {"SLEEP": "sleep", "MUTE": "mute"}
+
+
+def fold_system_intents(schema: dict) -> dict:
+    """Copy of a domain intent schema whose intent enum also allows the
+    system actions (appended, so the compact wire codes of the domain intents
+    don't move)."""
+    folded = copy.deepcopy(schema)
+    enum = folded["properties"]["intent"]["enum"]
+    enum += [a for a in SYSTEM_ACTIONS if a not in enum]
+    return folded
+
+
+def system_action(intent) -> str | None:
+    """"sleep" / "mute" for a folded system intent, else None."""
+    name = intent.get("intent") if isinstance(intent, dict) else None
+    return SYSTEM_ACTIONS.get(name)
+
+
+_FOLDED_PROMPT_TMPL = (
+    "## Assistant controls (only when the user addressed {name} by name)\n"
+    "SLEEP / MUTE turn the assistant ITSELF off. Use them ONLY for an explicit, "
+    "unambiguous request to disable or dismiss {name}: \"voice off\", "
+    "\"{name} off\", \"mute\", \"go to sleep\", \"stop listening\", "
+    "\"that's all, goodbye\". Stopping a CAR FUNCTION (\"stop the climate\", "
+    "\"turn it off\", \"stop\", \"cancel\") is never SLEEP/MUTE. When in doubt, "
+    "answer the normal intent.\n"
+    "{examples}"
+)
+
+
+def folded_prompt_section(schema: dict, name: str = "Nina") -> str:
+    """Intent-prompt section teaching SLEEP / MUTE, with examples shaped like
+    the domain's intent JSON (its required fields at their first value)."""
+    extra = {}
+    for key in schema.get("required") or ():
+        prop = schema["properties"].get(key) or {}
+        if key != "intent":
+            extra[key] = (prop.get("enum") or [0])[0]
+
+    def ex(utt, intent):
+        return (f'"{utt}" → '
+                + json.dumps({"intent": intent, **extra}, separators=(",", ":")))
+    examples = "\n".join([ex(f"{name}, go to sleep", "SLEEP"),
+                          ex(f"{name}, that's all", "SLEEP"),
+                          ex(f"{name}, voice off", "MUTE"),
+                          ex(f"{name}, stop the climate", "POWER_OFF")
+                          if "POWER_OFF" in schema["properties"]["intent"]["enum"]
+                          else ex(f"{name}, mute", "MUTE")])
+    return _FOLDED_PROMPT_TMPL.format(name=name, examples=examples)
@@ -20,8 +20,8 @@ import time
 from fsttm.fsttm import Model as FSM
 from fsttm.llama import (
     Initialize, Generate, IntentGenerate, ManualGenerate, StopGenerate, AddSystem,
-    Response, ResponseDone, IntentResult, LlamaError,
-    make_driver,
+    Response, ResponseDone, IntentResult, IntentCancelled, LlamaError,
+    INTENT_ACK, make_driver,
 )
 from fsttm.domain import active_provider, load_provider
 
@@ -77,6 +77,8 @@ async def run_headless(model_path: str, system_prompt_override: str = None,
 
     def on_llm_event(item):
         if type(item) is Response:
+            if item.context == INTENT_ACK:
+                return      # ack tokens: IntentResult prints the whole ack
             current_response.append(item.text)
             print(item.text, end='', flush=True)
         elif type(item) is ResponseDone:
@@ -122,6 +124,9 @@ async def run_headless(model_path: str, system_prompt_override: str = None,
                 turn.system_action('R')
             except Exception:
                 pass
+        elif type(item) is IntentCancelled:
+            generating.clear()
+            print("\n  (intent cancelled)", flush=True)
         elif type(item) is LlamaError:
             generating.clear()
             print(f"\n[LLM ERROR] {item.error}", flush=True)
@@ -0,0 +1,98 @@
+"""
+Intent result cache.
+
+Drivers repeat the same commands all day ("warmer", "lights off", "defrost
+the windshield"). The intent for an exact repeat is already known, so the
+llama driver looks it up before queueing an IntentGenerate and, on a hit,
+answers at once — no approach_a, no KV, no queue wait.
+
+  key    (normalized transcript, enabled sub-domains, hash of the intent
+          system prompt). normalize() is fsttm.fastintent's: case,
+          punctuation and apostrophes don't split entries.
+  value  (canonical intent dict, spoken ack). The driver re-renders the ack
+          from the provider template when ack_mode allows, else speaks the
+          cached one.
+  LRU    at most max_entries; an entry older than ttl_s is a miss.
+
+The prompt hash in the key makes a new prompt (domain set, variant, extra
+prompt file) miss by construction; the driver also clear()s on AddSystem
+with a different prompt and on model (re)load so stale entries don't linger.
+Only completed LLM results are stored — never cancelled or failed turns.
+"""
+from __future__ import annotations  # PEP 563: lazy annotations for Python 3.8 (list[]/tuple[])
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fsttm.fastintent import normalize
+
+MAX_ENTRIES = 256
+TTL_S = 3600.0
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha1((prompt or "").encode()).hexdigest()[:16]
+
+
+class IntentCache:
+    """Thread-safe LRU: lookups on the event loop, stores from the worker."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl_s: Optional[float] = TTL_S):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()   # key → (t, intent, tts)
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def key(text: str, domains, prompt: str) -> tuple:
+        return (normalize(text or ""),
+                tuple(sorted(domains)) if domains else None,
+                prompt_hash(prompt))
+
+    def get(self, text: str, domains, prompt: str) -> Optional[tuple]:
+        """(intent, tts) for a fresh entry, else None. Counts the hit/miss."""
+        k = self.key(text, domains, prompt)
+        with self._lock:
+            hit = self._entries.get(k) if self.max_entries > 0 else None
+            if hit is not None and self.ttl_s is not None \
+                    and time.monotonic() - hit[0] > self.ttl_s:
+                del self._entries[k]
+                hit = None
+            if hit is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(k)
+            self.hits += 1
+            return dict(hit[1]), hit[2]
+
+    def has(self, text: str, domains, prompt: str) -> bool:
+        """A fresh entry exists. Not counted as a hit / miss."""
+        k = self.key(text, domains, prompt)
+        with self._lock:
+            hit = self._entries.get(k) if self.max_entries > 0 else None
+            return hit is not None and (self.ttl_s is None or
+                                        time.monotonic() - hit[0] <= self.ttl_s)
+
+    def put(self, text: str, domains, prompt: str, intent: dict,
+            tts: Optional[str]) -> None:
+        if self.max_entries <= 0 or not isinstance(intent, dict) \
+                or not normalize(text or ""):
+            return
+        k = self.key(text, domains, prompt)
+        with self._lock:
+            self._entries[k] = (time.monotonic(), dict(intent), tts)
+            self._entries.move_to_end(k)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": len(self._entries)}
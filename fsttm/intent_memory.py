@@ -0,0 +1,152 @@
+"""
+Semantic intent memory: embedding-similarity recall of known commands.
+
+The exact-repeat cache (fsttm.intent_cache) misses every paraphrase, and the
+char n-gram fast path (fsttm.fastintent) only knows surface forms. This keeps
+a small in-memory matrix of utterance embeddings — the same GGUF embedder the
+manual RAG loads (fsttm.rag.store.shared_embedder) — labelled with the intent
+NAME:
+
+  seed     the intent prompt's few-shot lines and trigger tables
+           (fastintent.examples_from_prompt), embedded once per prompt
+  add      utterances the LLM resolved, when the provider's slot rules
+           reproduce the LLM's intent from the text (so a wrong decode or a
+           value the rules can't read never becomes a memory)
+  recall   nearest neighbour by cosine; at >= threshold the intent name is
+           taken and the slots re-extracted from the NEW text by the
+           provider's fill_slots (numbers, zones) — "make it a bit warmer on
+           my side" recalls "warmer on the driver side" → WARMER, area 1.
+
+A recall that clears the threshold but can't be filled goes to the LLM like
+a miss. Seeds are never evicted; learned entries are dropped oldest first
+beyond max_entries.
+"""
+from __future__ import annotations  # PEP 563: lazy annotations for Python 3.8 (list[]/tuple[])
+import logging
+import threading
+from typing import Optional
+
+import numpy as np
+
+from fsttm.fastintent import normalize
+from fsttm.rag.store import VectorStore
+
+log = logging.getLogger(__name__)
+
+THRESHOLD = 0.85
+MAX_ENTRIES = 512
+_NEVER = {"UNKNOWN"}      # "I didn't understand" is not worth remembering
+
+
+class IntentMemory:
+    """Embedding nearest-neighbour over (utterance → intent name).
+
+    embedder: anything with embed(list[str]) → (N, dim) L2-normalised float32
+    (fsttm.rag.store.Embedder). Thread-safe: seeded from a background thread,
+    queried and extended by the llama worker."""
+
+    def __init__(self, embedder, threshold: float = THRESHOLD,
+                 max_entries: int = MAX_ENTRIES):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.store = VectorStore()
+        self._seeded = 0              # the first _seeded rows are seeds
+        self._known: set = set()      # normalized texts already stored
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self.store)
+
+    def seed(self, examples: list) -> int:
+        """Embed prompt examples [(utterance, intent name)]; returns rows added."""
+        return self._add(examples, seed=True)
+
+    def add(self, text: str, name: str) -> bool:
+        """Remember a resolved utterance (skips duplicates and UNKNOWN)."""
+        return self._add([(text, name)], seed=False) > 0
+
+    def _add(self, pairs: list, seed: bool) -> int:
+        new, seen = [], set()
+        for text, name in pairs:
+            key = normalize(text or "")
+            if key and name and name not in _NEVER and key not in seen:
+                seen.add(key)
+                new.append((text, name, key))
+        with self._lock:
+            new = [p for p in new if p[2] not in self._known]
+        if not new:
+            return 0
+        vecs = self.embedder.embed([t for t, _, _ in new])
+        with self._lock:
+            st = self.store
+            st.vectors = vecs if not len(st) else np.vstack([st.vectors, vecs])
+            st.chunks += [t for t, _, _ in new]
+            st.meta += [{"intent": n, "key": k} for _, n, k in new]
+            self._known.update(k for _, _, k in new)
+            if seed:
+                # seeds go in front of any learned rows (never evicted)
+                order = (list(range(len(st) - len(new), len(st)))
+                         + list(range(len(st) - len(new))))
+                self._reorder(order)
+                self._seeded += len(new)
+            extra = len(st) - max(self.max_entries, self._seeded)
+            if extra > 0:   # evict the oldest learned rows
+                self._reorder(list(range(self._seeded))
+                              + list(range(self._seeded + extra, len(st))),
+                              drop=range(self._seeded, self._seeded + extra))
+        return len(new)
+
+    def _reorder(self, order: list, drop=()) -> None:
+        st = self.store
+        for i in drop:
+            self._known.discard(st.meta[i]["key"])
+        st.vectors = st.vectors[order]
+        st.chunks = [st.chunks[i] for i in order]
+        st.meta = [st.meta[i] for i in order]
+
+    def recall(self, text: str, provider) -> tuple:
+        """(intent dict or None, name, score, neighbour utterance). The intent
+        is None below the threshold or when `provider.fill_slots` can't
+        complete it from `text`."""
+        if not len(self) or not normalize(text or ""):
+            return None, None, 0.0, None
+        q = self.embedder.embed([text])[0]
+        with self._lock:
+            hits = self.store.search(q, k=1)
+        score, utt, meta = hits[0]
+        intent = None
+        fill = getattr(provider, "fill_slots", None)
+        if score >= self.threshold and fill is not None:
+            try:
+                intent = fill(meta["intent"], text)
+            except Exception:
+                log.exception("fill_slots failed for %s %r", meta["intent"], text)
+        with self._lock:
+            if intent is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return intent, meta["intent"], score, utt
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": len(self.store), "seeds": self._seeded}
+
+
+def confirmable(provider, text: str, intent) -> Optional[str]:
+    """The intent name to remember for an LLM-resolved utterance, or None when
+    the provider's slot rules would not reproduce `intent` from `text`."""
+    name = intent.get("intent") if isinstance(intent, dict) else None
+    fill = getattr(provider, "fill_slots", None)
+    if not name or fill is None:
+        return None
+    try:
+        redo = fill(name, text)
+    except Exception:
+        return None
+    if redo is None or any(intent.get(k) != v for k, v in redo.items()):
+        return None
+    return name
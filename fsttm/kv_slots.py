@@ -0,0 +1,405 @@
+"""
+Multi-sequence KV slots: keep several token histories resident in ONE llama
+context so the intent prefix, the chat history and the classify/manual headers
+stop evicting each other.
+
+llama-cpp-python's high-level API (eval/generate/create_completion) only ever
+decodes into sequence 0 — the WORKING sequence. Everything else lives in
+parked sequences 1..n_seq_max-1 and is swapped in with the cheap llama.cpp
+memory ops (seq_rm / seq_cp just relabel KV cells; nothing is re-evaluated):
+
+  restore(name) → working seq := slot seq  (n_tokens / input_ids follow)
+  park(name)    → slot seq    := working seq[0:n]
+
+Resident slots (the ~2000-token intent prefix) use COPY semantics: restore
+leaves the parked copy in place, so the prefix survives any number of chat or
+RAG turns and is never re-primed. There is one resident prefix slot per
+assembled prompt (prefix_slot(prompt) → "intent:<hash>"), so switching
+intent_domains or prompt_variant back and forth is a restore, not a re-prime;
+admit_prefix() keeps at most `max_prefixes` of them within `prefix_budget` ×
+n_ctx cells, evicting the least recently used (its saved state, when
+persistence is on, still makes the next switch a file load).
+
+Scratch slots (chat, classify, manual) use MOVE semantics: restore hands the
+cells to the working seq and frees the slot, so a slot's cells are never
+counted twice.
+
+With the unified KV all sequences share the n_ctx cells. reserve() evicts LRU
+scratch slots (then resident ones) until parked + needed tokens fit.
+
+Fallback: a context built with n_seq_max=1 (older bindings, or a Llama not
+constructed under multi_seq_params) keeps slots VIRTUAL — restore() only
+succeeds while the working seq still starts with the slot's tokens, which is
+exactly the old single-prefix behaviour.
+
+Persistence: with `persist_dir` set, a primed resident slot is written with
+llama_state_seq_save_file and loaded back at the next boot instead of being
+re-evaluated. The file name is keyed by a model fingerprint, n_ctx, the
+binding version and a hash of the slot key (the assembled system prompt), so
+a changed prompt, model or n_ctx simply misses.
+"""
+from __future__ import annotations  # PEP 563: lazy annotations for Python 3.8 (list[]/dict[])
+import contextlib
+import ctypes
+import hashlib
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+WORK_SEQ = 0
+N_SEQ = 8                      # working seq + parked slots (cells are shared)
+PREFIX_SLOT = "intent"         # resident: intent system prefixes "intent:<hash>"
+PRIME_SLOT = "intent-prime"    # scratch: a paused, partially evaluated prime
+RESIDENT = (PREFIX_SLOT,)
+MAX_PREFIXES = 3               # resident intent prefixes kept (LRU)
+PREFIX_BUDGET = 0.5            # … in at most this fraction of n_ctx cells
+
+
+def prefix_slot(key) -> str:
+    """Resident slot name for the intent prefix of prompt `key`."""
+    return f"{PREFIX_SLOT}:{hashlib.sha256(str(key).encode()).hexdigest()[:12]}"
+
+
+@contextlib.contextmanager
+def multi_seq_params(n_seq: int = N_SEQ):
+    """Construct a Llama inside this block to get a context with n_seq_max
+    sequences over one unified KV. Llama() exposes no n_seq_max argument, so
+    the default context params are widened for the duration of the call."""
+    try:
+        import llama_cpp.llama_cpp as _lc
+    except ImportError:
+        yield
+        return
+    orig = _lc.llama_context_default_params
+
+    def _params():
+        p = orig()
+        try:
+            p.n_seq_max = max(int(p.n_seq_max), n_seq)
+            if hasattr(p, "kv_unified"):   # non-unified splits n_ctx per seq
+                p.kv_unified = True
+        except Exception:
+            pass
+        return p
+
+    _lc.llama_context_default_params = _params
+    try:
+        yield
+    finally:
+        _lc.llama_context_default_params = orig
+
+
+class _WorkingSeqCtx:
+    """Proxy around Llama._ctx that narrows the "all sequences" seq_id (-1)
+    used by Llama.eval/generate to the working seq, so the high-level API can
+    never wipe a parked slot. Everything else passes through."""
+    def __init__(self, ctx):
+        self._raw = ctx
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def kv_cache_seq_rm(self, seq_id, p0, p1):
+        return self._raw.kv_cache_seq_rm(WORK_SEQ if seq_id < 0 else seq_id, p0, p1)
+
+    def kv_cache_clear(self):
+        return self._raw.kv_cache_seq_rm(WORK_SEQ, 0, -1)
+
+
+@dataclass
+class _Slot:
+    seq: Optional[int]                  # None → virtual (single-seq fallback)
+    key: object = None
+    tokens: list = field(default_factory=list)
+    used: float = 0.0
+
+
+class KVSlots:
+    """Named token histories parked in the sequences of one llama context."""
+
+    def __init__(self, model, n_seq: int = 1, resident=RESIDENT):
+        self.model    = model
+        self.resident = tuple(resident)
+        self.multi    = n_seq > 1
+        self._free    = list(range(1, n_seq))
+        self._slots: dict[str, _Slot] = {}
+        self.evictions = 0
+        self.max_prefixes  = MAX_PREFIXES
+        self.prefix_budget = PREFIX_BUDGET
+        self.persist_dir: Optional[str] = None   # prefix state cache (None = off)
+        self._model_fp: Optional[str] = None
+        if self.multi and not isinstance(model._ctx, _WorkingSeqCtx):
+            model._ctx = _WorkingSeqCtx(model._ctx)
+        self._ctx = getattr(model._ctx, "_raw", model._ctx)
+
+    # ── queries ──────────────────────────────────────────────────────────
+    def n_ctx(self) -> int:
+        return self.model.n_ctx()
+
+    def parked_tokens(self, exclude: str = None) -> int:
+        return sum(len(s.tokens) for n, s in self._slots.items()
+                   if s.seq is not None and n != exclude)
+
+    def is_resident(self, name: str) -> bool:
+        """Resident names are the RESIDENT entries and their "<name>:…" keys."""
+        return any(name == r or name.startswith(r + ":") for r in self.resident)
+
+    def _working_has(self, tokens: list) -> bool:
+        n = len(tokens)
+        return (n > 0 and self.model.n_tokens >= n
+                and list(self.model.input_ids[:n]) == tokens)
+
+    def lookup(self, name: str, key=None) -> Optional[int]:
+        """Token count held by slot `name` (for `key`, when given), or None."""
+        s = self._slots.get(name)
+        if s is None or (key is not None and s.key != key) or not s.tokens:
+            return None
+        if s.seq is None and not self._working_has(s.tokens):
+            return None          # virtual slot overwritten by another op
+        return len(s.tokens)
+
+    # ── slot ops ─────────────────────────────────────────────────────────
+    def restore(self, name: str, key=None) -> Optional[int]:
+        """Make slot `name` the working seq. Returns its token count (the
+        working seq is rewound to exactly that) or None on a miss."""
+        n = self.lookup(name, key)
+        if n is None:
+            return None
+        s = self._slots[name]
+        s.used = time.monotonic()
+        if not self._working_has(s.tokens):
+            self._ctx.kv_cache_seq_rm(WORK_SEQ, 0, -1)
+            self._ctx.kv_cache_seq_cp(s.seq, WORK_SEQ, 0, n)
+            self.model.input_ids[:n] = s.tokens
+        self._ctx.kv_cache_seq_rm(WORK_SEQ, n, -1)
+        self.model.n_tokens = n
+        if not self.is_resident(name):
+            self.drop(name)      # move semantics: the working seq owns it now
+        return n
+
+    def park(self, name: str, key=None, n: int = None) -> None:
+        """Snapshot working seq [0, n) (default: all of it) into slot `name`."""
+        n = self.model.n_tokens if n is None else min(n, self.model.n_tokens)
+        if n <= 0:
+            return
+        s = self._slots.get(name)
+        if s is None:
+            s = _Slot(seq=self._alloc(name) if self.multi else None)
+            self._slots[name] = s
+        if s.seq is not None:
+            self._ctx.kv_cache_seq_rm(s.seq, 0, -1)
+            self._ctx.kv_cache_seq_cp(WORK_SEQ, s.seq, 0, n)
+        s.key, s.tokens = key, list(self.model.input_ids[:n])
+        s.used = time.monotonic()
+
+    def drop(self, name: str) -> None:
+        s = self._slots.pop(name, None)
+        if s is not None and s.seq is not None:
+            self._ctx.kv_cache_seq_rm(s.seq, 0, -1)
+            self._free.append(s.seq)
+
+    def reserve(self, need: int, keep: str = None) -> int:
+        """Evict slots (LRU scratch first, resident last; never `keep`) until
+        parked cells + `need` working tokens fit in n_ctx. Returns evictions."""
+        evicted = 0
+        budget = self.n_ctx()
+        while self.parked_tokens() + need > budget:
+            victim = self._victim(keep)
+            if victim is None:
+                break
+            log.info("kv-slots: evicting %r (%d tok) for %d needed",
+                     victim, len(self._slots[victim].tokens), need)
+            self.drop(victim)
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def admit_prefix(self, name: str, need: int) -> int:
+        """Make room for intent prefix `name` (`need` tokens): evict the least
+        recently used other prefixes until fewer than max_prefixes remain and
+        their cells plus `need` fit in prefix_budget × n_ctx."""
+        evicted = 0
+        budget = self.prefix_budget * self.n_ctx()
+        while True:
+            others = sorted((s.used, n) for n, s in self._slots.items()
+                            if n != name and n.startswith(PREFIX_SLOT + ":"))
+            held = sum(len(self._slots[n].tokens) for _, n in others)
+            if not others or (len(others) < self.max_prefixes
+                              and held + need <= budget):
+                break
+            victim = others[0][1]
+            log.info("kv-slots: evicting intent prefix %r (%d tok, LRU)",
+                     victim, len(self._slots[victim].tokens))
+            self.drop(victim)
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def shift(self, n_keep: int, n_discard: int) -> bool:
+        """Context shift on the working seq: drop tokens [n_keep, n_keep +
+        n_discard) and slide everything after them down, so the survivors stay
+        evaluated (llama.cpp re-rotates their RoPE positions lazily). Returns
+        False when the model's memory can't shift."""
+        if n_discard <= 0 or self.model.n_tokens < n_keep + n_discard:
+            return False
+        try:
+            import llama_cpp
+            mem = getattr(self._ctx, "memory", None)
+            if (mem is not None and hasattr(llama_cpp, "llama_memory_can_shift")
+                    and not llama_cpp.llama_memory_can_shift(mem)):
+                return False
+        except ImportError:
+            pass
+        n, end = self.model.n_tokens, n_keep + n_discard
+        self._ctx.kv_cache_seq_rm(WORK_SEQ, n_keep, end)
+        self._ctx.kv_cache_seq_shift(WORK_SEQ, end, -1, -n_discard)
+        ids = self.model.input_ids
+        ids[n_keep:n - n_discard] = ids[end:n].copy()
+        self.model.n_tokens = n - n_discard
+        return True
+
+    # ── persistence ──────────────────────────────────────────────────────
+    def state_path(self, key) -> Optional[str]:
+        """Cache file for a slot holding `key`, or None when persistence is off
+        (or the model file can't be fingerprinted)."""
+        if not self.persist_dir:
+            return None
+        if self._model_fp is None:
+            self._model_fp = _model_fingerprint(getattr(self.model, "model_path", ""))
+        if not self._model_fp:
+            return None
+        try:
+            from llama_cpp import __version__ as ver
+        except Exception:
+            ver = "?"
+        h = hashlib.sha256()
+        for part in (self._model_fp, str(self.n_ctx()), ver, str(key)):
+            h.update(part.encode())
+            h.update(b"\0")
+        return os.path.join(os.path.expanduser(self.persist_dir),
+                            f"prefix-{h.hexdigest()[:24]}.kv")
+
+    def save(self, name: str, path: str) -> bool:
+        """Write slot `name` (KV cells + tokens) to `path`. Atomic rename so a
+        crash mid-write never leaves a truncated state for the next boot."""
+        s = self._slots.get(name)
+        if s is None or not s.tokens:
+            return False
+        seq = WORK_SEQ if s.seq is None else s.seq
+        if s.seq is None and not self._working_has(s.tokens):
+            return False
+        tmp = f"{path}.tmp{os.getpid()}"
+        try:
+            import llama_cpp
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            toks = (llama_cpp.llama_token * len(s.tokens))(*s.tokens)
+            n = llama_cpp.llama_state_seq_save_file(
+                self._ctx.ctx, tmp.encode(), seq, toks, len(s.tokens))
+            if not n:
+                raise OSError("llama_state_seq_save_file wrote nothing")
+            os.replace(tmp, path)
+            return True
+        except Exception as exc:
+            log.warning("kv-slots: saving %r to %s failed: %s", name, path, exc)
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            return False
+
+    def load(self, name: str, path: str, key=None,
+             expect: list = None) -> Optional[int]:
+        """Load a saved slot from `path` into slot `name`. Returns its token
+        count, or None when the file is missing, incompatible, or its tokens
+        differ from `expect`."""
+        if not os.path.exists(path):
+            return None
+        try:
+            import llama_cpp
+            self.drop(name)
+            cap = self.n_ctx()
+            seq = self._alloc(name) if self.multi else WORK_SEQ
+            self._ctx.kv_cache_seq_rm(seq, 0, -1)
+            toks = (llama_cpp.llama_token * cap)()
+            n_out = ctypes.c_size_t(0)
+            nread = llama_cpp.llama_state_seq_load_file(
+                self._ctx.ctx, path.encode(), seq, toks, cap, ctypes.byref(n_out))
+        except Exception as exc:
+            log.warning("kv-slots: loading %s failed: %s", path, exc)
+            return None
+        n = n_out.value
+        tokens = list(toks[:n])
+        if not nread or n <= 0 or (expect is not None and tokens != list(expect)):
+            log.info("kv-slots: %s is stale or incompatible — ignoring", path)
+            self._ctx.kv_cache_seq_rm(seq, 0, -1)
+            if self.multi:
+                self._free.append(seq)
+            else:
+                self.model.n_tokens = 0
+            return None
+        if self.multi:
+            self._slots[name] = _Slot(seq=seq, key=key, tokens=tokens,
+                                      used=time.monotonic())
+        else:
+            self.model.input_ids[:n] = tokens
+            self.model.n_tokens = n
+            self._slots[name] = _Slot(seq=None, key=key, tokens=tokens,
+                                      used=time.monotonic())
+        return n
+
+    # ── internals ────────────────────────────────────────────────────────
+    def _victim(self, keep: str = None) -> Optional[str]:
+        cands = [(self.is_resident(n), s.used, n) for n, s in self._slots.items()
+                 if s.seq is not None and n != keep]
+        return min(cands)[2] if cands else None
+
+    def _alloc(self, name: str) -> int:
+        if not self._free:
+            victim = self._victim(keep=name)
+            if victim is None:
+                raise RuntimeError("kv-slots: no free sequence")
+            self.drop(victim)
+            self.evictions += 1
+        return self._free.pop(0)
+
+
+def _model_fingerprint(path: str, chunk: int = 4 << 20) -> str:
+    """Cheap stable identity for a GGUF: size + sha256 of its head and tail.
+    Hashing the whole multi-GB file would cost more than the eval it saves."""
+    try:
+        size = os.path.getsize(path)
+        h = hashlib.sha256(str(size).encode())
+        with open(path, "rb") as f:
+            h.update(f.read(chunk))
+            if size > chunk:
+                f.seek(max(chunk, size - chunk))
+                h.update(f.read(chunk))
+        return h.hexdigest()
+    except OSError:
+        return ""
+
+
+def _kv_supported(model) -> bool:
+    return (hasattr(getattr(model, "_ctx", None), "kv_cache_seq_rm")
+            and hasattr(model, "n_tokens"))
+
+
+def slots_for(model) -> Optional[KVSlots]:
+    """The model's KVSlots (created on first use), or None when the bindings
+    lack the low-level KV ops."""
+    slots = getattr(model, "kv_slots", None)
+    if slots is None:
+        if not _kv_supported(model):
+            return None
+        n_seq = 1
+        try:
+            n_seq = int(model.context_params.n_seq_max)
+        except Exception:
+            pass
+        if n_seq > 1 and not hasattr(model._ctx, "kv_cache_seq_cp"):
+            n_seq = 1
+        slots = KVSlots(model, n_seq=n_seq)
+        model.kv_slots = slots
+    return slots
@@ -2,20 +2,33 @@
 LLM driver using llama-cpp-python bindings (direct, no subprocess).
 
 Thread safety: llama-cpp-python / CUDA are NOT thread-safe. A single
-serialised inference thread (_worker) processes one Generate at a time.
-Concurrent requests are dropped (queue depth 1) to keep latency low.
-StopGenerate sets _stop_event; the worker checks it between tokens so
-C++ inference exits at the next stop-token or max_tokens boundary.
+serialised inference thread (_worker) processes one request at a time, fed by
+a priority scheduler (fsttm.scheduler): intent > classify > manual/chat > idle
+re-prime, a newer request superseding a pending one of its class, and stale
+requests dropped at their deadline. StopGenerate (barge-in) and a preempting
+request set _stop_event; the worker checks it between tokens — chat, manual,
+both intent passes — and between n_batch chunks of an intent-prefix prime, so
+a new command never waits for a stale one to finish. A cancelled intent emits
+IntentCancelled and leaves the KV holding just the intent prefix. With
+fast_intent "on" a confident non-LLM classification (fsttm.fastintent) answers
+an IntentGenerate on the spot — never queued — and so does an exact repeat of
+an earlier command (fsttm.intent_cache). A paraphrase of a known command is
+recalled by embedding similarity (fsttm.intent_memory) on the worker, ahead of
+approach_a. A speculative IntentGenerate (a stable partial transcript) is
+decoded with its events held back: the final transcript commits them when its
+normalized text matches and discards them otherwise. Manual and chat answers
+can decode speculatively, drafting from their own prompt or with a small draft
+model (fsttm.speculative).
 """
 from __future__ import annotations  # PEP 563: lazy annotations for Python 3.8 (list[]/tuple[])
 import logging as _pylog
-import queue
 import threading
-from collections import namedtuple
+from collections import deque, namedtuple
 
 import reactivex as rx
 from cyclotron import Component
 
+from fsttm import intent_cache, kv_slots, scheduler
 from fsttm.utils import ignoreStderr
 
 _log = _pylog.getLogger("fsttm.llama")   # → fsttm.log (propagates to fsttm root)
@@ -33,15 +46,60 @@ Source = namedtuple('Source', ['system'])
 
 Initialize      = namedtuple('Initialize',
                              ['model_path', 'n_ctx', 'n_batch',
-                              'n_threads', 'n_gpu_layers'])
+                              'n_threads', 'n_gpu_layers', 'prefix_cache',
+                              'ctx_shift', 'ctx_threshold', 'prefix_slots',
+                              'prefix_budget', 'fast_intent_model',
+                              'intent_cache', 'intent_cache_ttl',
+                              'recall_embed', 'recall_threshold',
+                              'recall_embed_gpu',
+                              'prompt_lookup', 'draft_model', 'draft_tokens',
+                              'draft_min_accept'])
 # n_ctx/n_batch from config — the intent base prompt (system + domain prompt +
 # few-shot) easily exceeds the old hardcoded 2048; too-small n_ctx made the very
 # first model.eval() fail with `llama_decode returned 1`.
-Initialize.__new__.__defaults__ = (None, 2048, 512, 6, 99)
+# prefix_cache: directory for the primed intent-prefix KV state (None = off);
+# a warm boot loads it instead of re-evaluating the ~2k-token prefix.
+# ctx_shift: on a chat FIFO trim, shift the KV instead of re-evaluating.
+# ctx_threshold: chat history budget as a fraction of n_ctx (exact tokens).
+# prefix_slots / prefix_budget: intent prefixes kept resident at once (one per
+# assembled prompt, LRU) and the fraction of n_ctx they may occupy.
+# fast_intent_model: saved fsttm.fastintent model JSON; None = train one from
+# the intent system prompt on first use.
+# intent_cache / intent_cache_ttl: entries (0 = off) and max age in seconds
+# (None = no expiry) of the exact-repeat intent cache (fsttm.intent_cache).
+# recall_embed: GGUF embedding model for the semantic intent memory
+# (fsttm.intent_memory; None = off); recall_threshold: min cosine to recall;
+# recall_embed_gpu: the manual RAG's embed_gpu, so both share one Embedder.
+# prompt_lookup: tokens drafted per verify pass by prompt-lookup speculative
+# decoding on the manual and chat paths (fsttm.speculative; 0 = off).
+# draft_model: small GGUF with the same vocabulary drafting draft_tokens per
+# pass instead (None = off); below draft_min_accept acceptance an answer stops
+# drafting and the next few answers skip it.
+Initialize.__new__.__defaults__ = (None, 2048, 512, 6, 99, None, True, 0.80,
+                                   kv_slots.MAX_PREFIXES, kv_slots.PREFIX_BUDGET,
+                                   None, intent_cache.MAX_ENTRIES,
+                                   intent_cache.TTL_S, None, 0.85, False, 0,
+                                   None, 4, 0.3)
 Generate        = namedtuple('Generate',        ['text', 'context'])
 Generate.__new__.__defaults__ = (None, None)
-IntentGenerate  = namedtuple('IntentGenerate',  ['text', 'context', 'domains'])
-IntentGenerate.__new__.__defaults__ = (None, None, None)  # domains None → all
+IntentGenerate  = namedtuple('IntentGenerate',  ['text', 'context', 'domains',
+                                                 'encoding', 'ack_mode',
+                                                 'fast_intent', 'fast_threshold',
+                                                 'system_intents', 'speculative'])
+# domains None → all; encoding "compact" → short-key wire JSON (fsttm.wire),
+# expanded to the canonical intent dict before IntentResult. ack_mode "llm" |
+# "template" | "template-then-llm": a provider ack_template skips pass 2.
+# fast_intent "off" | "shadow" | "on": the non-LLM classifier (fsttm.fastintent)
+# answers at prob >= fast_threshold without queueing ("on"), or only logs its
+# agreement with the LLM's intent ("shadow").
+# system_intents: decode with SLEEP / MUTE folded into the intent enum
+# (fsttm.grammar); either one comes back as SystemIntent, not IntentResult.
+# Such a request always runs the LLM (no cache / fast path / recall).
+# speculative: a partial transcript the user paused on; decoded ahead of the
+# final one, its events are held until the next request commits (same
+# normalized text) or discards them.
+IntentGenerate.__new__.__defaults__ = (None, None, None, "canonical", "llm",
+                                       "off", 0.5, False, False)
 # ClassifySystem: grammar-constrained classification of an utterance into a
 # system action {command, sleep, mute} — used by the attention layer's
 # sleep_intent path. Does NOT touch conversation history.
@@ -63,14 +121,33 @@ TrimHistory.__new__.__defaults__ = (None,)
 
 Response        = namedtuple('Response',     ['text',        'context'])
 Response.__new__.__defaults__ = (None, None)
+# Context of the Response events streaming an intent's pass-2 spoken ack (no
+# ResponseDone follows — the IntentResult closes the ack).
+INTENT_ACK = 'intent'
 ResponseDone    = namedtuple('ResponseDone', ['full_text',   'context'])
 ResponseDone.__new__.__defaults__ = (None, None)
 IntentResult    = namedtuple('IntentResult', ['intent_json', 'tts_text', 'context'])
 IntentResult.__new__.__defaults__ = (None, None, None)
+# IntentParsed: the intent JSON as soon as pass 1 finishes, BEFORE the spoken
+# ack is generated — the server dispatches backend side effects on it so the
+# car reacts while pass 2 runs. The IntentResult that follows carries the ack.
+IntentParsed    = namedtuple('IntentParsed', ['intent_json', 'context'])
+IntentParsed.__new__.__defaults__ = (None, None)
+# IntentCancelled: the intent was aborted by StopGenerate or a newer request
+# before its IntentResult (an IntentParsed may already have been emitted).
+IntentCancelled = namedtuple('IntentCancelled', ['context'])
+IntentCancelled.__new__.__defaults__ = (None,)
 SystemIntent    = namedtuple('SystemIntent', ['action', 'context'])  # command|sleep|mute
 SystemIntent.__new__.__defaults__ = (None, None)
 LlamaError      = namedtuple('LlamaError',   ['error',       'context'])
 
+# Scheduler class of each queued request type (fsttm.scheduler).
+_SCHED_CLASS = {IntentGenerate: scheduler.INTENT,
+                ClassifySystem: scheduler.CLASSIFY,
+                ManualGenerate: scheduler.REPLY,
+                Generate:       scheduler.REPLY}
+_REPRIME = object()       # the worker's own idle-gap re-prime request
+
 # Stop tokens that cover plain-text role markers the model sometimes emits
 _EXTRA_STOP = ["\nUser:", "\nAssistant:", "User:", "\n\n\n"]
 
@@ -102,46 +179,139 @@ def _build_prompt(model_path: str, sys: str, user_text: str) -> tuple[str, list[
     return prompt, stop
 
 
+# (system, past turn, new user turn + assistant header, stop) per chat template.
+_CHAT_FORMATS = {
+    "phi3": ("<|system|>\n{sys}<|end|>\n",
+             "<|user|>\n{u}<|end|>\n<|assistant|>\n{a}<|end|>\n",
+             "<|user|>\n{u}<|end|>\n<|assistant|>\n",
+             ["<|end|>", "<|user|>"] + _EXTRA_STOP),
+    "llama3": ("<|start_header_id|>system<|end_header_id|>\n{sys}<|eot_id|>",
+               "<|start_header_id|>user<|end_header_id|>\n{u}<|eot_id|>"
+               "<|start_header_id|>assistant<|end_header_id|>\n{a}<|eot_id|>",
+               "<|start_header_id|>user<|end_header_id|>\n{u}<|eot_id|>"
+               "<|start_header_id|>assistant<|end_header_id|>\n",
+               ["<|eot_id|>", "<|end_of_text|>"] + _EXTRA_STOP),
+    # Phi-4-mini reasoning
+    "phi4": ("<|system|>{sys}<|end|>",
+             "<|user|>{u}<|end|><|assistant|>{a}<|end|>",
+             "<|user|>{u}<|end|><|assistant|>",
+             ["<|end|>", "<|user|>", "<|system|>"] + _EXTRA_STOP),
+}
+
+
+def _chat_format(model_path: str) -> str:
+    mp = model_path.lower()
+    if "phi-3" in mp or "phi3" in mp:
+        return "phi3"
+    if "llama-3" in mp or "llama3" in mp:
+        return "llama3"
+    return "phi4"
+
+
 class ConversationHistory:
     """
     Application-level FIFO context window.
 
-    Maintains a list of (user, assistant) turn pairs. When the estimated token
-    count of system_prompt + history + new_user would exceed `ctx_threshold`
-    (fraction of n_ctx), the oldest turns are dropped — FIFO — until it fits.
-    The system prompt is always preserved (n_keep behaviour).
+    Maintains a deque of (user, assistant) turn pairs with a parallel deque of
+    per-turn token counts and their running total. When system_prompt +
+    history + new_user would exceed `ctx_threshold` (fraction of n_ctx), the
+    oldest turns are dropped — FIFO, O(turns dropped) — until it fits. The
+    system prompt is always preserved (n_keep behaviour).
 
-    Token estimate: 1 token ≈ 4 characters (rough but fast; no tokenizer call).
+    Token counts: once bind(model) is called each turn is tokenized exactly
+    once (add_turn / replace_last_reply), as the formatted chat segment the
+    prompt will contain, so the accounting is exact. Unbound (no model, e.g.
+    unit tests) falls back to the 1 token ≈ 4 characters estimate.
     """
     def __init__(self, n_ctx: int = 2048, ctx_threshold: float = 0.80):
         self.n_ctx          = n_ctx
         self.ctx_threshold  = ctx_threshold
         self.threshold_toks = int(n_ctx * ctx_threshold)
-        self._turns: list[tuple[str, str]] = []   # [(user, assistant), ...]
+        self._turns: deque[tuple[str, str]] = deque()   # [(user, assistant), ...]
+        self._counts: deque[int] = deque()              # tokens per turn
+        self._total = 0                                 # sum(self._counts)
+        self._model = None
+        self._sys_count = (None, 0)                     # (sys_prompt, tokens)
+        # build_chat_tokens: formatted segment text → token ids, live segments
+        # only; _pending = (new_user, header tokens, prompt length) of the
+        # turn being generated, consumed by note_reply.
+        self._seg_toks: dict[str, list[int]] = {}
+        self._pending = None
+        # Context shift (shift_kv): (n_keep, dropped turns' token ids) of the
+        # last trim; ctx_shift=False → plain drop-and-re-evaluate FIFO.
+        self.ctx_shift = True
+        self._shift = None
+
+    def bind(self, model) -> None:
+        """Count tokens with `model`'s tokenizer from now on (re-counts any
+        turns already held)."""
+        self._model = model
+        self._sys_count = (None, 0)
+        turns = list(self._turns)
+        self._turns.clear()
+        self._counts.clear()
+        self._total = 0
+        for u, a in turns:
+            self.add_turn(u, a)
 
     def _est_tokens(self, text: str) -> int:
         return max(1, len(text) // 4)
 
+    def _fmt(self):
+        return _CHAT_FORMATS[_chat_format(getattr(self._model, 'model_path', ''))]
+
+    def _tokenize(self, text: str, bos: bool = False) -> list[int]:
+        return self._model.tokenize(text.encode(), add_bos=bos, special=True)
+
+    def _turn_tokens(self, user: str, assistant: str) -> int:
+        if self._model is None:
+            return self._est_tokens(user) + self._est_tokens(assistant)
+        text = self._fmt()[1].format(u=user, a=assistant)
+        toks = self._seg_toks.get(text)
+        if toks is None:
+            toks = self._seg_toks[text] = self._tokenize(text)
+        return len(toks)
+
+    def _sys_tokens(self, sys_prompt: str) -> int:
+        if self._model is None:
+            return self._est_tokens(sys_prompt)
+        if self._sys_count[0] != sys_prompt:
+            text = self._fmt()[0].format(sys=sys_prompt)
+            self._sys_count = (sys_prompt, len(self._tokenize(text, bos=True)))
+        return self._sys_count[1]
+
+    def _user_tokens(self, new_user: str) -> int:
+        if self._model is None:
+            return self._est_tokens(new_user)
+        return len(self._tokenize(self._fmt()[2].format(u=new_user)))
+
     def total_tokens(self, sys_prompt: str) -> int:
-        t = self._est_tokens(sys_prompt)
-        for u, a in self._turns:
-            t += self._est_tokens(u) + self._est_tokens(a)
-        return t
+        return self._sys_tokens(sys_prompt) + self._total
 
     def add_turn(self, user: str, assistant: str) -> None:
+        n = self._turn_tokens(user, assistant)
         self._turns.append((user, assistant))
+        self._counts.append(n)
+        self._total += n
+
+    def replace_last_reply(self, assistant: str) -> None:
+        """Rewrite the newest turn's assistant text (barge-in TrimHistory) and
+        re-count just that turn."""
+        if not self._turns:
+            return
+        user, _ = self._turns.pop()
+        self._total -= self._counts.pop()
+        self.add_turn(user, assistant)
 
     def trim_for(self, sys_prompt: str, new_user: str) -> int:
         """Drop oldest turns until sys+history+new_user fits. Returns turns dropped."""
         dropped = 0
-        budget  = self.threshold_toks - self._est_tokens(sys_prompt) \
-                                       - self._est_tokens(new_user) \
+        budget  = self.threshold_toks - self._sys_tokens(sys_prompt) \
+                                       - self._user_tokens(new_user) \
                                        - 64   # generation headroom
-        while self._turns:
-            used = sum(self._est_tokens(u) + self._est_tokens(a) for u, a in self._turns)
-            if used <= budget:
-                break
-            self._turns.pop(0)
+        while self._turns and self._total > budget:
+            self._turns.popleft()
+            self._total -= self._counts.popleft()
             dropped += 1
         return dropped
 
@@ -152,42 +322,97 @@ class ConversationHistory:
         if dropped:
             print(f"  [ctx-fifo] dropped {dropped} oldest turn(s) to fit context")
 
-        mp = model_path.lower()
-        turns_text = ""
-        if "phi-3" in mp or "phi3" in mp:
-            for u, a in self._turns:
-                turns_text += f"<|user|>\n{u}<|end|>\n<|assistant|>\n{a}<|end|>\n"
-            prompt = (
-                f"<|system|>\n{sys_prompt}<|end|>\n"
-                + turns_text
-                + f"<|user|>\n{new_user}<|end|>\n<|assistant|>\n"
-            )
-            stop = ["<|end|>", "<|user|>"] + _EXTRA_STOP
-        elif "llama-3" in mp or "llama3" in mp:
-            for u, a in self._turns:
-                turns_text += (
-                    f"<|start_header_id|>user<|end_header_id|>\n{u}<|eot_id|>"
-                    f"<|start_header_id|>assistant<|end_header_id|>\n{a}<|eot_id|>"
-                )
-            prompt = (
-                f"<|start_header_id|>system<|end_header_id|>\n{sys_prompt}<|eot_id|>"
-                + turns_text
-                + f"<|start_header_id|>user<|end_header_id|>\n{new_user}<|eot_id|>"
-                f"<|start_header_id|>assistant<|end_header_id|>\n"
-            )
-            stop = ["<|eot_id|>", "<|end_of_text|>"] + _EXTRA_STOP
-        else:
-            for u, a in self._turns:
-                turns_text += f"<|user|>{u}<|end|><|assistant|>{a}<|end|>"
-            prompt = (
-                f"<|system|>{sys_prompt}<|end|>"
-                + turns_text
-                + f"<|user|>{new_user}<|end|><|assistant|>"
-            )
-            stop = ["<|end|>", "<|user|>", "<|system|>"] + _EXTRA_STOP
-
+        sys_fmt, turn_fmt, user_fmt, stop = _CHAT_FORMATS[_chat_format(model_path)]
+        prompt = (sys_fmt.format(sys=sys_prompt)
+                  + "".join(turn_fmt.format(u=u, a=a) for u, a in self._turns)
+                  + user_fmt.format(u=new_user))
         return prompt, stop
 
+    def build_chat_tokens(self, model, sys_prompt: str,
+                          new_user: str) -> tuple[list[int], list[str]]:
+        """Token-level build_chat_prompt. Each segment (system, every past
+        turn) is tokenized ONCE and cached, so the token stream for turns
+        already in the KV is identical turn to turn; create_completion's
+        prefix match then evaluates only the new user turn + assistant header
+        (plus the last reply, unless note_reply captured its exact tokens).
+        A FIFO trim is recorded for shift_kv()."""
+        before = list(self._turns)
+        dropped = self.trim_for(sys_prompt, new_user)
+        if dropped:
+            print(f"  [ctx-fifo] dropped {dropped} oldest turn(s) to fit context")
+
+        sys_fmt, turn_fmt, user_fmt, stop = _CHAT_FORMATS[
+            _chat_format(getattr(model, 'model_path', ''))]
+        cache, self._seg_toks = self._seg_toks, {}   # keep live segments only
+
+        def seg(text, bos=False):
+            toks = cache.get(text)
+            if toks is None:
+                toks = model.tokenize(text.encode(), add_bos=bos, special=True)
+            self._seg_toks[text] = toks
+            return toks
+
+        tokens = list(seg(sys_fmt.format(sys=sys_prompt), bos=True))
+        gone = [cache.get(turn_fmt.format(u=u, a=a)) for u, a in before[:dropped]]
+        self._shift = (None if not dropped or None in gone else
+                       (len(tokens), [t for g in gone for t in g]))
+        for u, a in self._turns:
+            tokens += seg(turn_fmt.format(u=u, a=a))
+        head = model.tokenize(user_fmt.format(u=new_user).encode(),
+                              add_bos=False, special=True)
+        self._pending = (new_user, head, len(tokens) + len(head))
+        return tokens + head, stop
+
+    def shift_kv(self, model) -> int:
+        """Context-shift mode: after a FIFO trim in build_chat_tokens, remove
+        the dropped turns' token range from the working KV and slide the kept
+        turns down behind the system prompt (n_keep), instead of letting the
+        completion re-evaluate everything after the system prompt. Call after
+        the chat KV is in the working seq. Returns tokens discarded (0 = no
+        shift: nothing trimmed, KV doesn't hold those turns, or unsupported)."""
+        pending, self._shift = self._shift, None
+        if not self.ctx_shift or pending is None:
+            return 0
+        n_keep, gone = pending
+        end = n_keep + len(gone)
+        try:
+            if (model.n_tokens < end
+                    or [int(t) for t in model.input_ids[n_keep:end]] != gone):
+                return 0
+            slots = kv_slots.slots_for(model)
+            if slots is None or not slots.shift(n_keep, len(gone)):
+                return 0
+        except Exception as exc:
+            _log.debug("ctx shift skipped: %s", exc)
+            return 0
+        return len(gone)
+
+    def note_reply(self, model, user: str, assistant: str) -> None:
+        """After a build_chat_tokens completion: cache the turn's segment as
+        the exact tokens the model generated (still in the KV), so the next
+        turn's prefix match runs through the reply instead of re-evaluating a
+        re-tokenization of it. No-op when the generated text doesn't match."""
+        if self._pending is None or self._pending[0] != user:
+            return
+        _, head, n_prompt = self._pending
+        self._pending = None
+        try:
+            gen = [int(t) for t in model.input_ids[n_prompt:model.n_tokens]]
+            if model.detokenize(gen).decode("utf-8", errors="replace").strip() \
+                    != assistant:
+                return
+            _, turn_fmt, _, _ = _CHAT_FORMATS[
+                _chat_format(getattr(model, 'model_path', ''))]
+            tail = turn_fmt.format(u="", a="\0").split("\0", 1)[1]
+            toks = head + gen + model.tokenize(tail.encode(), add_bos=False,
+                                               special=True)
+            self._seg_toks[turn_fmt.format(u=user, a=assistant)] = toks
+            if self._turns and self._turns[-1] == (user, assistant):
+                self._total += len(toks) - self._counts[-1]
+                self._counts[-1] = len(toks)
+        except Exception:
+            pass
+
     def context_fill_pct(self, sys_prompt: str) -> float:
         return self.total_tokens(sys_prompt) / self.n_ctx * 100
 
@@ -196,6 +421,11 @@ class ConversationHistory:
 
     def clear(self) -> None:
         self._turns.clear()
+        self._counts.clear()
+        self._total = 0
+        self._seg_toks.clear()
+        self._pending = None
+        self._shift = None
 
 
 def make_driver(loop=None):
@@ -205,40 +435,496 @@ def make_driver(loop=None):
         sys_prompt  = ""
         _stop_event = threading.Event()
         history     = ConversationHistory(n_ctx=2048)
-        # Depth-1 queue: a new Generate drops any pending unstarted request
-        _req_queue: queue.Queue = queue.Queue(maxsize=1)
+        # Priority queue with preemption; clears _stop_event as each op starts
+        _sched      = scheduler.RequestScheduler(_stop_event)
+        # Non-LLM intent classifier: saved model path, and the model per
+        # source (path or system prompt) — None when it can't be built.
+        fast_model_path = None
+        _fast_models = {}
+        # Exact-repeat intent results (normalized text, domains, prompt hash)
+        _intent_cache = intent_cache.IntentCache()
+        # Semantic intent memory: (embed model, threshold, embed_gpu) from
+        # Initialize and the memory for the current prompt (built in the
+        # background).
+        recall_cfg = [None, 0.85, False]
+        _memory = [None]
+        # Prompt-lookup draft length for manual / chat (0 = create_completion)
+        prompt_lookup = [0]
+        # Draft model (fsttm.speculative.DraftModel), [draft_tokens,
+        # min_accept], and answers left before it is tried again
+        _draft = [None]
+        draft_cfg = [4, 0.3]
+        draft_backoff = [0]
+        # The speculative intent in flight: item, key (IntentCache.key), held
+        # events, started / done on the worker, the final request waiting on
+        # it (adopt) and when it was queued. Shared by loop and worker.
+        _spec = {}
+        _spec_lock = threading.Lock()
+
+        def _emit_intent(item, ev):
+            """Emit an intent event. A speculative intent's are held until
+            it is committed — and dropped once it is discarded."""
+            if item.speculative:
+                with _spec_lock:
+                    if _spec.get("item") is item:
+                        _spec["events"].append(ev)
+                return
+            loop.call_soon_threadsafe(observer.on_next, ev)
 
         # ── intent two-pass handler ───────────────────────────────────────
         def _handle_intent(item: IntentGenerate):
             from fsttm.domain import active_provider
-            from fsttm.two_pass import approach_a
+            from fsttm.two_pass import Cancelled, approach_a
             _log.debug("intent dispatch: text=%r domains=%s", item.text, item.domains)
             try:
-                grammar = active_provider().build_grammar(item.domains)
+                provider = active_provider()
+                grammar = provider.build_grammar(item.domains)
+                schema = provider.build_schema(item.domains)
+                names = schema["properties"]["intent"]["enum"]
+                codec = None
+                if item.system_intents:
+                    # wake-prefixed: SLEEP / MUTE decided in the same pass
+                    from fsttm.domain import compile_grammar
+                    from fsttm.grammar import fold_system_intents
+                    schema = fold_system_intents(schema)
+                    grammar = compile_grammar(schema)
+                if item.encoding == "compact":
+                    from fsttm.domain import compile_grammar
+                    from fsttm.wire import codec_for
+                    codec = codec_for(schema)
+                    schema = codec.encode_schema(schema)
+                    grammar = compile_grammar(schema)
+                ack = _ack_fn(provider, item.ack_mode, codec)
+                if item.system_intents:
+                    ack = _system_ack(ack, codec)
             except Exception as exc:
                 _log.exception("build_grammar failed (domains=%s)", item.domains)
-                loop.call_soon_threadsafe(observer.on_next, LlamaError(error=exc, context=item.context))
+                _emit_intent(item, LlamaError(error=exc, context=item.context))
                 return
+            if not item.system_intents and _recall_answer(item, provider, names):
+                return
+            def on_intent(parsed):
+                if codec is not None and parsed is not None:
+                    parsed = codec.decode(parsed)
+                if _system_action(item, parsed):
+                    return          # no backend side effects for SLEEP / MUTE
+                _emit_intent(item, IntentParsed(intent_json=parsed,
+                                                context=item.context))
+
+            def on_token(text):
+                _emit_intent(item, Response(text=text, context=INTENT_ACK))
+
             try:
                 intent, tts, tj, tt = approach_a(
-                    model, sys_prompt, item.text, grammar
+                    model, sys_prompt, item.text, grammar, schema=schema,
+                    ack=ack, on_intent=on_intent, on_token=on_token,
+                    cancel=_stop_event,
                 )
+                if codec is not None and intent is not None:
+                    intent = codec.decode(intent)
                 _log.info("intent OK: JSON=%.0fms TTS=%.0fms intent=%r",
                           tj, tt, intent)
+                action = _system_action(item, intent)
+                if action:
+                    _emit_intent(item, SystemIntent(action=action,
+                                                    context=item.context))
+                    return
                 try:   # surface the split timing to the TUI (regression watch)
                     from fsttm.tui import record_intent_perf
                     record_intent_perf(tj, tt)
                 except Exception:
                     pass
+                if item.fast_intent == "shadow":
+                    _fast_shadow(item, provider, intent)
+                _intent_cache.put(item.text, item.domains, sys_prompt,
+                                  intent, tts)
+                _remember(item.text, provider, intent)
+            except Cancelled:
+                _log.info("intent cancelled: %r", item.text)
+                _emit_intent(item, IntentCancelled(context=item.context))
+                return
             except Exception as exc:
                 intent, tts = None, ""
                 _log.exception("approach_a failed for %r", item.text)
-                loop.call_soon_threadsafe(observer.on_next, LlamaError(error=exc, context=item.context))
+                _emit_intent(item, LlamaError(error=exc, context=item.context))
                 return
-            loop.call_soon_threadsafe(
-                observer.on_next,
-                IntentResult(intent_json=intent, tts_text=tts, context=item.context),
-            )
+            _emit_intent(item, IntentResult(intent_json=intent, tts_text=tts,
+                                            context=item.context))
+
+        # ── speculative intent on a partial transcript ────────────────────
+        def _spec_key(item):
+            return intent_cache.IntentCache.key(item.text, item.domains, sys_prompt)
+
+        def _speculate(item):
+            """Queue a stable partial transcript's intent ahead of the final
+            one, replacing the speculation in flight unless it is for the same
+            text. A cached text is left to the cache."""
+            import time as _t
+            key = _spec_key(item)
+            if not key[0] or _intent_cache.has(item.text, item.domains, sys_prompt):
+                return
+            with _spec_lock:
+                if _spec.get("key") == key:
+                    return
+                discarded = bool(_spec)
+                _spec.clear()
+                _spec.update(item=item, key=key, events=[], started=False,
+                             done=False, adopt=None, t0=_t.monotonic())
+            if discarded:
+                _record_spec("discarded")
+            _record_spec("started")
+            _log.debug("speculative intent: %r", item.text)
+            _sched.put(item, scheduler.INTENT)    # supersedes the old one
+
+        def _settle_spec(item) -> bool:
+            """A final request arrived. An IntentGenerate with the speculated
+            text commits it: its held events are replayed now, or as soon as
+            it finishes. Anything else discards it (stopping it if queued or
+            running; a cancelled approach_a leaves the KV prefix-only).
+            True → `item` is answered by the speculation."""
+            import time as _t
+            with _spec_lock:
+                if not _spec:
+                    return False
+                same = (type(item) is IntentGenerate and not item.system_intents
+                        and _spec["key"] == _spec_key(item))
+                lead = (_t.monotonic() - _spec["t0"]) * 1000
+                if same and _spec["started"] and not _spec["done"]:
+                    _spec["adopt"] = item
+                    _record_spec("adopted", lead)
+                    _log.info("speculative intent adopted (%.0fms ahead): %r",
+                              lead, item.text)
+                    return True
+                events = _spec["events"] if same and _spec["done"] else None
+                running = not _spec["done"]
+                _spec.clear()
+            if events is not None and _replay_spec(events, item):
+                _record_spec("committed", lead)
+                _log.info("speculative intent committed (%.0fms ahead): %r",
+                          lead, item.text)
+                return True
+            _record_spec("discarded")
+            _log.debug("speculative intent discarded for %r", item)
+            if running:
+                _sched.supersede(scheduler.INTENT)
+            return False
+
+        def _spec_begin(item) -> bool:
+            """Worker: run this speculative intent? False once discarded."""
+            with _spec_lock:
+                if _spec.get("item") is not item:
+                    return False
+                _spec["started"] = True
+                return True
+
+        def _spec_end(item):
+            """Worker: the speculative intent finished. A final request that
+            adopted it gets the held events, or is queued itself when the
+            speculation was cancelled / failed."""
+            with _spec_lock:
+                if _spec.get("item") is not item:
+                    return
+                _spec["done"] = True
+                final = _spec["adopt"]
+                if final is None:
+                    return              # held for the final transcript
+                events = _spec["events"]
+                _spec.clear()
+            if not _replay_spec(events, final):
+                _sched.put(final, scheduler.INTENT)
+
+        def _replay_spec(events, item) -> bool:
+            """Emit held events as the answer to `item` (its context; the
+            ack Responses keep INTENT_ACK). False → no result to replay."""
+            if not any(type(ev) in (IntentResult, SystemIntent) for ev in events):
+                return False
+            for ev in events:
+                if type(ev) is not Response:
+                    ev = ev._replace(context=item.context)
+                loop.call_soon_threadsafe(observer.on_next, ev)
+            return True
+
+        def _record_spec(outcome, lead_ms=None):
+            try:
+                from fsttm.tui import record_spec_intent
+                record_spec_intent(outcome, lead_ms)
+            except Exception:
+                pass
+
+        # ── non-LLM intent fast path (fsttm.fastintent) ───────────────────
+        def _fast_model():
+            """The classifier for the current prompt / model file, or None
+            while it is loading or training in the background — the request
+            then goes on to the LLM as before."""
+            key = fast_model_path or sys_prompt
+            if key not in _fast_models:
+                _fast_models[key] = None
+                threading.Thread(target=_build_fast_model,
+                                 args=(key, fast_model_path, sys_prompt),
+                                 daemon=True, name="fast-intent").start()
+            return _fast_models[key]
+
+        def _build_fast_model(key, path, prompt):
+            """Background: load `path` or train on the prompt's examples."""
+            import time as _t
+            from fsttm.domain import active_provider
+            from fsttm.fastintent import FastIntent, examples_from_prompt
+            _t0 = _t.monotonic()
+            fm = None
+            try:
+                if path:
+                    fm = FastIntent.load(path)
+                else:
+                    enum = (active_provider().build_schema(None)
+                            ["properties"]["intent"]["enum"])
+                    examples = examples_from_prompt(prompt, set(enum))
+                    if len({y for _, y in examples}) > 1:
+                        fm = FastIntent.train(examples)
+            except Exception:
+                _log.exception("fast intent model unavailable (%s)",
+                               path or "system prompt")
+            _log.info("fast intent model: %s in %.0fms",
+                      "ready" if fm else "none", (_t.monotonic() - _t0) * 1000)
+            _fast_models[key] = fm
+
+        def _fast_classify(item, provider):
+            """(intent dict or None, name, prob, ms) — the intent only when
+            confident, fillable and inside the request's domains."""
+            import time as _t
+            from fsttm.fastintent import fast_intent
+            fm = _fast_model()
+            if fm is None or not item.text:
+                return None, None, 0.0, 0.0
+            _t0 = _t.monotonic()
+            intent, name, prob = fast_intent(fm, provider, item.text,
+                                             item.fast_threshold)
+            if intent is not None and name not in (
+                    provider.build_schema(item.domains)
+                    ["properties"]["intent"]["enum"]):
+                intent = None
+            return intent, name, prob, (_t.monotonic() - _t0) * 1000
+
+        def _record_fast(outcome, ms=0.0):
+            try:
+                from fsttm.tui import record_fast_intent
+                record_fast_intent(outcome, ms)
+            except Exception:
+                pass
+
+        def _answer_now(item, intent, tts):
+            """Emit an intent answered outside the queue (cache hit / fast
+            path) and drop or stop the intent request it supersedes."""
+            _sched.supersede(scheduler.INTENT)
+            _emit_answer(item, intent, tts)
+
+        def _emit_answer(item, intent, tts):
+            _emit_intent(item, IntentParsed(intent_json=intent,
+                                            context=item.context))
+            _emit_intent(item, IntentResult(intent_json=intent,
+                                            tts_text=tts or "Okay, done.",
+                                            context=item.context))
+
+        def _template_ack(provider, intent):
+            template = getattr(provider, "ack_template", None)
+            try:
+                return template(intent) if template is not None else None
+            except Exception:
+                _log.exception("ack_template failed for %r", intent)
+                return None
+
+        def _cached_answer(item) -> bool:
+            """An exact repeat (same normalized text, domains and prompt):
+            answer from the intent cache. The ack is re-rendered from the
+            provider template when ack_mode uses templates, else the cached
+            one is spoken again. False → not cached, carry on."""
+            hit = _intent_cache.get(item.text, item.domains, sys_prompt)
+            _publish_cache_stats()
+            if hit is None:
+                return False
+            intent, tts = hit
+            if item.ack_mode in ("template", "template-then-llm"):
+                from fsttm.domain import active_provider
+                tts = _template_ack(active_provider(), intent) or tts
+            _log.info("intent cache hit: %r → %r", item.text, intent)
+            _answer_now(item, intent, tts)
+            return True
+
+        def _publish_cache_stats():
+            try:
+                from fsttm.tui import record_intent_cache
+                record_intent_cache(_intent_cache.stats())
+            except Exception:
+                pass
+
+        # ── semantic intent memory (fsttm.intent_memory) ──────────────────
+        def _build_memory(prompt):
+            """Background: load the (shared) embedder and seed a memory from
+            the prompt's examples. Until it is ready every intent goes on to
+            the LLM as before."""
+            import time as _t
+            from fsttm.domain import active_provider
+            from fsttm.fastintent import examples_from_prompt
+            from fsttm.intent_memory import IntentMemory
+            from fsttm.rag.store import embed_layers, shared_embedder
+            _t0 = _t.monotonic()
+            try:
+                enum = (active_provider().build_schema(None)
+                        ["properties"]["intent"]["enum"])
+                embedder = shared_embedder(
+                    recall_cfg[0], n_gpu_layers=embed_layers(recall_cfg[2]))
+                mem = IntentMemory(embedder, threshold=recall_cfg[1])
+                n = mem.seed(examples_from_prompt(prompt, set(enum)))
+            except Exception:
+                _log.exception("intent memory unavailable (%s)", recall_cfg[0])
+                return
+            if prompt == sys_prompt:        # not replaced by a newer prompt
+                _memory[0] = mem
+                _publish_memory_stats()
+                _log.info("intent memory: %d seeds in %.0fms", n,
+                          (_t.monotonic() - _t0) * 1000)
+
+        def _recall_answer(item, provider, names) -> bool:
+            """Nearest known utterance clears the threshold and its intent
+            fills from this text → answer with the template ack, no LLM."""
+            import time as _t
+            mem = _memory[0]
+            if mem is None or not item.text:
+                return False
+            _t0 = _t.monotonic()
+            try:
+                intent, name, score, utt = mem.recall(item.text, provider)
+            except Exception:
+                _log.exception("intent recall failed for %r", item.text)
+                return False
+            ms = (_t.monotonic() - _t0) * 1000
+            _publish_memory_stats(ms)
+            if intent is None or name not in names:
+                _log.debug("intent recall miss: %s %.2f %r ~ %r (%.0fms)",
+                           name, score, item.text, utt, ms)
+                return False
+            _log.info("intent recall: %r ~ %r (%.2f, %.0fms) → %r",
+                      item.text, utt, score, ms, intent)
+            tts = _template_ack(provider, intent)
+            _intent_cache.put(item.text, item.domains, sys_prompt, intent, tts)
+            _emit_answer(item, intent, tts)
+            return True
+
+        def _remember(text, provider, intent):
+            from fsttm.intent_memory import confirmable
+            mem = _memory[0]
+            name = confirmable(provider, text, intent) if mem is not None else None
+            if name is None:
+                return
+            try:
+                if mem.add(text, name):
+                    _publish_memory_stats()
+            except Exception:
+                _log.exception("intent memory add failed for %r", text)
+
+        def _publish_memory_stats(ms=None):
+            try:
+                from fsttm.tui import record_intent_recall
+                record_intent_recall(_memory[0].stats(), ms)
+            except Exception:
+                pass
+
+        def _fast_answer(item) -> bool:
+            """fast_intent "on": answer a confident utterance without the
+            LLM, with the template ack. False → queue it."""
+            from fsttm.domain import active_provider
+            try:
+                provider = active_provider()
+                intent, name, prob, ms = _fast_classify(item, provider)
+            except Exception:
+                _log.exception("fast intent failed for %r", item.text)
+                return False
+            _record_fast("hit" if intent else "fallback", ms)
+            if intent is None:
+                _log.debug("fast intent → llm: %s p=%.2f %r", name, prob, item.text)
+                return False
+            _log.info("fast intent OK: %.1fms p=%.2f intent=%r", ms, prob, intent)
+            _answer_now(item, intent, _template_ack(provider, intent))
+            return True
+
+        def _fast_shadow(item, provider, llm_intent):
+            """fast_intent "shadow": would the fast path have answered, and
+            with the LLM's intent? Logged and counted, never acted on."""
+            try:
+                intent, name, prob, ms = _fast_classify(item, provider)
+            except Exception:
+                _log.exception("fast intent shadow failed for %r", item.text)
+                return
+            if intent is None:
+                _record_fast("fallback", ms)
+                return
+            agree = isinstance(llm_intent, dict) and all(
+                llm_intent.get(k) == v for k, v in intent.items())
+            _record_fast("agree" if agree else "disagree", ms)
+            _log.info("fast intent shadow %s: p=%.2f fast=%r llm=%r %r",
+                      "agree" if agree else "DISAGREE", prob, intent,
+                      llm_intent, item.text)
+
+        def _system_action(item, intent):
+            """"sleep" / "mute" when a folded-grammar request decoded a system
+            action (fsttm.grammar.fold_system_intents), else None."""
+            if not item.system_intents:
+                return None
+            from fsttm.grammar import system_action
+            return system_action(intent)
+
+        def _system_ack(ack, codec):
+            """Folded grammar: no spoken ack pass for SLEEP / MUTE — the
+            server speaks its own sleep confirmation."""
+            from fsttm.grammar import system_action
+
+            def folded(intent):
+                if system_action(codec.decode(intent) if codec else intent):
+                    return ""
+                return ack(intent) if ack is not None else None
+            return folded
+
+        def _ack_fn(provider, mode, codec):
+            """approach_a's ack callback for the configured ack_mode, or None
+            (always run the LLM pass). Templates see the canonical intent."""
+            template = getattr(provider, "ack_template", None)
+            if mode not in ("template", "template-then-llm") or template is None:
+                return None
+
+            def ack(intent):
+                try:
+                    text = template(codec.decode(intent) if codec else intent)
+                except Exception:
+                    _log.exception("ack_template failed for %r", intent)
+                    text = None
+                # "template" never falls back to pass 2: a generic ack instead.
+                return text or ("Okay, done." if mode == "template" else None)
+            return ack
+
+        # ── KV scratch slots (chat / classify / manual) ───────────────────
+        def _enter_slot(name, prompt, max_tokens):
+            """Swap scratch slot `name` into the working seq so create_completion
+            prefix-matches its last prompt instead of re-evaluating from zero, and
+            evict LRU slots until prompt + generation fit the shared KV."""
+            slots = kv_slots.slots_for(model)
+            if slots is None:
+                return
+            try:
+                slots.restore(name)
+                if isinstance(prompt, str):
+                    prompt = model.tokenize(prompt.encode(), special=True)
+                need = len(prompt) + max_tokens
+                slots.reserve(need, keep=name)
+            except Exception as exc:
+                _log.debug("kv slot %s restore skipped: %s", name, exc)
+
+        def _park_slot(name):
+            slots = kv_slots.slots_for(model)
+            if slots is None:
+                return
+            try:
+                slots.park(name)
+            except Exception as exc:
+                _log.debug("kv slot %s park skipped: %s", name, exc)
 
         # ── system-intent classifier (attention sleep_intent) ─────────────
         def _handle_classify(item):
@@ -250,12 +936,14 @@ def make_driver(loop=None):
             try:
                 grammar = make_system_grammar()
                 prompt = (f"{SYSTEM_INTENT_PROMPT}\n\nUser: {item.text}\nJSON: ")
+                _enter_slot("classify", prompt, 16)
                 out = model.create_completion(
                     prompt, max_tokens=16, temperature=0.0,
                     grammar=grammar, stream=False,
                 )
                 txt = out["choices"][0]["text"].strip()
                 action = _json.loads(txt).get("action", "command")
+                _park_slot("classify")
             except Exception as exc:
                 loop.call_soon_threadsafe(
                     observer.on_next, LlamaError(error=exc, context=item.context))
@@ -263,23 +951,96 @@ def make_driver(loop=None):
                 observer.on_next,
                 SystemIntent(action=action, context=item.context))
 
+        # ── streamed completion (manual / chat) ───────────────────────────
+        def _stream(prompt, **kw):
+            """Text pieces of a streamed completion, decoded speculatively
+            (fsttm.speculative) with the draft model unless it is backing off,
+            else with prompt lookup when enabled, else by create_completion.
+            A failure before the first piece falls back to create_completion."""
+            from fsttm import speculative
+            kind, drafter, n_draft, min_accept = "lookup", None, prompt_lookup[0], 0.0
+            if _draft[0] is not None:
+                if draft_backoff[0] > 0:
+                    draft_backoff[0] -= 1
+                else:
+                    kind, drafter = "draft", _draft[0]
+                    n_draft, min_accept = draft_cfg
+            if n_draft and speculative.supported(model):
+                st, sent = {}, False
+                try:
+                    for piece in speculative.stream_completion(
+                            model, prompt, draft_tokens=n_draft, drafter=drafter,
+                            min_accept=min_accept, cancel=_stop_event, stats=st,
+                            **kw):
+                        sent = True
+                        yield piece
+                    return
+                except Exception:
+                    if sent:
+                        raise
+                    _log.exception("speculative decoding (%s) failed, using "
+                                   "create_completion", kind)
+                finally:
+                    if kind == "draft" and st.get("fallback"):
+                        draft_backoff[0] = speculative.BACKOFF
+                        _log.info("draft model: %d/%d drafts accepted, off for "
+                                  "%d answers", st["accepted"], st["drafted"],
+                                  speculative.BACKOFF)
+                    _publish_spec_stats(kind, st)
+            for chunk in model.create_completion(prompt, stream=True, **kw):
+                yield chunk["choices"][0]["text"]
+
+        def _publish_spec_stats(kind, st):
+            if not st.get("passes"):
+                return
+            try:
+                from fsttm.tui import record_speculative
+                record_speculative(kind, st)
+            except Exception:
+                pass
+
+        def _load_draft(item):
+            """Load gpt.draft_model next to the main model; a missing file or
+            another vocabulary leaves speculative decoding to prompt lookup."""
+            from fsttm.speculative import DraftModel
+            _draft[0] = None
+            draft_cfg[:] = [item.draft_tokens, item.draft_min_accept]
+            draft_backoff[0] = 0
+            if not item.draft_model:
+                return
+            try:
+                with ignoreStderr():
+                    draft = DraftModel(item.draft_model, n_ctx=item.n_ctx,
+                                       n_batch=item.n_batch,
+                                       n_threads=item.n_threads,
+                                       n_gpu_layers=item.n_gpu_layers)
+                if not draft.compatible(model):
+                    _log.warning("draft model %s: vocabulary differs from %s, "
+                                 "not used", item.draft_model, item.model_path)
+                    return
+            except Exception:
+                _log.exception("draft model %s unavailable", item.draft_model)
+                return
+            _draft[0] = draft
+            _log.info("draft model: %s (%d tok/pass)", item.draft_model,
+                      item.draft_tokens)
+
         # ── manual RAG answer (one-shot, history-free) ────────────────────
         def _handle_manual(item):
             """Generate a grounded answer from a fully-formed prompt (RAG context
             already in item.prompt). Streams Response tokens + ResponseDone so the
             narrator speaks it; does NOT touch conversation history."""
-            _stop_event.clear()
             ctx = item.context
             acc = []
             try:
-                for chunk in model.create_completion(
+                _enter_slot("manual", item.prompt, 120)
+                for tok in _stream(
                         item.prompt, max_tokens=120, temperature=0.2,
-                        top_k=40, top_p=0.9, stream=True,
+                        top_k=40, top_p=0.9,
                         stop=["\n", "Question:", "Manual excerpts:",
                               "Spoken answer:"]):
                     if _stop_event.is_set():
                         break
-                    tok = chunk["choices"][0]["text"]
                     if not tok:
                         continue
                     acc.append(tok)
@@ -292,18 +1053,37 @@ def make_driver(loop=None):
                 loop.call_soon_threadsafe(
                     observer.on_next,
                     ResponseDone(full_text="".join(acc), context=ctx))
+                _park_slot("manual")
 
         def _reprime_after_completion():
-            """A create_completion (classify/manual/chat) resets the KV cache and
-            wipes the intent prefix → the next intent command pays the ~11s
-            re-prime. Re-warm it NOW, but ONLY if no request is queued (so we use
-            the idle gap while the user listens to the answer, never delay a
-            pending command). Intent mode only (long prefix)."""
-            if model is None or not sys_prompt or not _req_queue.empty():
+            """The intent prefix normally survives classify/manual/chat in its own
+            KV slot, so this is a no-op. It was evicted (shared KV full) or, on a
+            single-seq context, overwritten → the next intent command would pay
+            the ~11s re-prime. Queue the re-warm as IDLE work: it runs only when
+            nothing else is pending (the idle gap while the user listens to the
+            answer). A request arriving mid-prime preempts it at the next n_batch
+            chunk; the evaluated part stays parked and the prime resumes from it
+            once the worker is idle again (or the preempting intent finishes it).
+            Intent mode only (long prefix)."""
+            slots = kv_slots.slots_for(model)
+            if (model is None or not sys_prompt or slots is None or
+                    slots.lookup(kv_slots.prefix_slot(sys_prompt), sys_prompt) is not None):
                 return
+            _sched.put(_REPRIME, scheduler.IDLE)
+
+        def _reprime():
+            from fsttm.two_pass import Cancelled, _prime_prefix
             try:
-                from fsttm.two_pass import _prime_prefix
-                _prime_prefix(model, sys_prompt)
+                _prime_prefix(model, sys_prompt, cancel=_stop_event)
+            except Cancelled:
+                _reprime_after_completion()   # paused: resume when idle
+            except Exception:
+                pass
+
+        def _publish_sched_stats():
+            try:   # drops / queue wait in the TUI State·Perf panel
+                from fsttm.tui import record_llm_queue
+                record_llm_queue(_sched.stats())
             except Exception:
                 pass
 
@@ -311,13 +1091,22 @@ def make_driver(loop=None):
         def _worker():
             nonlocal model
             while True:
-                item = _req_queue.get()
+                item, _cls = _sched.get()
                 if item is None:
-                    break          # sentinel: shut down worker
+                    break          # scheduler closed: shut down worker
+                _publish_sched_stats()
                 if model is None:
                     continue
+                if item is _REPRIME:
+                    _reprime()
+                    continue
                 if isinstance(item, IntentGenerate):
-                    _handle_intent(item)
+                    if not item.speculative:
+                        _handle_intent(item)
+                    elif _spec_begin(item):
+                        _handle_intent(item)
+                        _spec_end(item)
+                    _reprime_after_completion()   # its prime was cancelled
                     continue
                 if isinstance(item, ClassifySystem):
                     _handle_classify(item)
@@ -330,31 +1119,33 @@ def make_driver(loop=None):
                 if not isinstance(item, Generate):
                     continue
 
-                _stop_event.clear()
                 ctx   = item.context
-                mp    = getattr(model, 'model_path', '')
-                # FIFO context: use conversation history, trim if needed
-                prompt, stop = history.build_chat_prompt(mp, sys_prompt, item.text)
+                # FIFO context: use conversation history, trim if needed. The
+                # prompt is a token list whose past turns are byte-stable, so
+                # only the new turn + assistant header is evaluated.
+                prompt, stop = history.build_chat_tokens(model, sys_prompt, item.text)
                 fill = history.context_fill_pct(sys_prompt)
                 if fill > 50:
                     print(f"  [ctx] {fill:.0f}% full, {history.turn_count()} turns")
 
                 accumulated = []
                 in_think    = False
+                _enter_slot("chat", prompt, 80)
+                shifted = history.shift_kv(model)
+                if shifted:
+                    _log.info("ctx shift: discarded %d tok, kept KV", shifted)
                 try:
-                    for chunk in model.create_completion(
+                    for tok in _stream(
                         prompt,
                         max_tokens=80,       # short answers for voice
                         temperature=0.7,
                         top_k=40,
                         top_p=0.95,
                         repeat_penalty=1.1,
-                        stream=True,
                         stop=stop,
                     ):
                         if _stop_event.is_set():
                             break
-                        tok = chunk["choices"][0]["text"]
                         if not tok:
                             continue
                         # strip Phi-4 <think> blocks
@@ -383,11 +1174,13 @@ def make_driver(loop=None):
                     # Record turn in FIFO history (even partial/interrupted)
                     if full_reply.strip():
                         history.add_turn(item.text, full_reply.strip())
+                        history.note_reply(model, item.text, full_reply.strip())
+                    _park_slot("chat")
                     loop.call_soon_threadsafe(
                         observer.on_next,
                         ResponseDone(full_text=full_reply, context=ctx),
                     )
-                    _reprime_after_completion()   # chat reset the KV → re-warm
+                    _reprime_after_completion()   # prefix evicted → re-warm
 
         worker_thread = threading.Thread(target=_worker, daemon=True, name="llama-worker")
         worker_thread.start()
@@ -397,7 +1190,7 @@ def make_driver(loop=None):
             observer = obs   # capture for worker closure
 
             def on_request(item):
-                nonlocal model, sys_prompt
+                nonlocal model, sys_prompt, fast_model_path
                 if type(item) is Initialize:
                     try:
                         from llama_cpp import Llama
@@ -407,7 +1200,9 @@ def make_driver(loop=None):
                                   "n_threads=%s n_gpu_layers=%s", item.model_path,
                                   item.n_ctx, item.n_batch, item.n_threads,
                                   item.n_gpu_layers)
-                        with ignoreStderr():
+                        # n_seq_max > 1: the intent prefix and the chat /
+                        # classify / manual histories each keep a KV slot.
+                        with ignoreStderr(), kv_slots.multi_seq_params():
                             model = Llama(
                                 model_path=item.model_path,
                                 n_ctx=item.n_ctx,
@@ -417,15 +1212,39 @@ def make_driver(loop=None):
                                 verbose=False,
                             )
                         model.model_path = item.model_path
+                        slots = kv_slots.slots_for(model)
+                        if slots is not None:
+                            slots.persist_dir = item.prefix_cache
+                            slots.max_prefixes = item.prefix_slots
+                            slots.prefix_budget = item.prefix_budget
+                        _log.info("kv slots: %s", "multi-seq" if slots and
+                                  slots.multi else "single-seq fallback")
                         history.n_ctx = model.n_ctx()
-                        history.threshold_toks = int(model.n_ctx() * 0.80)
+                        history.ctx_threshold = item.ctx_threshold
+                        history.threshold_toks = int(model.n_ctx() * item.ctx_threshold)
+                        history.bind(model)
+                        history.ctx_shift = bool(item.ctx_shift)
+                        fast_model_path = item.fast_intent_model
+                        _intent_cache.max_entries = item.intent_cache
+                        _intent_cache.ttl_s = item.intent_cache_ttl
+                        _intent_cache.clear()       # results of another model
+                        recall_cfg[:] = [item.recall_embed, item.recall_threshold,
+                                         item.recall_embed_gpu]
+                        prompt_lookup[0] = item.prompt_lookup or 0
+                        _load_draft(item)
                         print("Llama model ready")
                     except Exception as exc:
                         loop.call_soon_threadsafe(
                             obs.on_next, LlamaError(error=exc, context=None)
                         )
                 elif type(item) is AddSystem:
+                    if (item.prompt or "") != sys_prompt:
+                        _intent_cache.clear()   # prompt / grammar changed
+                        _memory[0] = None
                     sys_prompt = item.prompt or ""
+                    if recall_cfg[0] and sys_prompt and _memory[0] is None:
+                        threading.Thread(target=_build_memory, args=(sys_prompt,),
+                                         daemon=True, name="intent-memory").start()
                     # Pre-warm: eval the intent system prefix into the KV cache NOW
                     # (at startup, before any request) so the FIRST command hits the
                     # warm cache (~150ms) instead of paying the ~5s prime. Only
@@ -447,25 +1266,25 @@ def make_driver(loop=None):
                     # Barge-in rollback: replace the last assistant turn with
                     # only the checkpoints the user actually heard. Empty heard
                     # text → "..." so the turn structure stays intact.
-                    if history._turns and item.heard_text is not None:
-                        user, _ = history._turns[-1]
-                        history._turns[-1] = (user, item.heard_text.strip() or "...")
+                    if history.turn_count() and item.heard_text is not None:
+                        history.replace_last_reply(item.heard_text.strip() or "...")
+                elif type(item) is IntentGenerate and item.speculative:
+                    if model is not None:
+                        _speculate(item)
+                elif (type(item) in _SCHED_CLASS and model is not None
+                      and _settle_spec(item)):
+                    pass                   # answered by the speculative intent
+                elif (type(item) is IntentGenerate and model is not None
+                      and not item.system_intents
+                      and (_cached_answer(item) or
+                           (item.fast_intent == "on" and _fast_answer(item)))):
+                    pass                   # answered without the LLM
                 elif type(item) is StopGenerate:
-                    _stop_event.set()
-                    # drain any pending unstarted request
-                    try:
-                        _req_queue.get_nowait()
-                    except queue.Empty:
-                        pass
-                elif type(item) in (Generate, IntentGenerate, ClassifySystem,
-                                    ManualGenerate):
-                    _stop_event.set()   # cancel running inference first
-                    # replace any pending request (drop old, queue new)
-                    try:
-                        _req_queue.get_nowait()
-                    except queue.Empty:
-                        pass
-                    _req_queue.put(item)
+                    # barge-in: stop the running op, drop pending work
+                    _sched.cancel()
+                elif type(item) in _SCHED_CLASS:
+                    # preempts the running op if it outranks (or supersedes) it
+                    _sched.put(item, _SCHED_CLASS[type(item)])
                 else:
                     obs.on_error(f"Unknown item type: {type(item)}")
 
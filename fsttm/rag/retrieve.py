@@ -9,16 +9,15 @@ Usage (CLI, for testing on the host):
 """
 import argparse
 
-from fsttm.rag.store import Embedder, VectorStore
+from fsttm.rag.store import VectorStore, embed_layers, shared_embedder
 
 
 class Retriever:
     def __init__(self, store_path, embed_model, k=4, min_score=0.30,
                  embed_gpu=False):
         self.store = VectorStore.load(store_path)
-        # embed_gpu=False (default) → CPU embedder, so it doesn't fight the LLM
-        # for VRAM on a shared-memory Jetson. -1 offloads all layers on a GPU box.
-        self.embed = Embedder(embed_model, n_gpu_layers=(-1 if embed_gpu else 0))
+        self.embed = shared_embedder(embed_model,
+                                     n_gpu_layers=embed_layers(embed_gpu))
         self.k = k
         self.min_score = min_score
 
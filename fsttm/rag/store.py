@@ -8,6 +8,7 @@ in-memory matrix with cosine similarity is plenty and stays in one runtime
 """
 import json
 import os
+import threading
 
 import numpy as np
 
@@ -35,6 +36,9 @@ class Embedder:
         if n_threads:
             kw["n_threads"] = n_threads
         self._llm = Llama(**kw)
+        # One embedder serves the manual RAG (event loop) and the intent
+        # memory (llama worker); a llama context is not re-entrant.
+        self._lock = threading.Lock()
 
     def embed(self, texts):
         """texts: str or list[str] → float32 array (N, dim), L2-normalised."""
@@ -42,7 +46,8 @@ class Embedder:
             texts = [texts]
         vecs = []
         for t in texts:
-            e = self._llm.embed(t)
+            with self._lock:
+                e = self._llm.embed(t)
             # some builds return a list-of-token-embeddings for long input;
             # collapse to a single vector by mean-pooling if needed.
             arr = np.asarray(e, dtype=np.float32)
@@ -55,6 +60,28 @@ class Embedder:
         return (m / norms).astype(np.float32)
 
 
+_SHARED: dict = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def embed_layers(gpu: bool) -> int:
+    """n_gpu_layers for an embed_gpu setting. False (default) → CPU embedder,
+    so it doesn't fight the LLM for VRAM on a shared-memory Jetson; True → -1,
+    every layer offloaded on a GPU box. Every shared_embedder caller maps the
+    flag here so they hit the same cache entry."""
+    return -1 if gpu else 0
+
+
+def shared_embedder(model_path, n_gpu_layers=0):
+    """One Embedder per (model, offload) for the whole process, so the manual
+    RAG and the intent memory (fsttm.intent_memory) don't each load a copy."""
+    key = (os.path.abspath(os.path.expanduser(model_path)), n_gpu_layers)
+    with _SHARED_LOCK:
+        if key not in _SHARED:
+            _SHARED[key] = Embedder(key[0], n_gpu_layers=n_gpu_layers)
+        return _SHARED[key]
+
+
 class VectorStore:
     """Flat cosine-similarity store over normalised embeddings."""
 
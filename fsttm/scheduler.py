@@ -0,0 +1,161 @@
+"""
+Priority scheduler for the llama worker.
+
+The worker serialises every model op on one thread. Before this it was fed by
+a depth-1 queue.Queue: each new request silently replaced whatever was
+pending, whatever its kind. The scheduler makes the policy explicit:
+
+  class      requests                     supersede  deadline
+  CANCEL     StopGenerate (barge-in)      —          —   (never queued)
+  INTENT     IntentGenerate               yes        3s
+  CLASSIFY   ClassifySystem               no         —
+  REPLY      ManualGenerate, Generate     yes        8s
+  IDLE       the idle-gap prefix re-prime yes        —
+
+  • get() hands out the highest class first, FIFO within a class.
+  • supersede: a new request drops the pending one of its class (a newer
+    utterance makes the older one moot). Classify requests are never
+    superseded — the attention gate holds an utterance until ITS verdict.
+  • preemption: a request of a higher class, or a superseding one of the
+    running class, sets the stop event so the running op aborts at its next
+    token (two_pass.Cancelled / the streaming loops).
+  • deadline: a request that waited longer than its class deadline is
+    dropped at get() instead of answering a question nobody is waiting for.
+    Classify has none: the server parks the wake-prefixed command until its
+    SystemIntent, so a dropped verdict would lose the command (it can wait
+    behind a cold intent prime of 5-11 s).
+  • cancel(): drops everything pending except classify and stops the
+    running op.
+  • supersede(cls): a request answered outside the queue (the non-LLM
+    intent fast path) drops / stops the pending and running one of its class.
+
+Every drop is counted by reason and logged; stats() also reports the queue
+wait per class. The driver mirrors it into the TUI State·Perf panel.
+"""
+from __future__ import annotations  # PEP 563: lazy annotations for Python 3.8 (list[]/dict[])
+import logging
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+CANCEL, INTENT, CLASSIFY, REPLY, IDLE = range(5)
+CLASS_NAMES = ("cancel", "intent", "classify", "reply", "idle")
+SUPERSEDE = {INTENT: True, CLASSIFY: False, REPLY: True, IDLE: True}
+DEADLINE_S = {INTENT: 3.0, CLASSIFY: None, REPLY: 8.0, IDLE: None}
+
+
+class RequestScheduler:
+    """Thread-safe priority queue with preemption; one consumer (the worker).
+
+    stop_event: the worker's cancellation event. The scheduler clears it when
+    it hands out a request and sets it to preempt the running one.
+    """
+
+    def __init__(self, stop_event: threading.Event,
+                 deadlines: Optional[dict] = None):
+        self.stop_event = stop_event
+        self.deadlines = {**DEADLINE_S, **(deadlines or {})}
+        self._cv = threading.Condition()
+        self._pending = {c: deque() for c in SUPERSEDE}   # class → (t, item)
+        self._running: Optional[int] = None
+        self._closed = False
+        self.dropped = {"superseded": 0, "expired": 0, "cancelled": 0}
+        self.preempted = 0
+        self.served = {c: 0 for c in SUPERSEDE}
+        self._wait = {c: [0.0, 0.0, 0.0] for c in SUPERSEDE}  # last/max/sum ms
+
+    # ── producer side (event loop) ───────────────────────────────────────
+    def put(self, item, cls: int) -> None:
+        with self._cv:
+            if SUPERSEDE[cls]:
+                self._drop(cls, "superseded")
+            self._pending[cls].append((time.monotonic(), item))
+            run = self._running
+            if run is not None and (cls < run or (cls == run and SUPERSEDE[cls])):
+                self.preempted += 1
+                self.stop_event.set()
+                log.info("llm sched: %s preempts running %s",
+                         CLASS_NAMES[cls], CLASS_NAMES[run])
+            self._cv.notify()
+
+    def cancel(self) -> None:
+        """Barge-in: stop the running op and drop pending work (not classify)."""
+        with self._cv:
+            self.stop_event.set()
+            for cls in self._pending:
+                if cls != CLASSIFY:
+                    self._drop(cls, "cancelled")
+
+    def supersede(self, cls: int) -> None:
+        """A request of `cls` was answered without queueing (the intent fast
+        path): drop the pending one of its class and stop a running one."""
+        with self._cv:
+            self._drop(cls, "superseded")
+            if self._running == cls:
+                self.preempted += 1
+                self.stop_event.set()
+                log.info("llm sched: answered %s preempts running",
+                         CLASS_NAMES[cls])
+
+    def close(self) -> None:
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+
+    # ── consumer side (worker thread) ────────────────────────────────────
+    def get(self):
+        """Block until a request is due; returns (item, cls), or (None, None)
+        once closed. Calling it means the previous op finished; clears the
+        stop event for the op that starts now."""
+        with self._cv:
+            self._running = None
+            while True:
+                if self._closed:
+                    return None, None
+                now = time.monotonic()
+                for cls, q in self._pending.items():
+                    while q:
+                        t, item = q.popleft()
+                        limit = self.deadlines.get(cls)
+                        if limit is not None and now - t > limit:
+                            self._count("expired", cls, item)
+                            continue
+                        self._record_wait(cls, (now - t) * 1000)
+                        self._running = cls
+                        self.stop_event.clear()
+                        return item, cls
+                self._cv.wait()
+
+    # ── stats ────────────────────────────────────────────────────────────
+    def stats(self) -> dict:
+        with self._cv:
+            return {
+                "dropped": dict(self.dropped),
+                "preempted": self.preempted,
+                "pending": sum(len(q) for q in self._pending.values()),
+                "wait_ms": {
+                    CLASS_NAMES[c]: {"n": self.served[c], "last": w[0],
+                                     "max": w[1], "mean": w[2] / self.served[c]}
+                    for c, w in self._wait.items() if self.served[c]},
+            }
+
+    def _drop(self, cls: int, reason: str) -> None:
+        q = self._pending[cls]
+        while q:
+            self._count(reason, cls, q.popleft()[1])
+
+    def _count(self, reason: str, cls: int, item) -> None:
+        if cls != IDLE:          # the re-prime is housekeeping, not lost work
+            self.dropped[reason] += 1
+            log.info("llm sched: dropped %s %s (%s)", CLASS_NAMES[cls],
+                     type(item).__name__, reason)
+
+    def _record_wait(self, cls: int, ms: float) -> None:
+        w = self._wait[cls]
+        w[0] = ms
+        w[1] = max(w[1], ms)
+        w[2] += ms
+        self.served[cls] += 1
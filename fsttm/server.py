@@ -29,6 +29,7 @@ from fsttm.domain import DomainContext, NullProvider, active_provider, load_prov
 from fsttm.fsttm import Model as FSM
 import fsttm.perception as perception
 from fsttm.perception import SpeechDuringPlayback
+from fsttm.speech_gate import SpeechGate
 import fsttm.llama as llama
 import fsttm.tts as tts
 import fsttm.voicefilter as voicefilter
@@ -257,17 +258,63 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
 
     stt_init = config.pipe(
         ops.flat_map(lambda i: rx.from_([
-            whisper.Initialize(i.stt.model, language=i.stt.language)
+            whisper.Initialize(i.stt.model, language=i.stt.language,
+                               stream=bool(getattr(i.stt, 'stream', False)),
+                               partial_ms=getattr(i.stt, 'partial_ms', 500),
+                               ctx_margin=getattr(i.stt, 'ctx_margin', None),
+                               fast_model=getattr(i.stt, 'fast_model', None),
+                               fast_max_s=getattr(i.stt, 'fast_max_s', 3.0),
+                               fast_backlog=getattr(i.stt, 'fast_backlog', 2),
+                               escalate_below=getattr(i.stt, 'escalate_below', 0.5),
+                               speech_gate=bool(getattr(i.stt, 'speech_gate', False)),
+                               min_voiced_ms=getattr(i.stt, 'min_voiced_ms', 150))
         ])),
     )
+    # Streaming STT: the voiced frames go to whisper as they arrive (floor
+    # gate as for the utterance; the end marker always passes) so it can
+    # re-transcribe while the user speaks. The driver ignores them when
+    # stt.stream is off.
+    stt_stream = voice_src.pipe(
+        ops.filter(lambda i: i is None or isinstance(i, (bytes, bytearray))),
+        ops.filter(lambda i: i is None or turn.is_user),
+        ops.map(lambda i: whisper.StreamAudio(
+            data=bytes(i) if i is not None else None)),
+    )
     # Gate: only send onward when user has the floor (not during system speech).
     # The buffered utterance then passes the voice filter (speaker verification
     # — disabled config = synchronous passthrough) before it reaches STT.
+    # Before either, the speech gate (stt.speech_gate) drops obvious
+    # non-speech — coughs, clicks, hiss — so whisper never transcribes it.
+    _speech_gate = [None]
+
+    def _read_speech_gate(cfg):
+        stt = getattr(cfg, 'stt', None)
+        _speech_gate[0] = (SpeechGate(min_voiced_ms=getattr(stt, 'min_voiced_ms', 150))
+                           if getattr(stt, 'speech_gate', False) else None)
+
+    config.subscribe(on_next=_read_speech_gate)
+
+    def _is_speech(pcm):
+        gate = _speech_gate[0]
+        if gate is None:
+            return True
+        why = gate.check(pcm)
+        try:
+            from fsttm.tui import record_speech_gate
+            record_speech_gate(gate.stats())
+        except Exception:
+            pass
+        if why is not None:
+            _log.info("speech gate: dropped %.1fs utterance (%s)",
+                      len(pcm) / 32000, why)
+        return why is None
+
     vf_init = config.pipe(ops.map(
         lambda i: voicefilter.Initialize(cfg=getattr(i, 'voice_filter', None) or {})))
     vf_request = utterance.pipe(
         ops.filter(lambda i: len(i) > 0),
         ops.filter(lambda _: turn.is_user),   # FSM gate: user must have floor
+        ops.filter(_is_speech),
         ops.map(lambda i: voicefilter.Filter(data=i, context=None)),
     )
     vf_subjects = rx.merge(vf_init, vf_request)
@@ -276,7 +323,7 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
         ops.filter(lambda i: type(i) is voicefilter.Accepted),
         ops.map(lambda i: whisper.SpeechToText(data=i.data, context=i.context)),
     )
-    stt_subjects = rx.merge(stt_init, stt_request)
+    stt_subjects = rx.merge(stt_init, stt_stream, stt_request)
 
     # Rejected utterances: surface why nothing happened (wrong speaker).
     vf_src.pipe(
@@ -340,20 +387,35 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
 
     config.subscribe(on_next=_init_domain)
 
-    # Forward IntentResult side effects to the domain dispatcher (backend POSTs)
+    # Forward intent side effects to the domain dispatcher (backend POSTs) on
+    # IntentParsed — emitted right after the JSON pass, so the car reacts while
+    # the spoken ack is still decoding. IntentResult (with the ack) follows.
     llm_src.pipe(
-        ops.filter(lambda i: type(i) is llama.IntentResult),
+        ops.filter(lambda i: type(i) is llama.IntentParsed),
     ).subscribe(on_next=lambda i: _flow[0].side_effects(i.intent_json))
 
     # ── intent mode: read config at startup ──────────────────────────────────
     # Mutable cells updated when config stream fires.
     _intent_mode = [False]
     _intent_domains = [None]   # None → all registered intent domains
+    _intent_encoding = ["canonical"]
+    _ack_mode = ["llm"]
+    _fast_intent = ["off", 0.5]   # mode, threshold
+    _spec_intent = [False]        # speculative intent on stable partials
 
     def _read_intent_cfg(cfg):
         sysc = getattr(cfg, 'system', None)
         _intent_mode[0] = bool(getattr(sysc, 'intent_mode', False)) if sysc else False
         _intent_domains[0] = getattr(sysc, 'intent_domains', None) if sysc else None
+        _intent_encoding[0] = (getattr(sysc, 'intent_encoding', 'canonical')
+                               if sysc else 'canonical')
+        _ack_mode[0] = getattr(sysc, 'ack_mode', 'llm') if sysc else 'llm'
+        _fast_intent[:] = ((getattr(sysc, 'fast_intent', 'off'),
+                            getattr(sysc, 'fast_intent_threshold', 0.5))
+                           if sysc else ('off', 0.5))
+        _spec_intent[0] = (_intent_mode[0] and
+                           bool(getattr(sysc, 'speculative_intent', False)) and
+                           bool(getattr(getattr(cfg, 'stt', None), 'stream', False)))
         if tui_state is not None:
             tui_state.intent_mode = _intent_mode[0]
             tui_state.soft_duck = bool(getattr(cfg.vad, 'soft_duck', True))
@@ -365,11 +427,15 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
     # LLM. Disabled (system.attention=false) → always AWAKE, today's behaviour.
     _attn = [Attention(enabled=False)]
     _sleep_intent = [False]
+    # sleep_intent decided inside the intent grammar pass (no ClassifySystem)
+    _fold_system = [False]
 
     def _read_system_cfg(cfg):
         sysc = getattr(cfg, 'system', None)
         enabled = bool(getattr(sysc, 'attention', False)) if sysc else False
         _sleep_intent[0] = bool(getattr(sysc, 'sleep_intent', False)) if sysc else False
+        _fold_system[0] = (_sleep_intent[0] and enabled and _intent_mode[0] and
+                           bool(getattr(sysc, 'fold_system_intents', False)))
         _attn[0] = Attention(
             enabled=enabled,
             name=getattr(sysc, 'name', 'Nina') if sysc else 'Nina',
@@ -392,14 +458,39 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
     # ── LLM ──────────────────────────────────────────────────────────────────
     def _make_llm_init(cfg):
         g = cfg.gpt
+        sysc = getattr(cfg, 'system', None)
+        recall_embed, recall_embed_gpu = None, False
+        if getattr(sysc, 'intent_recall', False):
+            # default: the manual RAG's embed model (one shared instance)
+            manual = ((getattr(cfg, 'domains', None) or {})
+                      .get(_flow[0].provider.name, {}).get('manual') or {})
+            recall_embed = (getattr(sysc, 'intent_recall_embed', None)
+                            or manual.get('embed'))
+            recall_embed_gpu = bool(manual.get('embed_gpu', False))
+            if not recall_embed:
+                _emit("[intent] intent_recall on but no embed model set", "warn")
         events = [llama.Initialize(
             model_path=g.model,
             n_ctx=getattr(g, 'n_ctx', 2048),
             n_batch=getattr(g, 'n_batch', 512),
             n_threads=getattr(g, 'n_threads', 6),
             n_gpu_layers=getattr(g, 'n_gpu_layers', 99),
+            prefix_cache=getattr(g, 'prefix_cache', None),
+            ctx_shift=getattr(g, 'ctx_shift', True),
+            ctx_threshold=getattr(g, 'ctx_threshold', 0.80),
+            prefix_slots=getattr(g, 'prefix_slots', 3),
+            prefix_budget=getattr(g, 'prefix_budget', 0.5),
+            fast_intent_model=getattr(sysc, 'fast_intent_model', None),
+            intent_cache=getattr(sysc, 'intent_cache', 256),
+            intent_cache_ttl=getattr(sysc, 'intent_cache_ttl', 3600.0),
+            recall_embed=recall_embed,
+            recall_threshold=getattr(sysc, 'intent_recall_threshold', 0.85),
+            recall_embed_gpu=recall_embed_gpu,
+            prompt_lookup=getattr(g, 'prompt_lookup', 0),
+            draft_model=getattr(g, 'draft_model', None),
+            draft_tokens=getattr(g, 'draft_tokens', 4),
+            draft_min_accept=getattr(g, 'draft_min_accept', 0.3),
         )]
-        sysc = getattr(cfg, 'system', None)
         if _intent_mode[0]:
             # Intent mode: the active domain provider assembles the system
             # prompt from its ENABLED sub-domains, so the model is taught
@@ -417,6 +508,21 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
                         prompt = prompt + "\n\n" + f.read().strip()
                 except OSError as e:
                     _emit(f"[intent] WARNING: cannot load prompt file: {e}", "warn")
+            schema = provider.build_schema(_intent_domains[0])
+            if _fold_system[0]:
+                # SLEEP / MUTE taught in the intent prompt: wake-prefixed
+                # commands decode them in the same pass (fsttm.grammar).
+                from fsttm.grammar import fold_system_intents, folded_prompt_section
+                prompt = (prompt + "\n\n" + folded_prompt_section(
+                    schema, getattr(sysc, 'name', 'Nina') if sysc else 'Nina'))
+                schema = fold_system_intents(schema)
+                _emit("[intent] sleep/mute folded into the intent grammar", "info")
+            if _intent_encoding[0] == 'compact':
+                # Short keys/enum codes on the wire: the few-shot JSON is
+                # rewritten to match the grammar IntentGenerate compiles.
+                from fsttm.wire import codec_for
+                prompt = codec_for(schema).encode_prompt(prompt)
+                _emit("[intent] compact wire encoding", "info")
             # Headroom guard: the pre-warmed prefix must leave room for the
             # tail eval + TWO generation passes (JSON + spoken ack). A prefix
             # crowding n_ctx degenerates into garbage JSON fields and
@@ -459,18 +565,48 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
     # `topic` field can still retrieve against the raw question.
     _last_user_text = [""]
 
-    def _dispatch_command(text, context):
-        """Send a user utterance to the LLM (intent or plain)."""
+    def _intent_request(text, context, **kw):
+        return llama.IntentGenerate(text=text, context=context,
+                                    domains=_intent_domains[0],
+                                    encoding=_intent_encoding[0],
+                                    ack_mode=_ack_mode[0],
+                                    fast_intent=_fast_intent[0],
+                                    fast_threshold=_fast_intent[1], **kw)
+
+    def _dispatch_command(text, context, system_intents=False):
+        """Send a user utterance to the LLM (intent or plain). system_intents:
+        the intent pass may also answer SLEEP / MUTE (SystemIntent)."""
         _last_user_text[0] = text or ""
-        ev = (llama.IntentGenerate(text=text, context=context,
-                                   domains=_intent_domains[0])
+        ev = (_intent_request(text, context, system_intents=system_intents)
               if _intent_mode[0] else
               llama.Generate(text=text, context=context))
         _llm_subject.on_next(ev)
 
+    # Speculative intent: once every word of the partial transcript is agreed
+    # (the user paused) start its intent pass while the VAD hangover runs. It
+    # is only sent when the final transcript would go straight to
+    # _dispatch_command — floor USER, awake, no wake word, no "continue" —
+    # and the driver commits it if that final text matches, else discards it.
+    _spec_sent = [""]
+
+    def _on_partial(i):
+        text = i.text
+        if (not _spec_intent[0] or not text or i.stable != text
+                or text == _spec_sent[0]):
+            return
+        if (not turn.is_user or _barge_tentative[0] or _is_resume(text)
+                or not _attn[0].awake
+                or (_attn[0].enabled and _attn[0].match_wake(text)[0])):
+            return
+        _spec_sent[0] = text
+        _llm_subject.on_next(_intent_request(text, i.context, speculative=True))
+
     # Double gate (STT time + dispatch time) + attention gate.
     def _on_transcript(i):
-        if type(i) is not whisper.TextResult or not i.text:
+        if type(i) is not whisper.TextResult:
+            return
+        _spec_sent[0] = ""
+        if not i.text:
             return
         # Parasite phrases ("thank you") are likely hallucinations on silence — but
         # a real word if the user actually said it. Keep one ONLY when it confirms a
@@ -523,7 +659,11 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
         # by name ("Hey Nina, voice off"). A bare command — even one STT garbled
         # into a sleep-like phrase ("stop climate" → "stop, glimar") — goes
         # straight to dispatch and can never disable voice control.
-        if _attn[0].enabled and _sleep_intent[0] and decision.get("wake_prefixed"):
+        if _fold_system[0] and decision.get("wake_prefixed"):
+            # One pass: the intent grammar also allows SLEEP / MUTE, which
+            # come back as SystemIntent instead of an IntentResult.
+            _dispatch_command(i.text, i.context, system_intents=True)
+        elif _attn[0].enabled and _sleep_intent[0] and decision.get("wake_prefixed"):
             # Real intent: classify {command|sleep|mute} first, act on result.
             _pending_cmd[0] = (i.text, i.context)
             _llm_subject.on_next(llama.ClassifySystem(text=i.text, context=i.context))
@@ -536,7 +676,7 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
     def _on_system_intent(item):
         pending = _pending_cmd[0]
         _pending_cmd[0] = None
-        utter = pending[0] if pending else ""
+        utter = pending[0] if pending else _last_user_text[0]   # folded: no pending
         if tui_state is not None:
             tui_state.add_system_intent(utter, item.action)
         if item.action in ("sleep", "mute"):
@@ -550,6 +690,8 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
             _dispatch_command(pending[0], pending[1])
 
     stt_src.subscribe(on_next=_on_transcript)
+    stt_src.pipe(ops.filter(lambda i: type(i) is whisper.PartialText)
+                 ).subscribe(on_next=_on_partial)
     llm_src.pipe(ops.filter(lambda i: type(i) is llama.SystemIntent)
                  ).subscribe(on_next=_on_system_intent)
 
@@ -559,6 +701,8 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
     def _on_llm_error(i):
         _log.error("LLM driver error (context=%s): %r", i.context, i.error)
         _emit(f"[llm] error: {i.error}", "warn")
+        if _ack_units[0]:
+            _close_ack_stream()   # release the floor a streamed ack grabbed
     llm_src.pipe(ops.filter(lambda i: type(i) is llama.LlamaError)
                  ).subscribe(on_next=_on_llm_error)
 
@@ -724,7 +868,65 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
         chat/display feeds so they never diverge."""
         return _flow[0].spoken(item.intent_json, item.tts_text)
 
+    # ── Streamed intent ack ───────────────────────────────────────────────────
+    # Pass-2 ack tokens arrive as Response(context=INTENT_ACK) while the LLM is
+    # still decoding. When the ack IS what will be spoken (IntentFlow.streams_ack,
+    # decided on IntentParsed), each completed clause is queued to piper as soon
+    # as it decodes and the IntentResult only adds the tail. An ack that never
+    # reaches a clause boundary before its IntentResult takes the normal path.
+    _ack_live     = [False]   # this intent's ack is narrated as it decodes
+    _ack_buf      = [""]      # decoded ack text not yet queued as a checkpoint
+    _ack_units    = [0]       # checkpoints queued from the stream so far
+    _ack_boundary = re.compile(r'(?<=[^0-9][.!?,;])\s+')
+
+    def _on_intent_parsed_narrator(item) -> None:
+        _ack_live[0] = _flow[0].streams_ack(item.intent_json)
+        _ack_buf[0] = ""; _ack_units[0] = 0
+
+    def _queue_ack_unit(text) -> None:
+        if _ack_units[0] == 0:
+            _ckpts.clear(); _ckpts_done.clear()
+            _ckpt_playing[0] = 0; _ckpt_interrupted[0] = -1
+        _ckpts.append(_flow[0].interpolate_response(text))
+        _ack_units[0] += 1
+        if _play_from(len(_ckpts) - 1) > 0 and not _narrating[0]:
+            _system_grab(None)
+            _begin_narration()
+
+    def _on_ack_token(item) -> None:
+        if not _ack_live[0]:
+            return
+        _ack_buf[0] += item.text
+        # Cut at the first clause boundary with >=20 chars before it (the
+        # same minimum _split_checkpoints merges short fragments up to).
+        while True:
+            m = next((m for m in _ack_boundary.finditer(_ack_buf[0])
+                      if len(_ack_buf[0][:m.start()].strip()) >= 20), None)
+            if m is None:
+                return
+            _queue_ack_unit(_ack_buf[0][:m.start()].strip())
+            _ack_buf[0] = _ack_buf[0][m.end():]
+
+    def _close_ack_stream() -> None:
+        """The ack finished decoding (IntentResult), failed (LlamaError) or
+        was cancelled (IntentCancelled): queue the tail, or — cut by a
+        barge-in or cancel — keep it for a resume."""
+        live, tail = _ack_live[0], _ack_buf[0].strip()
+        _ack_live[0] = False; _ack_buf[0] = ""
+        if tail and live:
+            _queue_ack_unit(tail)     # its PlaybackDone ends the narration
+        elif tail:
+            _ckpts.append(tail)
+        _ack_units[0] = 0
+        if (not (tail and live) and _narrating[0]
+                and _last_emitted[0] in _ckpts_done):
+            _end_narration()
+
     def _on_narrator_intent(item) -> None:
+        if _ack_units[0]:
+            _close_ack_stream()      # head already spoken from the stream
+            return
+        _ack_live[0] = False
         # Deferred narration (chitchat conversational reply, manual/RAG
         # grounded answer) streams separately via ManualGenerate→ResponseDone.
         # Only skip narration here if it actually dispatched; otherwise fall
@@ -766,7 +968,7 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
         # spoken. (A barge-in clears via _on_barge_in_narrator instead.) Using
         # _last_emitted (not len-1) handles trailing units that cleaned to empty.
         if (_narrating[0] and _ckpt_interrupted[0] < 0
-                and idx >= _last_emitted[0]):
+                and idx >= _last_emitted[0] and not _ack_live[0]):
             _end_narration()
 
     # Barge-in: flush queued + in-flight checkpoints (ClearQueue), unduck, decide
@@ -783,6 +985,7 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
         interrupted = _ckpt_playing[0]
         _tts_subject.on_next(tts.ClearQueue())
         _llm_subject.on_next(llama.StopGenerate())
+        _ack_live[0] = False      # stop queueing a streaming intent ack
         # Narration is cut: floor already flipped + unducked on the tentative
         # signal. The resume path will soft-duck again via _begin_narration.
         _narrating[0] = False
@@ -834,9 +1037,27 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
                              and (not _intent_mode[0] or i.context == 'manual')),
     ).subscribe(on_next=_on_narrator_response)
 
+    llm_src.pipe(ops.filter(lambda i: type(i) is llama.IntentParsed)
+    ).subscribe(on_next=_on_intent_parsed_narrator)
+
+    llm_src.pipe(ops.filter(lambda i: type(i) is llama.Response
+                            and i.context == llama.INTENT_ACK)
+    ).subscribe(on_next=_on_ack_token)
+
     llm_src.pipe(ops.filter(lambda i: type(i) is llama.IntentResult)
     ).subscribe(on_next=_on_narrator_intent)
 
+    # A cancelled intent never gets its IntentResult: close a streamed ack
+    # here so the floor it grabbed is released. The undecoded remainder is
+    # never spoken — the half-clause tail is only kept for a resume.
+    def _on_intent_cancelled(item) -> None:
+        _ack_live[0] = False
+        if _ack_units[0]:
+            _close_ack_stream()
+
+    llm_src.pipe(ops.filter(lambda i: type(i) is llama.IntentCancelled)
+    ).subscribe(on_next=_on_intent_cancelled)
+
     # ── TTS ───────────────────────────────────────────────────────────────────
     # Output device/sink are config-driven (tts.device / tts.sink), resolved by
     # name. The sink default depends on AEC: with module-echo-cancel active, TTS
@@ -985,6 +1206,9 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
         stt_src.pipe(
             ops.filter(lambda i: type(i) is whisper.TextResult and bool(i.text)),
         ).subscribe(on_next=lambda i: tui_state.add_user(i.text))
+        stt_src.pipe(
+            ops.filter(lambda i: type(i) is whisper.PartialText),
+        ).subscribe(on_next=lambda i: setattr(tui_state, 'partial', i.text))
 
         llm_src.pipe(
             ops.filter(lambda i: type(i) is llama.ResponseDone and bool(i.full_text)),
@@ -1008,7 +1232,8 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
         std_out = rx.empty()
     else:
         token_stream = llm_src.pipe(
-            ops.filter(lambda i: type(i) is llama.Response),
+            ops.filter(lambda i: type(i) is llama.Response
+                       and i.context != llama.INTENT_ACK),
             ops.map(lambda i: i.text),
         )
         intent_stream = llm_src.pipe(
@@ -1034,6 +1259,9 @@ def fsttm_server(aio_scheduler, sources, tui_state=None):
             ops.filter(lambda i: type(i) is whisper.TextResult and bool(i.text)),
         ).subscribe(on_next=lambda i: _log.info(
             "[user] %r  [FSM:%s]", i.text, turn.state))
+        stt_src.pipe(
+            ops.filter(lambda i: type(i) is whisper.PartialText),
+        ).subscribe(on_next=lambda i: _log.info("[partial] %r", i.text))
         llm_src.pipe(
             ops.filter(lambda i: type(i) is llama.IntentResult),
         ).subscribe(on_next=lambda i: _log.info(
@@ -0,0 +1,250 @@
+"""
+Speculative decoding for the manual (RAG) and chat paths: prompt lookup or a
+small draft model.
+
+A grounded manual answer mostly re-states the excerpts in its prompt ("press
+the trunk release button on the driver door…"), and a chat reply often
+repeats the user's own words. Prompt lookup drafts the next tokens by finding
+the latest earlier occurrence of the last n generated tokens in prompt +
+output and proposing what followed it there — no draft model, no extra
+memory. The main model then verifies [last token] + draft in ONE forward
+pass with per-token logits:
+
+  accept   the sampler draws position i from the model's own logits; while
+           that equals draft[i] the drafted token is kept for free
+  reject   the first disagreement is itself a valid sample (the model's
+           token at that position) — the KV of the rejected tail is removed
+           (kv_cache_seq_rm) and n_tokens rolled back to the accepted prefix
+  miss     no n-gram match → a one-token step, same as create_completion
+
+Each token is still drawn by the same sampler chain, from logits conditioned
+on exactly the accepted prefix, so the output distribution is unchanged; only
+the number of forward passes shrinks when drafts are accepted.
+
+llama-cpp-python has its own LlamaPromptLookupDecoding draft_model, but it
+forces logits_all on the whole Llama (an n_ctx × vocab score matrix, ~0.5 GB
+for Phi-3 at n_ctx 4096) and applies to every completion — the intent path
+included. Here only the verify batch requests per-token logits, read in
+place through the sampler (model.sample idx), so nothing else changes.
+
+A chat reply has little to copy from its prompt, so the drafter can instead
+be a small GGUF sharing the main model's vocabulary (DraftModel): it keeps
+its own KV of the same token stream and greedily proposes the next k tokens
+for the same single verify pass. When its drafts are mostly rejected the
+verify passes cost more than they save, so stream_completion stops drafting
+for the rest of the answer once acceptance falls below `min_accept`
+(stats["fallback"]) and the driver skips the draft model for the next few
+answers.
+
+stream_completion() yields text pieces like create_completion(stream=True),
+with the same stop-string semantics (a stop string is never emitted, text
+that could begin one is held back) and fills a stats dict for the TUI and
+the benchmark (contrib/hvac/scripts/bench_prompt_lookup.py).
+"""
+from __future__ import annotations  # PEP 563: lazy annotations for Python 3.8 (list[]/tuple[])
+import logging
+import time
+from typing import Iterator, Optional
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+DRAFT_TOKENS = 8        # max tokens proposed per verify pass
+MAX_NGRAM = 3           # longest suffix n-gram looked up (falls back to shorter)
+MIN_ACCEPT = 0.3        # below this acceptance drafting stops for the answer
+MIN_SAMPLE = 16         # ... judged only after this many drafted tokens
+BACKOFF = 4             # answers without the draft model after a fallback
+
+
+def lookup_draft(tokens, max_ngram: int = MAX_NGRAM,
+                 num_pred: int = DRAFT_TOKENS) -> list:
+    """Tokens that followed the latest earlier occurrence of the longest
+    matching suffix n-gram (max_ngram down to 1) of `tokens`, at most
+    num_pred of them. [] when nothing matches."""
+    ids = np.asarray(tokens, dtype=np.int64)
+    n_all = len(ids)
+    for n in range(min(max_ngram, n_all - 1), 0, -1):
+        windows = np.lib.stride_tricks.sliding_window_view(ids[:-1], n)
+        hits = np.nonzero((windows == ids[-n:]).all(axis=1))[0]
+        for start in hits[::-1]:            # latest occurrence first
+            draft = ids[start + n:start + n + num_pred]
+            if len(draft):
+                return draft.tolist()
+    return []
+
+
+class DraftModel:
+    """A small GGUF proposing greedy drafts for a main model with the same
+    vocabulary. Called from the llama worker only (not thread-safe)."""
+
+    def __init__(self, model_path: str, n_ctx: int = 2048, n_batch: int = 512,
+                 n_threads: Optional[int] = None, n_gpu_layers: int = 0):
+        from llama_cpp import Llama
+        kw = dict(model_path=model_path, n_ctx=n_ctx, n_batch=n_batch,
+                  n_gpu_layers=n_gpu_layers, verbose=False)
+        if n_threads:
+            kw["n_threads"] = n_threads
+        self.model_path = model_path
+        self.model = Llama(**kw)
+        self.model._sampler = self.model._init_sampler(temp=0.0)   # greedy
+
+    def compatible(self, target) -> bool:
+        """Same vocabulary: drafted token ids mean the same to `target`."""
+        probe = "Press the trunk release, then say: it's 21 degrees.".encode()
+        return (self.model.n_vocab() == target.n_vocab()
+                and self.model.tokenize(probe) == target.tokenize(probe))
+
+    def __call__(self, tokens, n: int) -> list:
+        """Greedy continuation of `tokens`, n tokens long. The KV prefix shared
+        with the previous call (the accepted part) is reused."""
+        m = self.model
+        if n <= 0 or len(tokens) + n >= m.n_ctx():
+            return []
+        tokens = list(tokens)
+        _rollback(m, min(_common_prefix(m, tokens), len(tokens) - 1))
+        m.eval(tokens[m.n_tokens:])
+        out = []
+        while True:
+            out.append(m.sample(idx=m.n_tokens - 1))
+            if len(out) >= n:
+                return out
+            m.eval(out[-1:])
+
+
+def supported(model) -> bool:
+    """The low-level pieces the verify loop drives directly."""
+    return all(hasattr(model, a) for a in
+               ("_batch", "_ctx", "_init_sampler", "input_ids", "sample"))
+
+
+def _decode(model, tokens: list) -> None:
+    """Append `tokens` to the working sequence in one batch, logits for every
+    position (set_batch logits_all) — the verify pass."""
+    n_past = model.n_tokens
+    model._ctx.kv_cache_seq_rm(-1, n_past, -1)
+    model._batch.set_batch(batch=tokens, n_past=n_past, logits_all=True)
+    model._ctx.decode(model._batch)
+    model.input_ids[n_past:n_past + len(tokens)] = tokens
+    model.n_tokens = n_past + len(tokens)
+    model._requires_eval = False
+
+
+def _common_prefix(model, tokens: list) -> int:
+    n = 0
+    for a, b in zip(model.input_ids[:model.n_tokens].tolist(), tokens):
+        if a != b:
+            break
+        n += 1
+    return n
+
+
+def _rollback(model, n: int) -> None:
+    if n < model.n_tokens:
+        model._ctx.kv_cache_seq_rm(-1, n, -1)
+        model.n_tokens = n
+        model._requires_eval = True
+
+
+def _held(text: str, stops: list) -> int:
+    """Length of the longest tail of `text` that could start a stop string."""
+    keep = 0
+    for s in stops:
+        for k in range(min(len(s) - 1, len(text)), keep, -1):
+            if text.endswith(s[:k]):
+                keep = k
+                break
+    return keep
+
+
+def stream_completion(model, prompt, *, max_tokens: int, stop=(),
+                      temperature: float = 0.8, top_k: int = 40,
+                      top_p: float = 0.95, min_p: float = 0.05,
+                      repeat_penalty: float = 1.0,
+                      draft_tokens: int = DRAFT_TOKENS,
+                      max_ngram: int = MAX_NGRAM, drafter=None,
+                      min_accept: float = 0.0, cancel=None,
+                      stats: Optional[dict] = None) -> Iterator[str]:
+    """Stream the completion of `prompt` (str or token list) as text pieces.
+
+    drafter(tokens, n) → up to n proposed next tokens; None = prompt lookup.
+    Reuses the KV prefix shared with the working sequence (like
+    create_completion), stops at EOS / a stop string / max_tokens, and
+    between verify passes when `cancel` (threading.Event) is set. `stats`,
+    if given, is filled with tokens / drafted / accepted / passes / s and
+    fallback (drafting stopped below min_accept)."""
+    import llama_cpp
+    t0 = time.monotonic()
+    if isinstance(prompt, str):
+        prompt = model.tokenize(prompt.encode("utf-8"), special=True)
+    prompt = list(prompt)
+    stops = [s for s in ([stop] if isinstance(stop, str) else stop or ()) if s]
+    st = stats if stats is not None else {}
+    st.update(tokens=0, drafted=0, accepted=0, passes=0, s=0.0,
+              fallback=False)
+    if drafter is None:
+        def drafter(tokens, n):
+            return lookup_draft(tokens, max_ngram, n)
+
+    # KV prefix reuse: keep what matches, always re-eval >= 1 token for logits
+    _rollback(model, min(_common_prefix(model, prompt), len(prompt) - 1))
+    model.eval(prompt[model.n_tokens:])
+
+    prev_sampler = model._sampler
+    model._sampler = model._init_sampler(
+        top_k=top_k, top_p=top_p, min_p=min_p, temp=temperature,
+        repeat_penalty=repeat_penalty)
+    vocab = model._model.vocab
+    limit = min(max_tokens, model.n_ctx() - len(prompt) - 1)
+    out: list = []
+    sent = 0
+    try:
+        tok = model.sample(temp=temperature, idx=model.n_tokens - 1)
+        while True:
+            # `tok` was sampled but is not in the KV yet
+            done = llama_cpp.llama_vocab_is_eog(vocab, tok)
+            if not done:
+                out.append(tok)
+                text = model.detokenize(out, prev_tokens=prompt).decode(
+                    "utf-8", errors="ignore")
+                cut = min((i for i in (text.find(s) for s in stops) if i >= 0),
+                          default=-1)
+                if cut >= 0:
+                    text, done = text[:cut], True
+                end = len(text) if done else len(text) - _held(text, stops)
+                if end > sent:
+                    yield text[sent:end]
+                    sent = end
+                done = done or len(out) >= limit
+            if done or (cancel is not None and cancel.is_set()):
+                break
+            if (not st["fallback"] and st["drafted"] >= MIN_SAMPLE
+                    and st["accepted"] < min_accept * st["drafted"]):
+                st["fallback"] = True       # drafts cost more than they save
+            n_draft = 0 if st["fallback"] else min(draft_tokens, limit - len(out))
+            draft = drafter(prompt + out, n_draft) if n_draft > 0 else []
+            batch = [tok] + draft
+            base = model.n_tokens
+            _decode(model, batch)
+            st["passes"] += 1
+            st["drafted"] += len(draft)
+            for j in range(len(batch)):
+                tok = model.sample(temp=temperature, idx=base + j)
+                if j == len(draft) or tok != draft[j]:
+                    break       # bonus / corrected token: next pass feeds it
+                st["accepted"] += 1
+                if (llama_cpp.llama_vocab_is_eog(vocab, tok)
+                        or len(out) + 1 >= limit):
+                    break       # handled at the top of the loop
+                out.append(tok)
+                text = model.detokenize(out, prev_tokens=prompt).decode(
+                    "utf-8", errors="ignore")
+                if any(s in text for s in stops):
+                    out.pop()   # re-append at the top, which cuts the text
+                    break
+            _rollback(model, base + 1 + j)   # keep [tok] + accepted draft
+    finally:
+        model._sampler = prev_sampler
+        model._requires_eval = True
+        st["tokens"] = len(out)
+        st["s"] = time.monotonic() - t0
@@ -0,0 +1,125 @@
+"""
+Streaming partial transcription: what stays fixed between re-transcribes.
+
+With stt.stream on, the whisper driver keeps the voiced frames of the current
+utterance as they arrive and re-transcribes the growing buffer every
+partial_ms (~500 ms), emitting PartialText while the user is still talking.
+Each pass only covers the audio after the COMMITTED words (plus OVERLAP_S of
+context), with the committed text as whisper's initial prompt:
+
+  hypothesis  the words a pass returns, with timestamps (whisper word
+              segments), shifted to utterance time
+  commit      LocalAgreement-2: the longest prefix two consecutive passes
+              agree on is committed, except words ending in the last
+              OVERLAP_S of the audio (a word still being spoken); committed
+              words are never re-transcribed
+  final       at utterance end only the tail after the last committed word is
+              transcribed — the end-of-speech latency covers that tail, not
+              the whole utterance
+
+A tail pass starts OVERLAP_S before the committed end, so its first words may
+repeat the last committed ones; up to MAX_DEDUP of those are dropped by
+matching normalized words.
+"""
+from __future__ import annotations  # PEP 563: lazy annotations for Python 3.8 (list[]/tuple[])
+import re
+from typing import Optional
+
+SAMPLE_RATE = 16000
+PARTIAL_MS = 500        # re-transcribe cadence while speech continues
+OVERLAP_S = 0.3         # audio re-transcribed before the committed end
+MAX_DEDUP = 3           # committed words a tail pass may repeat
+
+
+def _norm(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _join(words) -> str:
+    return " ".join(w for w, _, _ in words).strip()
+
+
+class StreamState:
+    """One utterance's audio and agreed transcript. Frames are appended on the
+    event loop; passes run serially on the STT executor."""
+
+    def __init__(self):
+        self.audio = bytearray()        # 16 kHz int16 mono
+        self.committed: list = []       # [(word, t0, t1)] in utterance seconds
+        self.pending: list = []         # last pass's words beyond committed
+        self.closed = False             # utterance ended (no more frames)
+        self.final = False              # final pass taken: no more partials
+        self.scheduled_s = 0.0          # audio length at the last scheduled pass
+        self.busy = False               # a partial pass is queued / running
+        self.speech = False             # passed the speech gate (partials may run)
+        self.passes = 0
+
+    @property
+    def duration_s(self) -> float:
+        return len(self.audio) / 2 / SAMPLE_RATE
+
+    def append(self, pcm: bytes) -> None:
+        self.audio += pcm
+
+    def due(self, partial_ms: int = PARTIAL_MS) -> bool:
+        """Enough new audio since the last pass to schedule another one."""
+        return (not self.busy and not self.closed
+                and self.duration_s - self.scheduled_s >= partial_ms / 1000)
+
+    @property
+    def stable(self) -> str:
+        return _join(self.committed)
+
+    @property
+    def text(self) -> str:
+        return _join(self.committed + self.pending)
+
+    def tail_start(self) -> float:
+        """Utterance time the next pass starts at (committed end - overlap)."""
+        if not self.committed:
+            return 0.0
+        return max(0.0, self.committed[-1][2] - OVERLAP_S)
+
+    def tail(self, audio: Optional[bytes] = None) -> tuple:
+        """(offset_s, pcm) of `audio` (default: the buffer) from tail_start."""
+        audio = bytes(self.audio) if audio is None else audio
+        off = self.tail_start()
+        return off, audio[int(off * SAMPLE_RATE) * 2:]
+
+    def covers(self, audio: bytes) -> bool:
+        """`audio` (the final utterance) starts with the committed audio, so
+        a tail pass over it is consistent with what was committed."""
+        n = int(self.tail_start() * SAMPLE_RATE) * 2
+        return len(audio) >= n and audio[:n] == bytes(self.audio[:n])
+
+    def _new_words(self, words: list, offset: float) -> list:
+        hyp = [(w.strip(), t0 + offset, t1 + offset)
+               for w, t0, t1 in words if _norm(w)]
+        done = [_norm(w) for w, _, _ in self.committed[-MAX_DEDUP:]]
+        for k in range(min(len(done), len(hyp)), 0, -1):
+            if [_norm(w) for w, _, _ in hyp[:k]] == done[-k:]:
+                return hyp[k:]
+        return hyp
+
+    def update(self, words: list, offset: float, end_s: float) -> bool:
+        """Fold in a partial pass over the audio up to `end_s`: words
+        [(text, t0, t1)] relative to `offset`. Commits what this pass and the
+        previous one agree on. Returns whether the partial text or its
+        committed prefix changed."""
+        before = self.text
+        hyp = self._new_words(words, offset)
+        n = 0
+        while (n < min(len(hyp), len(self.pending))
+               and _norm(hyp[n][0]) == _norm(self.pending[n][0])
+               and hyp[n][2] <= end_s - OVERLAP_S):
+            n += 1
+        self.committed += hyp[:n]
+        self.pending = hyp[n:]
+        self.passes += 1
+        return self.text != before or n > 0
+
+    def finish(self, words: list, offset: float) -> str:
+        """Final transcript: the committed words + the tail pass's words."""
+        self.final = True
+        self.pending = self._new_words(words, offset)
+        return self.text
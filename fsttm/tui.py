@@ -43,9 +43,42 @@ except Exception:                       # pragma: no cover - depends on host
 # whisper.py updates this in its transcribe thread; the right panel reads it.
 # A plain dict avoids importing Rich into the STT driver.
 STT_PERF = {"ms": 0.0, "audio_s": 0.0, "rtf": 0.0, "n": 0}
+# Streaming STT (stt.stream): partial passes while the user speaks and the
+# last one's time. The STT row above then times just the final tail pass.
+STT_PARTIAL = {"ms": 0.0, "n": 0}
+# Pre-STT speech gate (fsttm.speech_gate): utterances passed on to whisper and
+# dropped per reason.
+SPEECH_GATE = {"passed": 0, "quiet": 0, "noise": 0, "sparse": 0}
+# STT model tiering (stt.fast_model): per tier the model name and the totals
+# behind its RTF; utterances per routing reason and the last decision.
+STT_MODELS = {}
+STT_ROUTE = {"short": 0, "queue": 0, "long": 0, "escalated": 0, "last": ""}
 # Intent two-pass timing — JSON (grammar-constrained) vs text (spoken ack) gen.
 # Surfaced in the State·Perf panel so a latency regression is visible at a glance.
 INTENT_PERF = {"json_ms": 0.0, "text_ms": 0.0, "n": 0}
+# LLM request scheduler (fsttm.scheduler): requests dropped (superseded /
+# expired / cancelled), preemptions, and how long the last request queued.
+LLM_QUEUE = {"mean_wait_ms": 0.0, "max_wait_ms": 0.0, "dropped": 0,
+             "preempted": 0, "n": 0}
+# Non-LLM intent fast path (fsttm.fastintent): utterances answered without the
+# LLM, fallbacks to it, and in shadow mode how often it agreed with the LLM.
+FAST_INTENT = {"hit": 0, "fallback": 0, "agree": 0, "disagree": 0, "ms": 0.0}
+# Exact-repeat intent cache (fsttm.intent_cache): hits / lookups / entries.
+INTENT_CACHE = {"hits": 0, "misses": 0, "size": 0}
+# Semantic intent memory (fsttm.intent_memory): recalls / misses, entries
+# (of which prompt seeds) and the last recall's embed + search time.
+INTENT_RECALL = {"hits": 0, "misses": 0, "size": 0, "seeds": 0, "ms": 0.0}
+# Speculative decoding (fsttm.speculative) of manual + chat answers, per
+# drafter ("lookup" = prompt lookup, "draft" = draft model): totals over all
+# answers, the last answer's tokens/s and answers that fell back.
+SPECULATIVE = {kind: {"tokens": 0, "drafted": 0, "accepted": 0, "passes": 0,
+                      "tok_s": 0.0, "fallback": 0, "n": 0}
+               for kind in ("lookup", "draft")}
+# Speculative intents on stable partial transcripts: started, committed by a
+# matching final (done already / adopted while running), discarded, and how
+# far ahead of the final transcript the last committed one was queued.
+SPEC_INTENT = {"started": 0, "committed": 0, "adopted": 0, "discarded": 0,
+               "lead_ms": 0.0}
 
 # True while a Live TUI owns the screen — other modules check this to suppress
 # stray prints that would corrupt the alt-screen render.
@@ -71,6 +104,77 @@ def record_intent_perf(json_ms, text_ms):
     INTENT_PERF["n"] += 1
 
 
+def record_llm_queue(stats):
+    """Mirror RequestScheduler.stats(): queue wait over the user-facing
+    classes (the idle re-prime excluded) and the total drop count."""
+    live = [w for k, w in (stats.get("wait_ms") or {}).items() if k != "idle"]
+    n = sum(w["n"] for w in live)
+    LLM_QUEUE["mean_wait_ms"] = sum(w["mean"] * w["n"] for w in live) / max(n, 1)
+    LLM_QUEUE["max_wait_ms"] = max((w["max"] for w in live), default=0.0)
+    LLM_QUEUE["dropped"] = sum(stats.get("dropped", {}).values())
+    LLM_QUEUE["preempted"] = stats.get("preempted", 0)
+    LLM_QUEUE["n"] += 1
+
+
+def record_intent_cache(stats):
+    """Mirror IntentCache.stats()."""
+    INTENT_CACHE.update(stats)
+
+
+def record_stt_partial(ms):
+    STT_PARTIAL["ms"] = ms
+    STT_PARTIAL["n"] += 1
+
+
+def record_stt_model(tier, name, ms, audio_s, reason=None):
+    """One transcribe by the tier's model; reason = the routing decision
+    ("short" | "queue" | "long" | "escalated")."""
+    m = STT_MODELS.setdefault(tier, {"name": name, "ms": 0.0, "audio_s": 0.0,
+                                     "n": 0})
+    m["name"] = name
+    m["ms"] += ms
+    m["audio_s"] += audio_s
+    m["n"] += 1
+    if reason:
+        STT_ROUTE[reason] += 1
+        STT_ROUTE["last"] = f"{reason} → {name}"
+
+
+def record_speech_gate(stats):
+    """Mirror SpeechGate.stats()."""
+    SPEECH_GATE.update(stats)
+
+
+def record_intent_recall(stats, ms=None):
+    """Mirror IntentMemory.stats() (+ the last recall time)."""
+    INTENT_RECALL.update(stats)
+    if ms is not None:
+        INTENT_RECALL["ms"] = ms
+
+
+def record_speculative(kind, stats):
+    """Add one speculative answer's stream_completion stats."""
+    sp = SPECULATIVE[kind]
+    for k in ("tokens", "drafted", "accepted", "passes", "fallback"):
+        sp[k] += stats[k]
+    sp["tok_s"] = stats["tokens"] / stats["s"] if stats["s"] else 0.0
+    sp["n"] += 1
+
+
+def record_spec_intent(outcome, lead_ms=None):
+    """outcome "started" | "committed" | "adopted" | "discarded"."""
+    SPEC_INTENT[outcome] += 1
+    if lead_ms is not None:
+        SPEC_INTENT["lead_ms"] = lead_ms
+
+
+def record_fast_intent(outcome, ms=0.0):
+    """One fast-path classification: outcome "hit" | "fallback" | "agree" |
+    "disagree" (the last two in shadow mode)."""
+    FAST_INTENT[outcome] += 1
+    FAST_INTENT["ms"] = ms
+
+
 # ── state ─────────────────────────────────────────────────────────────────────
 
 _MAX_CHAT = 500
@@ -84,6 +188,7 @@ class TUIState:
     def __init__(self):
         self.started = time.monotonic()
         self.chat = deque(maxlen=_MAX_CHAT)        # list[(role, text, ts)]
+        self.partial = ""       # streaming STT: the utterance being spoken
         self.intents = deque(maxlen=_MAX_INTENT)   # list[(json, voice, ts)]
         self.notes = deque(maxlen=_MAX_NOTES)      # list[(level, text, ts)] right-panel log
 
@@ -108,6 +213,7 @@ class TUIState:
 
     # --- mutators (called from reactive subscriptions / server prints) --------
     def add_user(self, text):
+        self.partial = ""
         self.chat.append(("user", text, time.monotonic()))
         self.turns += 1
 
@@ -179,10 +285,12 @@ def _chat_panel(state, height=0, width=0):
         tag = "[user] " if role == "user" else "[assistant] "
         entries.append((tag, _ROLE_STYLE.get(role, ""), text))
     body = Text()
+    if state.partial:
+        entries.append(("[user…] ", "dim green", state.partial))
     for tag, style, text in _tail_by_rows(entries, height, width):
         body.append(tag, style=style)
-        body.append(text + "\n")
-    if not state.chat:
+        body.append(text + "\n", style="dim" if tag == "[user…] " else "")
+    if not state.chat and not state.partial:
         body = Text("…waiting for speech…", style="dim italic")
     return Panel(body, title="Chat", title_align="left", border_style="cyan")
 
@@ -333,6 +441,28 @@ def _state_panel(state):
     rtf_style = "green" if p["rtf"] and p["rtf"] < 1 else "yellow"
     t.add_row("RTF", Text(f"{p['rtf']:.2f}", style=rtf_style))
     t.add_row("utterances", str(p["n"]))
+    if STT_PARTIAL["n"]:
+        t.add_row("STT partial", Text(
+            f"{STT_PARTIAL['ms']:.0f}ms × {STT_PARTIAL['n']}", style="dim"))
+    for tier in ("fast", "main"):
+        m = STT_MODELS.get(tier)
+        if m and m["n"]:
+            rtf = m["ms"] / 1000 / max(m["audio_s"], 0.01)
+            t.add_row(f"STT {tier}", Text(
+                f"{m['name']} RTF {rtf:.2f} × {m['n']}", style="dim"))
+    sr = STT_ROUTE
+    if sr["last"]:
+        t.add_row("STT route", Text(
+            f"short {sr['short']} queue {sr['queue']} long {sr['long']} "
+            f"esc {sr['escalated']} ({sr['last']})",
+            style="yellow" if sr["escalated"] else "dim"))
+    sg = SPEECH_GATE
+    dropped = sg["quiet"] + sg["noise"] + sg["sparse"]
+    if sg["passed"] or dropped:
+        t.add_row("speech gate", Text(
+            f"drop {dropped}/{sg['passed'] + dropped} (quiet {sg['quiet']} "
+            f"noise {sg['noise']} sparse {sg['sparse']})",
+            style="green" if dropped else "dim"))
 
     # Intent two-pass latency (regression watch): JSON gen vs text gen.
     ip = INTENT_PERF
@@ -343,6 +473,59 @@ def _state_panel(state):
             f"JSON {ip['json_ms']:.0f} + txt {ip['text_ms']:.0f} = {tot:.0f}ms",
             style=intent_style))
 
+    lq = LLM_QUEUE
+    if lq["n"]:
+        q_style = "yellow" if lq["dropped"] else "dim"
+        t.add_row("llm queue", Text(
+            f"wait {lq['mean_wait_ms']:.0f}ms (max {lq['max_wait_ms']:.0f}) "
+            f"drop {lq['dropped']} preempt {lq['preempted']}", style=q_style))
+
+    ic = INTENT_CACHE
+    if ic["hits"] or ic["misses"]:
+        n = ic["hits"] + ic["misses"]
+        t.add_row("intent cache", Text(
+            f"hit {ic['hits']}/{n} ({100 * ic['hits'] / n:.0f}%) "
+            f"{ic['size']} cached", style="green" if ic["hits"] else "dim"))
+
+    ir = INTENT_RECALL
+    if ir["size"]:
+        n = ir["hits"] + ir["misses"]
+        t.add_row("intent recall", Text(
+            f"hit {ir['hits']}/{n} ({ir['ms']:.0f}ms) "
+            f"{ir['size']} known ({ir['size'] - ir['seeds']} learned)",
+            style="green" if ir["hits"] else "dim"))
+
+    si = SPEC_INTENT
+    if si["started"]:
+        won = si["committed"] + si["adopted"]
+        t.add_row("spec intent", Text(
+            f"commit {won}/{si['started']} ({si['adopted']} adopted) "
+            f"discard {si['discarded']} lead {si['lead_ms']:.0f}ms",
+            style="green" if won else "dim"))
+
+    for kind, label in (("lookup", "prompt lookup"), ("draft", "draft model")):
+        sp = SPECULATIVE[kind]
+        if not sp["passes"]:
+            continue
+        acc = 100 * sp["accepted"] / sp["drafted"] if sp["drafted"] else 0.0
+        fb = f" fallback {sp['fallback']}/{sp['n']}" if sp["fallback"] else ""
+        t.add_row(label, Text(
+            f"accept {acc:.0f}% {sp['tokens'] / sp['passes']:.1f} tok/pass "
+            f"{sp['tok_s']:.0f} tok/s{fb}",
+            style="yellow" if fb else ("green" if sp["accepted"] else "dim")))
+
+    fi = FAST_INTENT
+    if fi["agree"] or fi["disagree"]:       # shadow: would-be answers vs LLM
+        n = fi["agree"] + fi["disagree"]
+        t.add_row("fast shadow", Text(
+            f"agree {fi['agree']}/{n} ({100 * fi['agree'] / n:.0f}%) "
+            f"llm-only {fi['fallback']}",
+            style="green" if not fi["disagree"] else "yellow"))
+    elif fi["hit"] or fi["fallback"]:
+        t.add_row("fast intent", Text(
+            f"hit {fi['hit']} / llm {fi['fallback']} ({fi['ms']:.1f}ms)",
+            style="green" if fi["hit"] else "dim"))
+
     # recent notes / events
     notes = Text()
     for level, text, ts in state.notes:
@@ -8,16 +8,34 @@ whole KV cache through Python and costs ~5s/call on the Jetson Xavier).
   3. eval("\\nSpoken response:")         → appended after the JSON in context
   4. generate([], grammar=None)          → TTS text tokens
 
-Returns (intent_dict, tts_text, t_json_ms, t_tts_ms).
+Returns (intent_dict, tts_text, t_json_ms, t_tts_ms). `on_intent` is called
+with the parsed intent between steps 2 and 3, so callers can act on it while
+the ack is still being generated. With an `ack` callback
+(system.ack_mode) that returns a deterministic ack for the parsed intent,
+steps 3-4 are skipped entirely.
+
+Cancellation: with a `cancel` event (the driver's _stop_event) every step is
+abortable — the prefix prime between n_batch chunks, pass 1 and pass 2 between
+tokens, the cue eval before it starts. An abort raises Cancelled with the
+working seq rolled back to exactly the intent prefix, so the next command
+only evals its user tail.
 """
 from __future__ import annotations  # PEP 563: lazy annotations for Python 3.8 (list[]/tuple[]/set[])
 import json
+import threading
 import time
 import logging
-from typing import Optional
+from typing import Callable, Optional
+
+from fsttm import kv_slots
 
 log = logging.getLogger(__name__)
 
+
+class Cancelled(Exception):
+    """The cancel event was set mid-generation; the KV holds the bare prefix."""
+
+
 # ── helpers ──────────────────────────────────────────────────────────────────
 
 def _safe_json(text: str) -> Optional[dict]:
@@ -32,6 +50,11 @@ def _safe_json(text: str) -> Optional[dict]:
         return None
 
 
+def _check(cancel) -> None:
+    if cancel is not None and cancel.is_set():
+        raise Cancelled()
+
+
 def _decode(model, token_ids: list[int]) -> str:
     return model.detokenize(token_ids).decode("utf-8", errors="replace")
 
@@ -68,37 +91,70 @@ def _phi3_base_prompt(sys: str, user_text: str) -> str:
 # keep it in the KV cache, and per turn drop only the tokens after it and eval the
 # short user tail (~37 tok, ~150ms). 33x faster, byte-identical output (verified).
 #
-# Requires the low-level KV ops (llama-cpp >=0.2.x): _ctx.kv_cache_seq_rm + a
-# settable .n_tokens. _prime_prefix() returns the cached n_prefix or None when the
-# ops are unavailable, in which case approach_a falls back to a full eval.
-_PREFIX = {"key": None, "n": 0, "ok": True}
+# The prefix lives in a resident slot of the model's KV slots (fsttm.kv_slots),
+# one per assembled prompt (kv_slots.prefix_slot): on a multi-sequence context
+# it survives chat/RAG/classify turns — and switches to another domain set or
+# prompt variant — in its own parked sequence; on a single-sequence context (or
+# older bindings) it only survives while nothing else has overwritten the KV.
+# _prime_prefix() returns the cached n_prefix or None when the KV ops are
+# unavailable, in which case approach_a falls back to a full eval. The prime is
+# evaluated in n_batch chunks so a cancel lands within one chunk (~1s on the
+# Jetson) instead of after the whole ~5s prefix. A cancelled prime is PAUSED,
+# not lost: the evaluated part is parked in the PRIME_SLOT scratch slot and the
+# next _prime_prefix (the idle re-prime resuming, or the intent that preempted
+# it) continues from there.
 
 
 def _kv_supported(model) -> bool:
-    return (hasattr(getattr(model, "_ctx", None), "kv_cache_seq_rm")
-            and hasattr(model, "n_tokens"))
+    return kv_slots._kv_supported(model)
 
 
-def _prime_prefix(model, system_prompt):
-    """Ensure the system prefix is evaluated and cached in the KV. Returns
-    n_prefix (token count to keep) or None if reuse isn't possible."""
-    if not _PREFIX["ok"] or not _kv_supported(model):
-        _PREFIX["ok"] = False
+def _prime_prefix(model, system_prompt, cancel=None):
+    """Ensure the system prefix is evaluated and parked in its prefix slot.
+    Returns n_prefix (token count to keep) or None if reuse isn't possible.
+    Does not touch the working sequence when the slot is already resident.
+    Raises Cancelled if `cancel` is set between chunks, with the part
+    evaluated so far parked in PRIME_SLOT for the next call to resume."""
+    slots = kv_slots.slots_for(model)
+    if slots is None:
         return None
-    key = (id(model), system_prompt)
-    if _PREFIX["key"] == key and model.n_tokens >= _PREFIX["n"]:
-        return _PREFIX["n"]
-    # (Re)prime: eval just the prefix into a fresh context.
+    name = kv_slots.prefix_slot(system_prompt)
+    n = slots.lookup(name, system_prompt)
+    if n is not None:
+        return n
+    # (Re)prime: load the state saved by an earlier boot when persistence is
+    # on, else eval just the prefix into a fresh working seq and park it.
     try:
         ptoks = model.tokenize(_phi3_sys_prefix(system_prompt).encode(),
                                add_bos=True, special=True)
-        model.reset()
-        model.eval(ptoks)
-        _PREFIX["key"] = key
-        _PREFIX["n"] = len(ptoks)
-        return _PREFIX["n"]
+        path = slots.state_path(system_prompt)
+        slots.drop(name)
+        slots.admit_prefix(name, len(ptoks))
+        if path and slots.load(name, path, key=system_prompt, expect=ptoks):
+            log.info("intent prefix loaded from %s (%d tok)", path, len(ptoks))
+            return len(ptoks)
+        done = slots.restore(kv_slots.PRIME_SLOT, system_prompt) or 0
+        slots.drop(kv_slots.PRIME_SLOT)      # moved, or a stale prompt's
+        slots.reserve(len(ptoks), keep=name)
+        if done:
+            log.info("intent prefix prime resumed at %d/%d tok", done, len(ptoks))
+        else:
+            model.reset()
+        step = getattr(model, "n_batch", 0) or len(ptoks)
+        for i in range(done, len(ptoks), step):
+            if cancel is not None and cancel.is_set():
+                slots.park(kv_slots.PRIME_SLOT, key=system_prompt)
+                log.info("intent prefix prime paused at %d/%d tok", i, len(ptoks))
+                raise Cancelled()
+            model.eval(ptoks[i:i + step])
+        slots.park(name, key=system_prompt, n=len(ptoks))
+        if path:
+            slots.save(name, path)
+        return len(ptoks)
+    except Cancelled:
+        raise
     except Exception:
-        _PREFIX["ok"] = False
+        log.exception("prefix prime failed")
         return None
 
 
@@ -121,10 +177,55 @@ def _phi3_stop_ids(model) -> set[int]:
     return stops
 
 
+# ── pass 1 with grammar fast-forward ─────────────────────────────────────────
+# Runs of JSON text the schema forces (`{"intent":"`, the tail of a unique enum
+# prefix, `","area":` …) are appended to the sampled token and evaluated in ONE
+# batch instead of one decode step per token; the grammar sampler is told about
+# them with accept(). Needs the llama-cpp >=0.3 sampler API; otherwise (or with
+# no schema) pass 1 is the plain token-by-token generate() loop.
+
+def _json_pass(model, grammar, schema, json_temp: float, top_k: int,
+               stop: set, limit: int = 80,
+               cancel=None) -> tuple[list[int], int]:
+    """Generate the intent JSON token ids. Returns (ids, n_forced)."""
+    if schema is None or not hasattr(model, "_init_sampler"):
+        json_ids = []
+        for tok_id in model.generate([], reset=False, grammar=grammar,
+                                     temp=json_temp, top_k=top_k):
+            _check(cancel)
+            json_ids.append(tok_id)
+            if tok_id in stop or len(json_ids) >= limit:
+                break
+        return json_ids, 0
+
+    from fsttm.fastforward import forced_tokens
+    sampler = model._init_sampler(temp=json_temp, top_k=top_k, grammar=grammar)
+    json_ids, n_forced = [], 0
+    while len(json_ids) < limit:
+        _check(cancel)
+        tok_id = sampler.sample(model._ctx, -1)      # applies + accepts grammar
+        json_ids.append(tok_id)
+        if tok_id in stop:
+            break
+        run = forced_tokens(model, schema, json_ids)[:limit - len(json_ids)]
+        for t in run:
+            sampler.accept(t)
+        json_ids += run
+        n_forced += len(run)
+        model.eval([tok_id] + run)
+    return json_ids, n_forced
+
+
 # ── approach_a: eval once, continue KV cache across both passes ──────────────
 
 def approach_a(model, system_prompt: str, user_text: str,
-               grammar, json_temp: float = 0.0) -> tuple[Optional[dict], str, float, float]:
+               grammar, json_temp: float = 0.0,
+               schema: Optional[dict] = None,
+               ack: Optional[Callable[[dict], Optional[str]]] = None,
+               on_intent: Optional[Callable[[Optional[dict]], None]] = None,
+               on_token: Optional[Callable[[str], None]] = None,
+               cancel: Optional[threading.Event] = None,
+               ) -> tuple[Optional[dict], str, float, float]:
     """
     Two-pass intent generation with KV PREFIX REUSE.
     - The constant system prefix is evaluated ONCE and kept in the KV cache; each
@@ -135,78 +236,119 @@ def approach_a(model, system_prompt: str, user_text: str,
     json_temp: pass-1 (intent JSON) sampling temperature. Default 0.0 = greedy
     (top_k=1), which production uses. The optimisation tool (scripts/opt_intent.py)
     sweeps this; >0 opens top_k so the temperature actually has an effect.
+
+    schema: the JSON schema `grammar` was compiled from. When given, pass 1
+    fast-forwards the grammar-forced runs (fsttm.fastforward) in batched evals.
+
+    ack: f(intent) → spoken ack or None. A non-None ack replaces pass 2 (no cue
+    eval, no sampling; t_tts is 0).
+
+    on_intent: f(intent) called as soon as pass 1 is parsed (None on a parse
+    failure), before pass 2 — the driver's early IntentParsed event.
+
+    on_token: f(text) called with each new piece of the pass-2 ack as it
+    decodes (first line only, never a partial UTF-8 sequence), so the
+    narrator can start synthesis before the ack is complete.
+
+    cancel: event checked between prime chunks and between tokens of both
+    passes. When set, raises Cancelled with the working seq rolled back to
+    the bare prefix (on_intent may already have fired).
     """
     eos      = _eos_tokens(model)
     stop_ids = _phi3_stop_ids(model)
 
     _t_eval = time.monotonic()
-    # Was the prefix already warm in the KV BEFORE this call? If not, _prime_prefix
+    # Was the prefix already resident BEFORE this call? If not, _prime_prefix
     # re-evaluates it now (the slow ~11s path) — meaning the startup pre-warm got
-    # wiped by some other model op (chitchat/RAG create_completion resets the KV).
-    _warm_before = (_PREFIX["key"] == (id(model), system_prompt)
-                    and getattr(model, "n_tokens", 0) >= _PREFIX["n"] > 0)
+    # evicted from its slot (or, on a single-seq context, overwritten by chat/RAG).
+    slots = kv_slots.slots_for(model)
+    prefix = kv_slots.prefix_slot(system_prompt)
+    _warm_before = (slots is not None and
+                    slots.lookup(prefix, system_prompt) is not None)
     _t_prime = time.monotonic()
-    n_prefix = _prime_prefix(model, system_prompt)
-    t_prime = (time.monotonic() - _t_prime) * 1000
+    n_prefix = _prime_prefix(model, system_prompt, cancel)
     if n_prefix is not None:
-        # Reuse the cached prefix: drop everything after it, rewind position, and
-        # eval ONLY the per-turn user tail.
-        model._ctx.kv_cache_seq_rm(0, n_prefix, -1)
-        model.n_tokens = n_prefix
-        tail = model.tokenize(_phi3_user_tail(user_text).encode(),
-                              add_bos=False, special=True)
-        model.eval(tail)
-        _reused = True
-    else:
-        # Fallback (KV ops unavailable): full eval every turn.
-        base_tokens = model.tokenize(
-            _phi3_base_prompt(system_prompt, user_text).encode(),
-            add_bos=True, special=True)
-        model.reset()
-        model.eval(base_tokens)
-        _reused = False
-    t_eval = (time.monotonic() - _t_eval) * 1000
-
-    # Pass 1: grammar-constrained JSON. temp=0 → greedy (top_k=1); a non-zero
-    # sweep temperature opens top_k so sampling is actually exercised.
-    _jtop_k = 1 if json_temp <= 0.0 else 40
-    t0 = time.monotonic()
-    json_ids = []
-    for tok_id in model.generate([], reset=False, grammar=grammar, temp=json_temp, top_k=_jtop_k):
-        json_ids.append(tok_id)
-        if tok_id in eos or tok_id in stop_ids or len(json_ids) >= 80:
-            break
-    t_json = (time.monotonic() - t0) * 1000
-    # warm=True → prefix was hot, eval is the cheap tail-only path. warm=False →
-    # prime had to re-eval the whole prefix (t_prime is that cost); the startup
-    # pre-warm was wiped by an intervening model op.
-    log.info("approach_a timing: eval=%.0fms (warm=%s prime=%.0fms tail=%.0fms) "
-             "json_gen=%.0fms (%d tok) → %.1fms/tok",
-             t_eval, _warm_before, t_prime, t_eval - t_prime, t_json,
-             len(json_ids), t_json / max(len(json_ids), 1))
-    json_text = _decode(model, json_ids).strip().rstrip("<|end|>").strip()
-    intent = _safe_json(json_text)
-
-    # Pass 2: TTS continuation — DON'T roll back the KV cache (load_state is the
-    # slow path). The JSON we just generated stays in context; append the cue and
-    # keep generating. The model sees "…<json>\nSpoken response:" which is fine
-    # for producing the spoken ack.
-    cue_tokens = model.tokenize(
-        f"\nSpoken response:".encode(), add_bos=False, special=True
-    )
-    model.eval(cue_tokens)
-
-    t0 = time.monotonic()
-    tts_ids = []
-    for tok_id in model.generate([], reset=False, grammar=None, temp=0.4, top_k=40):
-        tts_ids.append(tok_id)
-        text_so_far = _decode(model, tts_ids)
-        if tok_id in eos or tok_id in stop_ids or "\n" in text_so_far or len(tts_ids) >= 30:
-            break
-    t_tts = (time.monotonic() - t0) * 1000
-    tts_text = _decode(model, tts_ids).strip().split("\n")[0].rstrip("<|end|>").strip()
-
-    return intent, tts_text, t_json, t_tts
+        n_prefix = slots.restore(prefix, system_prompt)
+    t_prime = (time.monotonic() - _t_prime) * 1000
+    try:
+        _check(cancel)
+        if n_prefix is not None:
+            # Reuse the cached prefix: the working seq is rewound to exactly the
+            # prefix; eval ONLY the per-turn user tail.
+            tail = model.tokenize(_phi3_user_tail(user_text).encode(),
+                                  add_bos=False, special=True)
+            model.eval(tail)
+            _reused = True
+        else:
+            # Fallback (KV ops unavailable): full eval every turn.
+            base_tokens = model.tokenize(
+                _phi3_base_prompt(system_prompt, user_text).encode(),
+                add_bos=True, special=True)
+            model.reset()
+            model.eval(base_tokens)
+            _reused = False
+        t_eval = (time.monotonic() - _t_eval) * 1000
+
+        # Pass 1: grammar-constrained JSON. temp=0 → greedy (top_k=1); a non-zero
+        # sweep temperature opens top_k so sampling is actually exercised.
+        _jtop_k = 1 if json_temp <= 0.0 else 40
+        t0 = time.monotonic()
+        json_ids, n_forced = _json_pass(model, grammar, schema, json_temp, _jtop_k,
+                                        eos | stop_ids, cancel=cancel)
+        t_json = (time.monotonic() - t0) * 1000
+        # warm=True → prefix was hot, eval is the cheap tail-only path. warm=False →
+        # prime had to re-eval the whole prefix (t_prime is that cost); the startup
+        # pre-warm was wiped by an intervening model op.
+        log.info("approach_a timing: eval=%.0fms (warm=%s prime=%.0fms tail=%.0fms) "
+                 "json_gen=%.0fms (%d tok, %d forced) → %.1fms/step",
+                 t_eval, _warm_before, t_prime, t_eval - t_prime, t_json,
+                 len(json_ids), n_forced, t_json / max(len(json_ids) - n_forced, 1))
+        json_text = _decode(model, json_ids).strip().rstrip("<|end|>").strip()
+        intent = _safe_json(json_text)
+        if on_intent is not None:
+            on_intent(intent)
+        if ack is not None and isinstance(intent, dict):
+            tts_text = ack(intent)
+            if tts_text is not None:
+                return intent, tts_text, t_json, 0.0
+
+        # Pass 2: TTS continuation — DON'T roll back the KV cache (load_state is the
+        # slow path). The JSON we just generated stays in context; append the cue and
+        # keep generating. The model sees "…<json>\nSpoken response:" which is fine
+        # for producing the spoken ack.
+        cue_tokens = model.tokenize(
+            f"\nSpoken response:".encode(), add_bos=False, special=True
+        )
+        _check(cancel)
+        model.eval(cue_tokens)
+
+        t0 = time.monotonic()
+        tts_ids = []
+        sent = 0                      # chars of the ack already passed to on_token
+        for tok_id in model.generate([], reset=False, grammar=None, temp=0.4, top_k=40):
+            _check(cancel)
+            tts_ids.append(tok_id)
+            text_so_far = _decode(model, tts_ids)
+            done = (tok_id in eos or tok_id in stop_ids or "\n" in text_so_far
+                    or len(tts_ids) >= 30)
+            if on_token is not None and not (tok_id in eos or tok_id in stop_ids):
+                line = text_so_far.split("\n")[0]
+                if len(line) > sent and not line.endswith("\ufffd"):
+                    on_token(line[sent:])
+                    sent = len(line)
+            if done:
+                break
+        t_tts = (time.monotonic() - t0) * 1000
+        tts_text = _decode(model, tts_ids).strip().split("\n")[0].rstrip("<|end|>").strip()
+
+        return intent, tts_text, t_json, t_tts
+    except Cancelled:
+        # Leave the KV prefix-only: drop the tail / JSON / partial ack.
+        if n_prefix is not None:
+            slots.restore(prefix, system_prompt)
+        else:
+            model.reset()
+        raise
 
 
 # ── benchmark ─────────────────────────────────────────────────────────────────
@@ -1,5 +1,6 @@
 import asyncio
 import logging as _pylog
+import math
 import re
 from collections import namedtuple
 from concurrent.futures import ThreadPoolExecutor
@@ -8,15 +9,39 @@ import numpy as np
 import reactivex as rx
 from cyclotron import Component
 
+from fsttm.speech_gate import SpeechGate
+from fsttm.stt_stream import PARTIAL_MS, SAMPLE_RATE, StreamState
+
 _log = _pylog.getLogger("fsttm.whisper")   # → fsttm.log
 
 Sink = namedtuple('Sink', ['request'])
 Source = namedtuple('Source', ['text'])
 
-Initialize  = namedtuple('Initialize',  ['model', 'with_probs', 'language'])
-Initialize.__new__.__defaults__ = (None, False, 'en')
+Initialize  = namedtuple('Initialize',  ['model', 'with_probs', 'language',
+                                         'stream', 'partial_ms', 'ctx_margin',
+                                         'fast_model', 'fast_max_s',
+                                         'fast_backlog', 'escalate_below',
+                                         'speech_gate', 'min_voiced_ms'])
+# stream: re-transcribe the utterance while it is spoken (StreamAudio →
+# PartialText) so the final pass only covers the tail (fsttm.stt_stream);
+# partial_ms: the re-transcribe cadence.
+# ctx_margin: seconds of encoder context beyond the audio (audio_ctx_for);
+# None → whisper's full 30 s window.
+# fast_model: a second, smaller whisper model (e.g. tiny.en) for utterances up
+# to fast_max_s and while fast_backlog transcribes wait (route_model); its
+# result is redone by `model` below escalate_below confidence (None = never).
+# speech_gate: stream mode runs no partial pass until the growing utterance
+# holds min_voiced_ms of voiced audio (fsttm.speech_gate), so a cough or click
+# never reaches whisper (or starts a speculative intent) before the server's
+# gate drops the whole utterance.
+Initialize.__new__.__defaults__ = (None, False, 'en', False, PARTIAL_MS, None,
+                                   None, 3.0, 2, 0.5, False, 150)
 
 SpeechToText = namedtuple('SpeechToText', ['data', 'context'])
+# One voiced frame of the current utterance (stream mode); data=None marks the
+# utterance end. The final SpeechToText still carries the whole utterance.
+StreamAudio = namedtuple('StreamAudio', ['data', 'context'])
+StreamAudio.__new__.__defaults__ = (None, None)
 
 # parasite=True marks a transcript that matched a parasite phrase ("thank you")
 # — a likely hallucination on silence, but a real word a user might also speak.
@@ -25,6 +50,11 @@ SpeechToText = namedtuple('SpeechToText', ['data', 'context'])
 TextResult = namedtuple('TextResult', ['text', 'context', 'parasite'])
 TextResult.__new__.__defaults__ = (False,)
 TextError  = namedtuple('TextError',  ['error', 'context'])
+# Interim transcript while the user is still speaking: text = everything so
+# far, stable = the committed prefix that later passes won't change. Emitted
+# when either grows; stable == text once the user pauses.
+PartialText = namedtuple('PartialText', ['text', 'stable', 'context'])
+PartialText.__new__.__defaults__ = ("", None)
 
 # Whisper emits sound annotations / hallucinations on noise (keyboard clicks,
 # sighs, coughs) or silence, NOT real speech. Dropping them means no TextResult
@@ -41,6 +71,64 @@ _MIN_CHARS = 2   # discard single-character "transcriptions"
 # trailing punctuation.
 _PARASITES = ["thank you", "thanks"]
 
+# whisper.cpp params for stream passes: one segment per word with timestamps
+# (for the agreement / tail bookkeeping). pywhispercpp keeps params on the
+# Model between calls, so full transcribes set the plain ones back.
+_WORD_PARAMS  = dict(token_timestamps=True, max_len=1, split_on_word=True)
+_PLAIN_PARAMS = dict(token_timestamps=False, max_len=0, split_on_word=False,
+                     initial_prompt="")
+
+# whisper.cpp encodes a 30 s window (1500 encoder frames, 50 per second)
+# however short the audio — for a 1-3 s command most of the encoder work is
+# padding. audio_ctx limits the encoder to the utterance plus a margin.
+AUDIO_CTX_FULL = 1500
+_CTX_PER_S = 50
+_CTX_ALIGN = 64           # round up: fewer distinct graph sizes
+CTX_MARGIN_S = 1.0
+
+
+def audio_ctx_for(seconds: float, margin_s: float = CTX_MARGIN_S) -> int:
+    """whisper.cpp audio_ctx for `seconds` of audio plus margin_s, rounded up
+    to _CTX_ALIGN frames; 0 (the full window) once that reaches 30 s."""
+    n = math.ceil((seconds + margin_s) * _CTX_PER_S)
+    n = -(-n // _CTX_ALIGN) * _CTX_ALIGN
+    return 0 if n >= AUDIO_CTX_FULL else n
+
+
+# Model tiering (stt.fast_model): commands are short, so most utterances can
+# go to a small fast model; a long request — or a low-confidence fast result —
+# gets the main one.
+_MAX_WORDS_PER_S = 6.0    # faster "speech" is a small model looping
+
+
+def route_model(audio_s: float, backlog: int, fast_max_s: float = 3.0,
+                fast_backlog: int = 2) -> tuple:
+    """(tier, reason): "fast" for audio up to fast_max_s ("short") or while
+    `backlog` more transcribes wait behind this one ("queue"), else "main"
+    ("long")."""
+    if audio_s <= fast_max_s:
+        return "fast", "short"
+    if backlog >= fast_backlog:
+        return "fast", "queue"
+    return "main", "long"
+
+
+def transcript_confidence(text: str, audio_s: float, probs=None) -> float:
+    """0..1 for a transcript: the mean segment probability when the bindings
+    report one, else 1.0 unless it looks like a small model failing — no
+    words / an annotation, an impossible word rate, a phrase on repeat."""
+    if _is_hard_noise(text):
+        return 0.0
+    p = [x for x in (probs or ()) if x is not None and x == x]   # drop NaN
+    if p:
+        return float(np.mean(p))
+    words = text.lower().split()
+    if len(words) / max(audio_s, 0.5) > _MAX_WORDS_PER_S:
+        return 0.2
+    if len(words) >= 6 and len(set(words)) < 0.4 * len(words):
+        return 0.2
+    return 1.0
+
 
 def set_parasites(phrases):
     """Replace the parasite-phrase list (from config stt.parasites). None/empty
@@ -78,6 +166,19 @@ def make_driver(loop=None):
     def driver(sink):
         whisper_model = None
         language = 'en'
+        # Stream mode: cadence (ms, 0 = off) and the current utterance state
+        partial_ms = [0]
+        _stream = [StreamState()]
+        # Adaptive encoder context: margin in seconds (None = full window)
+        ctx_margin = [None]
+        # Model tiering: the fast model, [fast_max_s, fast_backlog,
+        # escalate_below], tier → model name, and final transcribes queued
+        fast_model = [None]
+        tier_cfg = [3.0, 2, 0.5]
+        tier_names = {}
+        _backlog = [0]
+        # Stream mode speech gate (None = off): partials wait for speech
+        _gate = [None]
 
         # whisper.cpp's CUDA backend is NOT thread-safe: its GPU memory pool
         # asserts on out-of-LIFO frees (ggml-cuda.cu GGML_ASSERT). Two utterances
@@ -106,8 +207,22 @@ def make_driver(loop=None):
                     return p
             return os.path.join(base, f'ggml-{name}.bin')
 
-        def setup_model(model_name, lang):
+        def setup_model(model_name, lang, fast_name=None):
             nonlocal whisper_model, language
+            whisper_model = _load(model_name, lang)
+            language = lang or 'en'
+            tier_names.clear()
+            tier_names["main"] = model_name
+            fast_model[0] = None
+            if fast_name:
+                try:
+                    fast_model[0] = _load(fast_name, lang)
+                    tier_names["fast"] = fast_name
+                except Exception:
+                    _log.exception("fast whisper model %s unavailable", fast_name)
+            print("Whisper ready (whisper.cpp CUDA, warmed)")
+
+        def _load(model_name, lang):
             # pywhispercpp's bundled .so libs (libwhisper.so.1, libggml*.so,
             # libggml-cuda.so) land in site-packages, off the default loader path.
             # Preload them RTLD_GLOBAL in dependency order (ggml first, then
@@ -129,28 +244,119 @@ def make_driver(loop=None):
             print(f"Loading whisper.cpp (CUDA) model: {path} (lang={lang})")
             # greedy (beam 1), single processor, force language — matches the
             # old faster-whisper settings; whisper.cpp runs the encode on GPU.
-            whisper_model = Model(path, language=(lang or 'en'),
-                                  n_threads=6, print_progress=False,
-                                  print_realtime=False, redirect_whispercpp_logs_to=None)
-            language = lang or 'en'
+            model = Model(path, language=(lang or 'en'),
+                          n_threads=6, print_progress=False,
+                          print_realtime=False, redirect_whispercpp_logs_to=None)
             # Warm up CUDA kernels (first encode pays ~1.2s JIT cost); do it now
             # so the first real utterance is fast.
             try:
-                whisper_model.transcribe(np.zeros(16000, dtype=np.float32))
+                model.transcribe(np.zeros(16000, dtype=np.float32))
             except Exception:
                 pass
-            print("Whisper ready (whisper.cpp CUDA, warmed)")
+            return model
 
-        def transcribe_sync(pcm_bytes):
-            import time as _t
+        def _pcm(pcm_bytes):
             audio = np.frombuffer(pcm_bytes, np.int16).astype(np.float32) / 32768.0
-            if len(audio) < 16000:
-                audio = np.pad(audio, (0, 16000 - len(audio)))
+            if len(audio) < SAMPLE_RATE:
+                audio = np.pad(audio, (0, SAMPLE_RATE - len(audio)))
+            return audio
+
+        def _ctx(audio):
+            """audio_ctx sized to `audio` when adaptive; params persist on
+            the Model, so it is passed on every call once enabled."""
+            if ctx_margin[0] is None:
+                return {}
+            return {"audio_ctx": audio_ctx_for(len(audio) / SAMPLE_RATE,
+                                               ctx_margin[0])}
+
+        def _words(pcm_bytes, prompt, model=None):
+            """[(word, t0, t1)] in seconds from the start of pcm_bytes."""
+            audio = _pcm(pcm_bytes)
+            segs = (model or whisper_model).transcribe(
+                audio, initial_prompt=prompt or "", **_WORD_PARAMS, **_ctx(audio))
+            return [(s.text, s.t0 / 100, s.t1 / 100) for s in segs]
+
+        def _plain(model, audio):
+            """(text, segment probabilities) of a whole-audio transcribe."""
+            segs = model.transcribe(
+                audio, **(_PLAIN_PARAMS if partial_ms[0] else {}), **_ctx(audio))
+            return (" ".join(s.text for s in segs).strip(),
+                    [getattr(s, "probability", None) for s in segs])
+
+        def _tier(audio_s, backlog):
+            """(tier, model, reason) for a transcribe of audio_s seconds."""
+            if fast_model[0] is None:
+                return "main", whisper_model, None
+            tier, why = route_model(audio_s, backlog, tier_cfg[0], tier_cfg[1])
+            return tier, fast_model[0] if tier == "fast" else whisper_model, why
+
+        def _record_tier(tier, ms, audio_s, reason):
+            if fast_model[0] is None:
+                return
+            try:
+                from fsttm.tui import record_stt_model
+                record_stt_model(tier, tier_names.get(tier, tier), ms, audio_s,
+                                 reason)
+            except Exception:
+                pass
+
+        def partial_sync(st):
+            """One partial pass over the uncommitted part of the buffer →
+            the partial text, or None when neither it nor its committed
+            prefix changed."""
+            import time as _t
+            if st.final:
+                return None      # the utterance ended while this was queued
+            _t0 = _t.monotonic()
+            off, pcm = st.tail()
+            _, model, _ = _tier(len(pcm) / 2 / SAMPLE_RATE, _backlog[0])
+            changed = st.update(_words(pcm, st.stable, model), off,
+                                off + len(pcm) / 2 / SAMPLE_RATE)
+            try:
+                from fsttm.tui import record_stt_partial
+                record_stt_partial((_t.monotonic() - _t0) * 1000)
+            except Exception:
+                pass
+            return st.text if changed else None
+
+        def transcribe_sync(pcm_bytes, st=None):
+            import time as _t
+            utterance = pcm_bytes
+            if st is not None:
+                st.final = True      # no partial passes after this one
+                if st.committed and st.covers(pcm_bytes):
+                    # stream mode: only the tail after the committed words
+                    off, pcm_bytes = st.tail(pcm_bytes)
+                else:
+                    st = None
+            audio = _pcm(pcm_bytes)
             audio_s = len(audio) / 16000.0
+            tier, model, why = _tier(audio_s, _backlog[0] - 1)
             _t0 = _t.monotonic()
-            segs = whisper_model.transcribe(audio)
-            text = " ".join(s.text for s in segs).strip()
+            if st is not None:
+                text, probs = st.finish(_words(pcm_bytes, st.stable, model), off), None
+                heard = " ".join(w for w, _, _ in st.pending)   # the tail's words
+            else:
+                text, probs = _plain(model, audio)
+                heard = text
             stt_ms = (_t.monotonic() - _t0) * 1000
+            _record_tier(tier, stt_ms, audio_s, why)
+            if tier == "fast" and tier_cfg[2] is not None:
+                # an empty tail is fine: the committed words said it all
+                conf = (transcript_confidence(heard, audio_s, probs)
+                        if heard or st is None else 1.0)
+                if conf < tier_cfg[2]:
+                    # low confidence: the main model redoes the whole utterance
+                    _log.info("stt: fast model %r at confidence %.2f → %s",
+                              text, conf, tier_names["main"])
+                    audio = _pcm(utterance)
+                    audio_s = len(audio) / 16000.0
+                    _t1 = _t.monotonic()
+                    text, _ = _plain(whisper_model, audio)
+                    ms = (_t.monotonic() - _t1) * 1000
+                    _record_tier("main", ms, audio_s, "escalated")
+                    stt_ms += ms
+                    tier, st = "main", None
             # RTF = compute time / audio duration; <1 is faster-than-realtime.
             rtf = stt_ms / 1000 / max(audio_s, 0.01)
             # Surface perf to the TUI right panel (no-op import if rich absent);
@@ -163,22 +369,80 @@ def make_driver(loop=None):
             except Exception:
                 pass
             if not _tui_active:
-                print(f"  [stt] {stt_ms:.0f}ms for {audio_s:.1f}s audio (RTF={rtf:.2f})")
+                tail = " tail" if st is not None else ""
+                via = f" [{tier_names[tier]}]" if fast_model[0] is not None else ""
+                print(f"  [stt] {stt_ms:.0f}ms for {audio_s:.1f}s{tail} audio "
+                      f"(RTF={rtf:.2f}){via}")
             return text
 
+        def _stream_speech(st):
+            """Speech gate on the utterance so far; once passed it stays open
+            for the rest of the utterance."""
+            if _gate[0] is None or st.speech:
+                return True
+            st.speech = _gate[0].reason(bytes(st.audio)) is None
+            return st.speech
+
+        def on_stream_audio(item, observer):
+            st = _stream[0]
+            if item.data is None:
+                st.closed = True
+                return
+            if st.closed:
+                st = _stream[0] = StreamState()      # next utterance
+            st.append(item.data)
+            if whisper_model is None or not st.due(partial_ms[0]):
+                return
+            if not _stream_speech(st):
+                st.scheduled_s = st.duration_s      # look again partial_ms on
+                return
+            st.busy, st.scheduled_s = True, st.duration_s
+
+            async def _partial():
+                try:
+                    text = await loop.run_in_executor(_stt_executor,
+                                                      partial_sync, st)
+                except Exception as exc:
+                    _log.debug("partial pass failed: %s", exc)
+                    text = None
+                finally:
+                    st.busy = False
+                if text and not _is_hard_noise(text):
+                    _log.debug("partial: %r (stable %r)", text, st.stable)
+                    loop.call_soon(observer.on_next,
+                                   PartialText(text=text, stable=st.stable,
+                                               context=item.context))
+
+            asyncio.ensure_future(_partial())
+
         def on_subscribe(observer, scheduler):
             def on_whisper_request(item):
                 if type(item) is Initialize:
-                    setup_model(item.model, item.language)
+                    setup_model(item.model, item.language, item.fast_model)
+                    partial_ms[0] = item.partial_ms if item.stream else 0
+                    ctx_margin[0] = item.ctx_margin
+                    tier_cfg[:] = [item.fast_max_s, item.fast_backlog,
+                                   item.escalate_below]
+                    _gate[0] = (SpeechGate(min_voiced_ms=item.min_voiced_ms)
+                                if item.speech_gate else None)
+                elif type(item) is StreamAudio:
+                    if partial_ms[0]:
+                        on_stream_audio(item, observer)
                 elif type(item) is SpeechToText:
                     if whisper_model is not None:
+                        st = _stream[0] if partial_ms[0] else None
+                        _backlog[0] += 1
+
                         async def _transcribe():
                             try:
                                 # Serial executor (max_workers=1) → never two
                                 # concurrent whisper.cpp CUDA calls.
-                                text = await loop.run_in_executor(
-                                    _stt_executor, transcribe_sync, item.data
-                                )
+                                try:
+                                    text = await loop.run_in_executor(
+                                        _stt_executor, transcribe_sync, item.data, st
+                                    )
+                                finally:
+                                    _backlog[0] -= 1
                                 if _is_hard_noise(text):
                                     _log.debug("noise dropped: %r", text)
                                     return   # annotation/short → never real speech
@@ -0,0 +1,195 @@
+"""
+Compact wire encoding for the intent JSON.
+
+Every character of `{"intent":"SET_TEMPERATURE","area":1,"light_type":…}` is
+pass-1 decode work in two_pass.approach_a. The compact encoding has the model
+emit `{"i":"ST","a":1,"lt":…}` instead: short keys and short enum codes in the
+grammar and the few-shot examples, expanded back to the canonical intent dict
+before anything downstream (meta_intent, translate, the dispatcher) sees it.
+
+The codec is DERIVED from the provider's canonical schema, so every domain
+gets it for free and the two encodings can never drift apart:
+  keys       intent→i, area→a, fan_level→fl, light_type→lt, topic→to …
+             (initials of the `_` parts, lengthened on collision)
+  enum codes per key, same rule: WARMER→W, WINDOW_OPEN→WO, …
+Integer enums (area) are already minimal and stay as they are.
+
+encode_prompt() rewrites the JSON literals in the system prompt and appends a
+legend mapping codes back to the names the prompt prose talks about. The
+prefix is primed once (kv_slots), so the longer prompt costs nothing per turn.
+
+Selected by config `system.intent_encoding` ("canonical" | "compact");
+contrib/hvac/scripts/opt_intent.py --encoding benchmarks both.
+"""
+from __future__ import annotations  # PEP 563: lazy annotations for Python 3.8 (list[]/tuple[])
+import json
+from typing import Any, Optional
+
+ENCODINGS = ("canonical", "compact")
+LEGEND_HEAD = "## Compact JSON (answer ONLY in this form)"
+
+
+def _short(name: str, taken: set, lower: bool) -> str:
+    """Initials of the `_`-separated parts, one more letter per part until the
+    code is unused; the full name as a last resort."""
+    parts = [p for p in name.split("_") if p] or [name]
+    for n in range(1, max(len(p) for p in parts) + 1):
+        code = "".join(p[:n] for p in parts)
+        code = code.lower() if lower else code
+        if code not in taken:
+            return code
+    return name
+
+
+def _walk(schema: dict, visit) -> None:
+    """visit(key, prop_schema) for every object property, depth first."""
+    if schema.get("type") == "array":
+        _walk(schema.get("items") or {}, visit)
+        return
+    for key, prop in (schema.get("properties") or {}).items():
+        visit(key, prop)
+        _walk(prop, visit)
+
+
+class WireCodec:
+    """Canonical ⇄ compact mapping for one schema.
+
+    keys:  canonical key → short key.
+    codes: canonical key → {canonical enum value → code}. A key keeps one
+           table wherever it occurs (dog `type` under target/goal/reference).
+    """
+
+    def __init__(self, keys: dict, codes: dict):
+        self.keys = dict(keys)
+        self.codes = {k: dict(v) for k, v in codes.items()}
+        self._long = {v: k for k, v in self.keys.items()}
+        self._values = {k: {c: v for v, c in t.items()}
+                        for k, t in self.codes.items()}
+
+    @classmethod
+    def derive(cls, schema: dict) -> "WireCodec":
+        keys, values = {}, {}
+
+        def visit(key, prop):
+            if key not in keys:
+                keys[key] = _short(key, set(keys.values()), lower=True)
+            for v in prop.get("enum") or ():
+                if isinstance(v, str) and v not in values.setdefault(key, []):
+                    values[key].append(v)
+
+        _walk(schema, visit)
+        codes = {}
+        for key, vals in values.items():
+            codes[key] = {}
+            for v in vals:
+                codes[key][v] = _short(v, set(codes[key].values()), lower=False)
+        return cls(keys, codes)
+
+    @classmethod
+    def from_legend(cls, prompt: str) -> Optional["WireCodec"]:
+        """The codec whose legend() ends a compact prompt (encode_prompt), or
+        None for a canonical prompt. Lets prompt readers decode its examples
+        without knowing which schema the prompt was encoded with."""
+        i = prompt.rfind(LEGEND_HEAD)
+        if i < 0:
+            return None
+        keys, codes = {}, {}
+        for line in prompt[i:].splitlines()[1:]:
+            head, sep, rest = line.partition(": ")
+            if not sep:
+                break
+            pairs = [p.split("=", 1) for p in rest.rstrip(".").split(", ")
+                     if "=" in p]
+            if head == "Keys":
+                keys = {k: s for s, k in pairs}
+            elif head.endswith(" codes"):
+                codes[head[:-len(" codes")]] = {v: c for c, v in pairs}
+            else:
+                break
+        return cls(keys, codes)
+
+    # ── schema / grammar ─────────────────────────────────────────────────────
+    def encode_schema(self, schema: dict, key: Optional[str] = None) -> dict:
+        """The wire schema: same shape and property order, short names."""
+        out = dict(schema)
+        if "enum" in schema and key in self.codes:
+            out["enum"] = [self.codes[key].get(v, v) for v in schema["enum"]]
+        if "properties" in schema:
+            out["properties"] = {self.keys.get(k, k): self.encode_schema(p, k)
+                                 for k, p in schema["properties"].items()}
+        if "required" in schema:
+            out["required"] = [self.keys.get(k, k) for k in schema["required"]]
+        if "items" in schema:
+            out["items"] = self.encode_schema(schema["items"], key)
+        return out
+
+    # ── values ───────────────────────────────────────────────────────────────
+    def encode(self, obj: Any, key: Optional[str] = None) -> Any:
+        if isinstance(obj, dict):
+            return {self.keys.get(k, k): self.encode(v, k) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [self.encode(v, key) for v in obj]
+        if isinstance(obj, str) and key in self.codes:
+            return self.codes[key].get(obj, obj)
+        return obj
+
+    def decode(self, obj: Any, key: Optional[str] = None) -> Any:
+        """Wire intent → canonical intent dict. Unknown keys/codes pass
+        through unchanged (translate() then treats them as it always did)."""
+        if isinstance(obj, dict):
+            out = {}
+            for k, v in obj.items():
+                ck = self._long.get(k, k)
+                out[ck] = self.decode(v, ck)
+            return out
+        if isinstance(obj, list):
+            return [self.decode(v, key) for v in obj]
+        if isinstance(obj, str) and key in self._values:
+            return self._values[key].get(obj, obj)
+        return obj
+
+    # ── prompt ───────────────────────────────────────────────────────────────
+    def legend(self) -> str:
+        lines = [LEGEND_HEAD,
+                 "Keys: " + ", ".join(f"{s}={k}" for k, s in self.keys.items())
+                 + "."]
+        for key, table in self.codes.items():
+            lines.append(f"{key} codes: "
+                         + ", ".join(f"{c}={v}" for v, c in table.items()) + ".")
+        return "\n".join(lines)
+
+    def encode_prompt(self, prompt: str) -> str:
+        """Rewrite the prompt's JSON examples to the wire form and append the
+        legend. Only objects made of schema keys are touched."""
+        dec = json.JSONDecoder()
+        out, i = [], 0
+        while True:
+            j = prompt.find("{", i)
+            if j < 0:
+                out.append(prompt[i:])
+                break
+            try:
+                obj, end = dec.raw_decode(prompt, j)
+            except ValueError:
+                out.append(prompt[i:j + 1])
+                i = j + 1
+                continue
+            out.append(prompt[i:j])
+            if isinstance(obj, dict) and obj and all(k in self.keys for k in obj):
+                out.append(json.dumps(self.encode(obj), separators=(",", ":"),
+                                      ensure_ascii=False))
+            else:
+                out.append(prompt[j:end])
+            i = end
+        return "".join(out).rstrip("\n") + "\n\n" + self.legend()
+
+
+_CODECS: dict = {}
+
+
+def codec_for(schema: dict) -> WireCodec:
+    """The derived codec for `schema`, cached by schema content."""
+    key = json.dumps(schema, sort_keys=True)
+    if key not in _CODECS:
+        _CODECS[key] = WireCodec.derive(schema)
+    return _CODECS[key]
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Adaptive whisper audio_ctx: latency and accuracy vs the full 30 s window.
+
+Transcribes every clip once per setting — the full window, then audio_ctx
+sized by fsttm.whisper.audio_ctx_for with each --margin — and reports the mean
+transcribe time, the speedup over the full window and the word error rate.
+The reference for a clip is the .txt next to its .wav when there is one (a
+recorded command corpus), else the full-window transcript, so the WER column
+then measures what the shorter context changes.
+
+Inputs are 16 kHz mono 16-bit WAVs or directories of them (default samples/).
+--clip cuts each file into command-length pieces, e.g. --clip 2 turns
+samples/jfk.wav into five 2 s clips plus the rest.
+
+Usage:
+    python scripts/bench_stt_ctx.py --model models/ggml-base.en-q5_1.bin \\
+        [--margin 0.5 1 2] [--clip 2] [--runs 3] [--threads 6] \\
+        [samples/ recordings/commands/ ...]
+"""
+import argparse
+import glob
+import os
+import re
+import time
+import wave
+
+import numpy as np
+
+from fsttm.whisper import AUDIO_CTX_FULL, audio_ctx_for
+
+SAMPLE_RATE = 16000
+
+
+def load_clips(paths, clip_s):
+    """[(name, float32 audio, reference text or None)]"""
+    files = []
+    for p in paths:
+        files += sorted(glob.glob(os.path.join(p, "*.wav"))) if os.path.isdir(p) else [p]
+    clips = []
+    for f in files:
+        with wave.open(f) as w:
+            if (w.getframerate(), w.getnchannels(), w.getsampwidth()) != (SAMPLE_RATE, 1, 2):
+                print(f"skip {f}: not 16 kHz mono int16")
+                continue
+            pcm = np.frombuffer(w.readframes(w.getnframes()), np.int16)
+        audio = pcm.astype(np.float32) / 32768.0
+        txt = os.path.splitext(f)[0] + ".txt"
+        ref = open(txt).read().strip() if os.path.exists(txt) else None
+        name = os.path.basename(f)
+        if not clip_s:
+            clips.append((name, audio, ref))
+            continue
+        n = int(clip_s * SAMPLE_RATE)
+        for k in range(0, len(audio), n):   # a cut clip has no reference
+            if len(audio) - k >= SAMPLE_RATE // 2:
+                clips.append((f"{name}@{k / SAMPLE_RATE:.0f}s", audio[k:k + n], None))
+    return clips
+
+
+def _words(text):
+    return re.sub(r"[^\w' ]", " ", text.lower()).split()
+
+
+def wer(ref, hyp):
+    r, h = _words(ref), _words(hyp)
+    d = list(range(len(h) + 1))
+    for i in range(1, len(r) + 1):
+        prev, d[0] = d[0], i
+        for j in range(1, len(h) + 1):
+            prev, d[j] = d[j], min(d[j] + 1, d[j - 1] + 1,
+                                   prev + (r[i - 1] != h[j - 1]))
+    return d[len(h)] / max(len(r), 1)
+
+
+def transcribe(model, audio, audio_ctx, runs):
+    """(text, mean ms). The whisper driver pads to 1 s; so does this."""
+    if len(audio) < SAMPLE_RATE:
+        audio = np.pad(audio, (0, SAMPLE_RATE - len(audio)))
+    ms = []
+    for _ in range(runs):
+        t = time.monotonic()
+        segs = model.transcribe(audio, audio_ctx=audio_ctx)
+        ms.append((time.monotonic() - t) * 1000)
+    return " ".join(s.text for s in segs).strip(), sum(ms) / len(ms)
+
+
+def main():
+    ap = argparse.ArgumentParser("whisper audio_ctx sweep")
+    ap.add_argument("inputs", nargs="*", default=["samples"],
+                    help="WAV files / directories (default: samples/)")
+    ap.add_argument("--model", required=True, help="whisper.cpp GGML .bin")
+    ap.add_argument("--margin", type=float, nargs="+", default=[0.5, 1.0, 2.0])
+    ap.add_argument("--clip", type=float, default=0.0,
+                    help="cut files into clips of this many seconds (0 = whole)")
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--threads", type=int, default=6)
+    args = ap.parse_args()
+
+    from pywhispercpp.model import Model
+    model = Model(args.model, language="en", n_threads=args.threads,
+                  print_progress=False, print_realtime=False,
+                  redirect_whispercpp_logs_to=None)
+    clips = load_clips(args.inputs, args.clip)
+    if not clips:
+        ap.error("no 16 kHz mono WAVs found")
+    model.transcribe(np.zeros(SAMPLE_RATE, np.float32))       # warm-up
+
+    settings = [("full", None)] + [(f"+{m:g}s", m) for m in args.margin]
+    rows = {label: [] for label, _ in settings}   # [(ms, wer)]
+    print(f"{'clip':<22} {'dur':>5}  " + "  ".join(f"{l:>16}" for l, _ in settings))
+    for name, audio, ref in clips:
+        dur = len(audio) / SAMPLE_RATE
+        cells = []
+        for label, margin in settings:
+            ctx = 0 if margin is None else audio_ctx_for(max(dur, 1.0), margin)
+            text, ms = transcribe(model, audio, ctx, args.runs)
+            if ref is None:
+                ref = text                  # full window is the reference
+            e = wer(ref, text)
+            rows[label].append((ms, e))
+            cells.append(f"{ms:6.0f}ms {ctx or AUDIO_CTX_FULL:4d} {100 * e:3.0f}%")
+        print(f"{name[:22]:<22} {dur:4.1f}s  " + "  ".join(f"{c:>16}" for c in cells))
+
+    print("\nmean over", len(clips), "clips")
+    base = np.mean([ms for ms, _ in rows["full"]])
+    for label, _ in settings:
+        ms = np.mean([m for m, _ in rows[label]])
+        e = np.mean([w for _, w in rows[label]])
+        print(f"  {label:>6}: {ms:7.0f}ms  x{base / ms:4.1f}  WER {100 * e:4.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+whisper.audio_ctx_for — the encoder context for an utterance: its length plus
+the margin at 50 frames/s, rounded up, and the full window (0) past 30 s.
+"""
+from fsttm.whisper import AUDIO_CTX_FULL, audio_ctx_for
+
+
+def test_short_command_gets_a_small_context():
+    assert audio_ctx_for(1.0, 1.0) == 128        # 100 frames → 128
+    assert audio_ctx_for(2.5, 1.0) == 192        # 175 frames → 192
+
+
+def test_context_covers_audio_and_margin():
+    for s in (0.3, 1.7, 4.2, 9.9, 20.0):
+        n = audio_ctx_for(s, 0.5)
+        assert n % 64 == 0 and n >= (s + 0.5) * 50
+
+
+def test_long_audio_uses_the_full_window():
+    assert audio_ctx_for(29.5, 1.0) == 0
+    assert audio_ctx_for(60.0) == 0
+    assert audio_ctx_for(25.0, 1.0) < AUDIO_CTX_FULL
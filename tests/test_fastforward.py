@@ -0,0 +1,65 @@
+"""
+fsttm.fastforward — schema-forced JSON runs that pass 1 evaluates in one batch
+instead of sampling token by token. Pure text logic; no model needed.
+"""
+from fsttm.fastforward import forced_text, forced_tokens
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent": {"type": "string", "enum": ["WARMER", "WINDOW_OPEN", "LIGHTS_ON"]},
+        "area": {"type": "integer", "enum": [0, 1, 16, 256]},
+        "delta": {"type": "integer"},
+        "light_type": {"type": "string", "enum": ["head", "hazard"]},
+        "topic": {"type": "string"},
+    },
+    "required": ["intent", "area"],
+    "additionalProperties": False,
+}
+
+
+def test_object_opening_is_forced():
+    assert forced_text(SCHEMA, "") == '{"intent":"'
+    assert forced_text(SCHEMA, "{") == '"intent":"'
+
+
+def test_unique_enum_prefix_completes_and_chains_next_required_key():
+    assert forced_text(SCHEMA, '{"intent":"') == ""          # model chooses
+    assert forced_text(SCHEMA, '{"intent":"W') == ""          # WARMER or WINDOW_OPEN
+    assert forced_text(SCHEMA, '{"intent":"WA') == 'RMER","area":'
+
+
+def test_integer_enum_waits_while_ambiguous():
+    assert forced_text(SCHEMA, '{"intent":"WARMER","area":1') == ""   # 1 or 16
+    assert forced_text(SCHEMA, '{"intent":"WARMER","area":2') == "56"
+
+
+def test_optional_keys_follow_property_order():
+    t = '{"intent":"LIGHTS_ON","area":0,'
+    assert forced_text(SCHEMA, t) == '"'
+    assert forced_text(SCHEMA, t + '"l') == 'ight_type":"h'
+    assert forced_text(SCHEMA, t + '"light_type":"hea') == 'd"'
+    # only topic may follow light_type; after it nothing but the close
+    assert forced_text(SCHEMA, t + '"topic":"x"') == "}"
+
+
+def test_free_values_and_unmodelled_text_force_nothing():
+    assert forced_text(SCHEMA, '{"intent":"WARMER","area":0,"delta":') == ""
+    assert forced_text(SCHEMA, '{"intent":"NOPE"') == ""
+    assert forced_text({"type": "object", "properties": {}}, "{") == ""
+
+
+class _CharModel:
+    def tokenize(self, b, add_bos=False, special=False):
+        return list(b)
+
+    def detokenize(self, ids):
+        return bytes(ids)
+
+
+def test_forced_tokens_extend_generated_ids():
+    m = _CharModel()
+    ids = list(b'{"intent":"WA')
+    run = forced_tokens(m, SCHEMA, ids)
+    assert bytes(ids + run) == b'{"intent":"WARMER","area":'
+    assert forced_tokens(m, SCHEMA, list(b'{"intent":"')) == []
@@ -0,0 +1,61 @@
+"""
+fsttm.fastintent — the non-LLM intent classifier: training data parsed out of
+an intent prompt, train / predict, the coverage gate and the model JSON.
+numpy only; no model needed.
+"""
+from fsttm import fastintent as F
+from fsttm.wire import codec_for
+
+_PROMPT = '''Intents:
+| INTENT | Trigger phrases | Notes |
+| AC_ON | "AC on", "start/run the AC" | |
+| AC_OFF | "AC off", "turn off the AC" | |
+| LIGHTS_ON | "lights on", "turn on the lights" | |
+| ZONE | "driver" | not an intent |
+
+Examples:
+"switch the air conditioning on" → {"intent":"AC_ON"}
+"kill the AC" → {"intent":"AC_OFF"}
+'''
+_LABELS = {"AC_ON", "AC_OFF", "LIGHTS_ON"}
+
+
+class _Provider:
+    def fill_slots(self, name, text):
+        return {"intent": name}
+
+
+def test_examples_from_prompt_tables_and_few_shot():
+    ex = F.examples_from_prompt(_PROMPT, _LABELS)
+    assert ("start the AC", "AC_ON") in ex and ("run the AC", "AC_ON") in ex
+    assert ("kill the AC", "AC_OFF") in ex
+    assert all(label in _LABELS for _, label in ex)       # ZONE row filtered
+
+
+def test_examples_from_compact_prompt_decoded_through_its_legend():
+    schema = {"type": "object", "properties": {
+        "intent": {"type": "string", "enum": sorted(_LABELS)}}}
+    compact = codec_for(schema).encode_prompt(_PROMPT)
+    assert '{"intent"' not in compact
+    assert F.examples_from_prompt(compact, _LABELS) == \
+        F.examples_from_prompt(_PROMPT, _LABELS)
+
+
+def test_train_predict_and_coverage_gate():
+    m = F.FastIntent.train(F.examples_from_prompt(_PROMPT, _LABELS))
+    name, prob = m.predict("turn the AC off")
+    assert name == "AC_OFF" and prob > 0.4
+    assert m.predict("lights on please")[0] == "LIGHTS_ON"
+    assert m.predict("qwxz zzyq")[1] == 0.0               # unseen n-grams
+    intent, name, _ = F.fast_intent(m, _Provider(), "AC on", 0.3)
+    assert intent == {"intent": "AC_ON"}
+    assert F.fast_intent(m, _Provider(), "AC on", 1.01)[0] is None
+
+
+def test_model_json_round_trip(tmp_path):
+    m = F.FastIntent.train(F.examples_from_prompt(_PROMPT, _LABELS))
+    path = tmp_path / "fast.json"
+    m.save(str(path))
+    m2 = F.FastIntent.load(str(path))
+    assert m2.labels == m.labels
+    assert m2.predict("kill the AC") == m.predict("kill the AC")
@@ -0,0 +1,40 @@
+"""
+fsttm.grammar — folded system intents: SLEEP / MUTE appended to a domain
+intent schema and taught by a prompt section shaped like its intent JSON.
+Schema / prompt text only; compiling the GBNF needs llama_cpp.
+"""
+import json
+
+from fsttm.fastintent import examples_from_prompt
+from fsttm.grammar import (fold_system_intents, folded_prompt_section,
+                           system_action)
+
+_SCHEMA = {"type": "object",
+           "properties": {"intent": {"type": "string",
+                                     "enum": ["WARMER", "POWER_OFF", "UNKNOWN"]},
+                          "area": {"type": "integer", "enum": [0, 1, 4]}},
+           "required": ["intent", "area"], "additionalProperties": False}
+
+
+def test_fold_appends_system_actions_without_touching_the_original():
+    folded = fold_system_intents(_SCHEMA)
+    assert folded["properties"]["intent"]["enum"] == [
+        "WARMER", "POWER_OFF", "UNKNOWN", "SLEEP", "MUTE"]
+    assert "SLEEP" not in _SCHEMA["properties"]["intent"]["enum"]
+    assert fold_system_intents(folded) == folded          # idempotent
+
+
+def test_system_action_maps_only_folded_names():
+    assert system_action({"intent": "SLEEP", "area": 0}) == "sleep"
+    assert system_action({"intent": "MUTE"}) == "mute"
+    assert system_action({"intent": "POWER_OFF"}) is None
+    assert system_action(None) is None
+
+
+def test_prompt_section_examples_match_the_schema_shape():
+    text = folded_prompt_section(_SCHEMA, "Ava")
+    assert '"Ava, stop the climate"' in text             # car stop ≠ sleep
+    pairs = examples_from_prompt(text)
+    assert ("Ava, go to sleep", "SLEEP") in pairs
+    line = next(l for l in text.splitlines() if "voice off\" →" in l)
+    assert json.loads(line.split("→", 1)[1]) == {"intent": "MUTE", "area": 0}
@@ -0,0 +1,45 @@
+"""
+fsttm.intent_cache.IntentCache — exact-repeat intent results: normalized
+keys, domain / prompt separation, LRU bound, TTL and the hit counters.
+"""
+import time
+
+from fsttm.intent_cache import IntentCache
+
+_WARMER = {"intent": "WARMER", "area": 0, "delta": 1}
+
+
+def test_repeat_hits_after_normalization():
+    c = IntentCache()
+    assert c.get("Warmer.", None, "P") is None
+    c.put("Warmer.", None, "P", _WARMER, "Warmer.")
+    assert c.get("  warmer ", None, "P") == (_WARMER, "Warmer.")
+    assert c.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_domains_and_prompt_are_part_of_the_key():
+    c = IntentCache()
+    c.put("warmer", ["lights", "climate"], "P", _WARMER, None)
+    assert c.get("warmer", ["climate", "lights"], "P") is not None
+    assert c.get("warmer", ["climate"], "P") is None
+    assert c.get("warmer", ["climate", "lights"], "P2") is None  # new prompt
+
+
+def test_lru_bound_ttl_and_off():
+    c = IntentCache(max_entries=2, ttl_s=0.01)
+    for t in ("a", "b", "c"):
+        c.put(t, None, "P", {"intent": t}, None)
+    assert c.stats()["size"] == 2
+    assert c.get("c", None, "P") is not None
+    time.sleep(0.02)
+    assert c.get("c", None, "P") is None                  # expired
+    off = IntentCache(max_entries=0)
+    off.put("warmer", None, "P", _WARMER, None)
+    assert off.get("warmer", None, "P") is None
+
+
+def test_returned_intent_is_a_copy():
+    c = IntentCache()
+    c.put("warmer", None, "P", _WARMER, None)
+    c.get("warmer", None, "P")[0]["area"] = 4
+    assert c.get("warmer", None, "P")[0]["area"] == 0
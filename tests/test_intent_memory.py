@@ -0,0 +1,83 @@
+"""
+fsttm.intent_memory.IntentMemory — nearest-neighbour intent recall with slot
+re-extraction, learning only confirmed results, seed-preserving eviction.
+A bag-of-words embedder stands in for the GGUF one (same embed() contract).
+"""
+import numpy as np
+
+from fsttm.fastintent import examples_from_prompt, normalize
+from fsttm.intent_memory import IntentMemory, confirmable
+from fsttm.wire import codec_for
+
+_VOCAB = "warmer cooler lights on off my side driver please bit a make it by two".split()
+
+
+class _BowEmbedder:
+    def embed(self, texts):
+        m = np.zeros((len(texts), len(_VOCAB)), np.float32)
+        for i, t in enumerate(texts):
+            for w in normalize(t).split():
+                if w in _VOCAB:
+                    m[i, _VOCAB.index(w)] += 1
+        n = np.linalg.norm(m, axis=1, keepdims=True)
+        n[n == 0] = 1
+        return m / n
+
+
+class _Provider:
+    def fill_slots(self, name, text):
+        if name == "WARMER":
+            return {"intent": name, "area": 1 if "my" in text else 0,
+                    "delta": 2 if "two" in text else 1}
+        return {"intent": name, "area": 0}
+
+
+def _memory(threshold=0.45, **kw):
+    mem = IntentMemory(_BowEmbedder(), threshold=threshold, **kw)
+    mem.seed([("warmer", "WARMER"), ("lights on", "LIGHTS_ON"),
+              ("lights off", "LIGHTS_OFF")])
+    return mem
+
+
+def test_paraphrase_recalls_name_and_refills_slots():
+    mem = _memory()
+    intent, name, score, utt = mem.recall("warmer my side please", _Provider())
+    assert name == "WARMER" and utt == "warmer"
+    assert intent == {"intent": "WARMER", "area": 1, "delta": 1}
+    assert mem.stats()["hits"] == 1
+
+
+def test_seeds_from_a_compact_prompt():
+    # the LLM driver seeds from the live intent prompt, compact or not
+    schema = {"type": "object", "properties": {"intent": {
+        "type": "string", "enum": ["WARMER", "LIGHTS_ON", "LIGHTS_OFF"]}}}
+    prompt = codec_for(schema).encode_prompt(
+        '"warmer" → {"intent":"WARMER"}\n'
+        '"lights on" → {"intent":"LIGHTS_ON"}\n')
+    mem = IntentMemory(_BowEmbedder(), threshold=0.45)
+    assert mem.seed(examples_from_prompt(prompt)) == 2
+    assert mem.recall("lights on please", _Provider())[1] == "LIGHTS_ON"
+
+
+def test_below_threshold_is_a_miss():
+    mem = _memory(threshold=0.99)
+    assert mem.recall("lights please", _Provider())[0] is None
+    assert mem.stats()["misses"] == 1
+
+
+def test_confirmable_only_when_rules_reproduce_the_llm():
+    p = _Provider()
+    assert confirmable(p, "warmer by two", {"intent": "WARMER", "area": 0, "delta": 2}) == "WARMER"
+    assert confirmable(p, "warmer", {"intent": "WARMER", "area": 4, "delta": 1}) is None
+    assert not _memory().add("huh", "UNKNOWN")           # never remembered
+
+
+def test_learned_rows_evicted_oldest_first_seeds_kept():
+    mem = _memory(max_entries=5)
+    assert mem.add("cooler", "COOLER")
+    assert not mem.add("Cooler!", "COOLER")             # duplicate text
+    assert mem.add("cooler please", "COOLER") and mem.add("warmer please", "WARMER")
+    st = mem.stats()
+    assert st["size"] == 5 and st["seeds"] == 3
+    assert mem.store.chunks == ["warmer", "lights on", "lights off",
+                                "cooler please", "warmer please"]
@@ -0,0 +1,183 @@
+"""
+fsttm.kv_slots — the intent prefix stays resident in its own KV sequence while
+chat / classify / manual take turns in the working sequence. Exercised against
+a fake llama context that models per-sequence KV cells (no model needed).
+"""
+import numpy as np
+
+import threading
+
+import pytest
+
+from fsttm import kv_slots
+from fsttm.two_pass import Cancelled, _prime_prefix
+
+
+class _FakeCtx:
+    def __init__(self):
+        self.cells = {}          # seq → {pos: token}
+
+    def kv_cache_seq_rm(self, seq, p0, p1):
+        p1 = float("inf") if p1 < 0 else p1
+        for s in (list(self.cells) if seq < 0 else [seq]):
+            cs = self.cells.get(s, {})
+            for p in [p for p in cs if p0 <= p < p1]:
+                del cs[p]
+        return True
+
+    def kv_cache_seq_cp(self, src, dst, p0, p1):
+        p1 = float("inf") if p1 < 0 else p1
+        for p, t in self.cells.get(src, {}).items():
+            if p0 <= p < p1:
+                self.cells.setdefault(dst, {})[p] = t
+
+    def seq(self, s):
+        return [t for _, t in sorted(self.cells.get(s, {}).items())]
+
+
+class _Params:
+    def __init__(self, n_seq_max):
+        self.n_seq_max = n_seq_max
+
+
+class _FakeModel:
+    def __init__(self, n_seq_max=8, n_ctx=256):
+        self._ctx = _FakeCtx()
+        self._n_ctx = n_ctx
+        self.context_params = _Params(n_seq_max)
+        self.input_ids = np.zeros(n_ctx, dtype=np.intc)
+        self.n_tokens = 0
+        self.evals = 0
+
+    def n_ctx(self):
+        return self._n_ctx
+
+    def tokenize(self, b, add_bos=True, special=False):
+        return [ord(c) for c in b.decode()]
+
+    def reset(self):
+        self.n_tokens = 0
+
+    def eval(self, toks):
+        # Same shape as Llama.eval: drop everything after n_tokens in "all" seqs.
+        self._ctx.kv_cache_seq_rm(-1, self.n_tokens, -1)
+        for t in toks:
+            self._ctx.cells.setdefault(0, {})[self.n_tokens] = t
+            self.input_ids[self.n_tokens] = t
+            self.n_tokens += 1
+        self.evals += 1
+
+
+def _chat_turn(model, text):
+    slots = kv_slots.slots_for(model)
+    slots.restore("chat")
+    model.reset()
+    model.eval(model.tokenize(text.encode()))
+    slots.park("chat")
+
+
+def test_prefix_survives_chat_in_multi_seq_context():
+    m = _FakeModel(n_seq_max=8)
+    n = _prime_prefix(m, "SYS")
+    assert n and m.evals == 1
+    _chat_turn(m, "hello there")
+    assert kv_slots.slots_for(m).lookup(kv_slots.prefix_slot("SYS"), "SYS") == n
+    assert _prime_prefix(m, "SYS") == n and m.evals == 2   # no re-prime
+    assert kv_slots.slots_for(m).restore(kv_slots.prefix_slot("SYS"), "SYS") == n
+    assert m.n_tokens == n
+    assert m._ctx.seq(0) == m._ctx.seq(1)                  # working == prefix
+
+
+def test_cancelled_prime_pauses_and_resumes_from_parked_part():
+    m = _FakeModel(n_seq_max=8)
+    m.n_batch = 4
+    stop = threading.Event()
+    _eval = m.eval
+
+    def eval_then_stop(toks):
+        _eval(toks)
+        if m.evals == 2:
+            stop.set()             # a request arrives mid-prime
+    m.eval = eval_then_stop
+    with pytest.raises(Cancelled):
+        _prime_prefix(m, "SYSTEM PROMPT", cancel=stop)
+    slots = kv_slots.slots_for(m)
+    assert m.evals == 2 and slots.lookup(kv_slots.prefix_slot("SYSTEM PROMPT")) is None
+    assert slots.lookup(kv_slots.PRIME_SLOT, "SYSTEM PROMPT") == 8
+    _chat_turn(m, "hello there")   # the preempting request uses the KV
+    stop.clear()
+    n = _prime_prefix(m, "SYSTEM PROMPT", cancel=stop)
+    ptoks = [ord(c) for c in "<|system|>\nSYSTEM PROMPT<|end|>\n"]
+    assert n == len(ptoks) and m.evals == 3 + (n - 8 + 3) // 4   # rest only
+    assert m._ctx.seq(slots._slots[kv_slots.prefix_slot("SYSTEM PROMPT")].seq) == ptoks
+    assert slots.lookup(kv_slots.PRIME_SLOT) is None
+
+
+def test_single_seq_fallback_loses_prefix_to_chat():
+    m = _FakeModel(n_seq_max=1)
+    n = _prime_prefix(m, "SYS")
+    assert kv_slots.slots_for(m).lookup(kv_slots.prefix_slot("SYS"), "SYS") == n
+    _chat_turn(m, "hello there")
+    assert kv_slots.slots_for(m).lookup(kv_slots.prefix_slot("SYS"), "SYS") is None
+
+
+def test_chat_slot_is_moved_back_into_working_seq():
+    m = _FakeModel()
+    _prime_prefix(m, "SYS")
+    _chat_turn(m, "turn one")
+    slots = kv_slots.slots_for(m)
+    slots.restore(kv_slots.prefix_slot("SYS"), "SYS")
+    assert slots.restore("chat") == len("turn one")
+    assert m._ctx.seq(0) == [ord(c) for c in "turn one"]
+    assert slots.lookup("chat") is None                    # move semantics
+
+
+def test_reserve_evicts_scratch_before_resident():
+    m = _FakeModel(n_ctx=128)        # prefix is 39 tok with markers
+    _prime_prefix(m, "S" * 20)
+    _chat_turn(m, "c" * 20)
+    slots = kv_slots.slots_for(m)
+    assert slots.reserve(80) == 1
+    assert slots.lookup("chat") is None
+    assert slots.lookup(kv_slots.prefix_slot("S" * 20)) is not None
+    assert slots.reserve(100) == 1
+    assert slots.lookup(kv_slots.prefix_slot("S" * 20)) is None
+
+
+def test_switching_prompts_keeps_an_lru_of_resident_prefixes():
+    m = _FakeModel(n_ctx=512)
+    slots = kv_slots.slots_for(m)
+    slots.max_prefixes = 2
+    climate, full, dog = "climate only", "full hvac", "dog"
+    _prime_prefix(m, climate)
+    _prime_prefix(m, full)
+    assert m.evals == 2
+    _chat_turn(m, "hello")
+    assert _prime_prefix(m, climate) and _prime_prefix(m, full)
+    assert m.evals == 3                          # switching back: no re-prime
+    slots.restore(kv_slots.prefix_slot(full), full)      # full is now MRU
+    _prime_prefix(m, dog)                        # evicts the LRU (climate)
+    assert slots.lookup(kv_slots.prefix_slot(climate)) is None
+    assert slots.lookup(kv_slots.prefix_slot(full), full) is not None
+    slots.prefix_budget = 40 / 512              # cells: only one fits now
+    _prime_prefix(m, climate)
+    assert [slots.lookup(kv_slots.prefix_slot(k)) is not None
+            for k in (climate, full, dog)] == [True, False, False]
+
+
+def test_prefix_state_path_keys_on_model_ctx_and_prompt(tmp_path):
+    gguf = tmp_path / "m.gguf"
+    gguf.write_bytes(b"GGUF" + bytes(64))
+    m = _FakeModel()
+    m.model_path = str(gguf)
+    slots = kv_slots.slots_for(m)
+    assert slots.state_path("SYS") is None               # persistence off
+    slots.persist_dir = str(tmp_path / "cache")
+    p = slots.state_path("SYS")
+    assert p.startswith(str(tmp_path / "cache"))
+    assert slots.state_path("SYS") == p
+    assert slots.state_path("SYS v2") != p
+    m2 = _FakeModel(n_ctx=512)
+    m2.model_path = str(gguf)
+    kv_slots.slots_for(m2).persist_dir = slots.persist_dir
+    assert kv_slots.slots_for(m2).state_path("SYS") != p
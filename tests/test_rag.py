@@ -1,10 +1,13 @@
 """
 RAG store tests — the pure VectorStore cosine search with synthetic vectors
-(embedding/LLM paths need models, so those are not exercised here). The
-manual intent-domain wiring tests live in contrib/hvac/tests.
+(embedding/LLM paths need models, so those are not exercised here; the shared
+embedder cache is checked with a stub Embedder). The manual intent-domain
+wiring tests live in contrib/hvac/tests.
 """
 import numpy as np
 
+from fsttm.rag import store as S
+from fsttm.rag.retrieve import Retriever
 from fsttm.rag.store import VectorStore
 
 
@@ -39,3 +42,25 @@ def test_vector_store_save_load_roundtrip(tmp_path):
 
 def test_empty_store_search():
     assert VectorStore().search(_norm([1, 0]), k=3) == []
+
+
+# ── shared embedder ───────────────────────────────────────────────────────────
+
+class _StubEmbedder:
+    def __init__(self, model_path, n_gpu_layers=None):
+        self.n_gpu_layers = n_gpu_layers
+
+
+def test_recall_shares_the_manual_gpu_embedder(tmp_path, monkeypatch):
+    monkeypatch.setattr(S, "Embedder", _StubEmbedder)
+    monkeypatch.setattr(S, "_SHARED", {})
+    p = str(tmp_path / "s.npz")
+    VectorStore(vectors=np.vstack([_norm([1, 0])]), chunks=["x"],
+                meta=[{}]).save(p)
+    manual = Retriever(p, "embed.gguf", embed_gpu=True).embed
+    # the intent memory's lookup (fsttm.llama _build_memory, recall_embed_gpu)
+    recall = S.shared_embedder("embed.gguf", n_gpu_layers=S.embed_layers(True))
+    assert recall is manual and manual.n_gpu_layers == -1
+    assert S.shared_embedder("embed.gguf",
+                             n_gpu_layers=S.embed_layers(False)) is not manual
+
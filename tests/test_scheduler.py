@@ -0,0 +1,106 @@
+"""
+fsttm.scheduler.RequestScheduler — the llama worker's request queue: class
+priority, supersede/preempt rules, deadline drops and the counters. Pure
+threading logic; no model needed.
+"""
+import threading
+import time
+
+from fsttm import scheduler as S
+
+
+def _sched(deadlines=None):
+    stop = threading.Event()
+    return S.RequestScheduler(stop, deadlines), stop
+
+
+def test_highest_class_first_fifo_within_class():
+    q, _ = _sched()
+    q.put("reprime", S.IDLE)
+    q.put("manual", S.REPLY)
+    q.put("c1", S.CLASSIFY)
+    q.put("c2", S.CLASSIFY)
+    q.put("warmer", S.INTENT)
+    got = [q.get()[0] for _ in range(5)]
+    assert got == ["warmer", "c1", "c2", "manual", "reprime"]
+
+
+def test_newer_request_supersedes_pending_of_its_class_only():
+    q, _ = _sched()
+    q.put("old", S.INTENT)
+    q.put("new", S.INTENT)
+    q.put("c1", S.CLASSIFY)
+    q.put("c2", S.CLASSIFY)              # classify verdicts are never dropped
+    assert q.stats()["dropped"]["superseded"] == 1
+    assert [q.get()[0] for _ in range(3)] == ["new", "c1", "c2"]
+
+
+def test_preempts_lower_or_same_class_running_op():
+    q, stop = _sched()
+    q.put("manual", S.REPLY)
+    assert q.get() == ("manual", S.REPLY) and not stop.is_set()
+    q.put("c", S.CLASSIFY)               # outranks the running reply
+    assert stop.is_set() and q.stats()["preempted"] == 1
+    assert q.get() == ("c", S.CLASSIFY) and not stop.is_set()
+    q.put("manual2", S.REPLY)            # lower class waits its turn
+    assert not stop.is_set()
+
+
+def test_deadline_drops_stale_requests():
+    q, _ = _sched({S.REPLY: 0.01})
+    q.put("stale", S.REPLY)
+    q.put("reprime", S.IDLE)
+    time.sleep(0.02)
+    assert q.get()[0] == "reprime"
+    assert q.stats()["dropped"]["expired"] == 1
+
+
+def test_classify_never_expires_behind_a_slow_intent(monkeypatch):
+    q, _ = _sched()
+    q.put("cold prime", S.INTENT)
+    q.get()
+    q.put("c", S.CLASSIFY)               # its command is parked on the server
+    q.put("late", S.INTENT)
+    now = time.monotonic()
+    monkeypatch.setattr(S.time, "monotonic", lambda: now + 60)
+    assert q.get() == ("c", S.CLASSIFY)
+    assert q.stats()["dropped"]["expired"] == 1      # only the intent
+
+
+def test_cancel_stops_running_and_keeps_pending_classify():
+    q, stop = _sched()
+    q.put("warmer", S.INTENT)
+    q.get()
+    q.put("manual", S.REPLY)
+    q.put("c", S.CLASSIFY)
+    q.cancel()
+    assert stop.is_set()
+    st = q.stats()
+    assert st["dropped"]["cancelled"] == 1 and st["pending"] == 1
+    assert q.get()[0] == "c"
+
+
+def test_wait_stats_and_close_unblocks_worker():
+    q, _ = _sched()
+    q.put("warmer", S.INTENT)
+    q.get()
+    w = q.stats()["wait_ms"]["intent"]
+    assert w["n"] == 1 and w["max"] >= w["last"] >= 0
+    out = []
+    t = threading.Thread(target=lambda: out.append(q.get()))
+    t.start()
+    q.close()
+    t.join(1)
+    assert out == [(None, None)]
+
+
+def test_supersede_drops_pending_and_stops_running_intent():
+    q, stop = _sched()
+    q.put("warmer", S.INTENT)
+    q.get()
+    q.put("cooler", S.INTENT)
+    q.put("manual", S.REPLY)
+    stop.clear()
+    q.supersede(S.INTENT)                # answered outside the queue
+    assert stop.is_set() and q.stats()["dropped"]["superseded"] == 1
+    assert q.get()[0] == "manual"
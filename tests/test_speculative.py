@@ -0,0 +1,33 @@
+"""
+fsttm.speculative — the prompt-lookup draft (longest suffix n-gram, latest
+occurrence, bounded length) and the stop-string hold-back of the streamed
+text.
+"""
+from fsttm.speculative import _held, lookup_draft
+
+
+def test_draft_continues_latest_match_of_longest_ngram():
+    #        0  1  2  3  4  5  6  7  8  9 10
+    toks = [5, 1, 2, 3, 9, 1, 2, 7, 8, 1, 2]
+    # suffix (1, 2) last seen at 5 → what followed it there
+    assert lookup_draft(toks, max_ngram=3, num_pred=2) == [7, 8]
+    # a 3-gram match beats a more recent 2-gram one
+    toks = [4, 1, 2, 3, 6, 1, 2, 8, 4, 1, 2]
+    assert lookup_draft(toks, max_ngram=3, num_pred=3) == [3, 6, 1]
+
+
+def test_draft_is_bounded_and_empty_without_match():
+    toks = [1, 2, 3, 4, 5, 6, 1, 2]
+    assert lookup_draft(toks, num_pred=8) == [3, 4, 5, 6, 1, 2]
+    assert lookup_draft(toks, num_pred=1) == [3]
+    assert lookup_draft([1, 2, 3, 4]) == []
+    assert lookup_draft([7]) == []
+    assert lookup_draft([]) == []
+
+
+def test_stop_prefix_is_held_back():
+    stops = ["Question:", "\n"]
+    assert _held("Press the button. Quest", stops) == len("Quest")
+    assert _held("Press the button.", stops) == 0
+    assert _held("see Q", stops) == 1
+    assert _held("anything", []) == 0
@@ -0,0 +1,49 @@
+"""
+fsttm.speech_gate.SpeechGate — harmonic (voiced) audio passes; silence,
+broadband noise, clicks and a short tone lost in noise are dropped, by reason.
+"""
+import numpy as np
+
+from fsttm.speech_gate import SAMPLE_RATE, SpeechGate
+
+_rng = np.random.default_rng(0)
+_PAD = np.zeros(int(0.7 * SAMPLE_RATE))         # the VAD hangover
+
+
+def _pcm(*parts):
+    x = np.concatenate(parts + (_PAD,))
+    return (np.clip(x, -1, 1) * 32767).astype(np.int16).tobytes()
+
+
+def _vowel(seconds, f0=120.0):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return sum(0.3 / k * np.sin(2 * np.pi * f0 * k * t)
+               for k in range(1, int(4000 / f0)))
+
+
+def _noise(seconds, level=0.1):
+    return level * _rng.standard_normal(int(seconds * SAMPLE_RATE))
+
+
+def test_short_voiced_word_passes():
+    g = SpeechGate()
+    assert g.check(_pcm(_vowel(0.3))) is None
+    assert g.check(_pcm(_noise(0.3, 0.01), _vowel(0.5), _noise(0.2, 0.01))) is None
+
+
+def test_non_speech_is_dropped_by_reason():
+    g = SpeechGate()
+    assert g.check(_pcm(_noise(1.0, 1e-4))) == "quiet"
+    click = np.r_[np.zeros(100), 0.9 * np.exp(-np.arange(400) / 40) * _noise(0.025, 1)]
+    assert g.check(_pcm(click)) == "quiet"        # one loud frame or two
+    assert g.check(_pcm(_noise(0.6))) == "noise"  # cough / hiss: flat spectrum
+    assert g.check(_pcm(_noise(2.0), _vowel(0.2), _noise(2.0))) == "sparse"
+    assert g.check(b"") == "quiet"
+    assert g.stats() == {"passed": 0, "quiet": 3, "noise": 1, "sparse": 1}
+
+
+def test_thresholds_are_configurable():
+    g = SpeechGate(min_voiced_ms=600)
+    assert g.check(_pcm(_vowel(0.3))) == "quiet"
+    assert g.check(_pcm(_vowel(0.3), _noise(0.5))) == "noise"
+    assert SpeechGate(max_flatness=0.7).check(_pcm(_noise(0.6))) is None
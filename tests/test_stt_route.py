@@ -0,0 +1,26 @@
+"""
+whisper.route_model / transcript_confidence — which model of the tier pair
+takes an utterance, and when a fast-model transcript is redone by the main one.
+"""
+from fsttm.whisper import route_model, transcript_confidence
+
+
+def test_short_or_backlogged_goes_to_the_fast_model():
+    assert route_model(1.2, 0) == ("fast", "short")
+    assert route_model(3.0, 0, fast_max_s=3.0) == ("fast", "short")
+    assert route_model(6.0, 0) == ("main", "long")
+    assert route_model(6.0, 2, fast_backlog=2) == ("fast", "queue")
+    assert route_model(6.0, 1, fast_backlog=2) == ("main", "long")
+
+
+def test_confidence_prefers_reported_probabilities():
+    assert transcript_confidence("turn on the AC", 1.5, [0.9, 0.7]) == 0.8
+    assert transcript_confidence("turn on the AC", 1.5, [float("nan")]) == 1.0
+    assert transcript_confidence("turn on the AC", 1.5) == 1.0
+
+
+def test_small_model_failures_are_low_confidence():
+    assert transcript_confidence("[BLANK_AUDIO]", 1.0) == 0.0
+    assert transcript_confidence("you you you you you you you you", 4.0) < 0.5
+    assert transcript_confidence(" ".join(["word"] * 3 + ["a", "b", "c", "d",
+                                                          "e", "f", "g"]), 1.0) < 0.5
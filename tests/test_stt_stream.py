@@ -0,0 +1,77 @@
+"""
+fsttm.stt_stream.StreamState — LocalAgreement commits between partial passes,
+the tail offset of the next pass, overlap de-duplication and the final text.
+"""
+from fsttm.stt_stream import OVERLAP_S, SAMPLE_RATE, StreamState
+
+
+def _pcm(seconds):
+    return b"\x00\x00" * int(seconds * SAMPLE_RATE)
+
+
+def test_agreed_prefix_is_committed():
+    st = StreamState()
+    st.append(_pcm(1.0))
+    assert st.update([(" turn", 0.1, 0.3), (" on", 0.35, 0.5)], 0.0, 1.0)
+    assert st.committed == [] and st.text == "turn on"
+    st.append(_pcm(0.5))
+    st.update([(" turn", 0.1, 0.3), (" on", 0.35, 0.5), (" the", 0.6, 0.7),
+               (" AC", 0.8, 1.3)], 0.0, 1.5)
+    assert st.stable == "turn on"           # agreed twice
+    assert st.text == "turn on the AC"
+    assert st.tail_start() == 0.5 - OVERLAP_S
+
+
+def test_words_still_being_spoken_are_not_committed():
+    st = StreamState()
+    st.update([(" warmer", 0.1, 0.9)], 0.0, 1.0)
+    st.update([(" warmer", 0.1, 0.9)], 0.0, 1.1)   # ends within the overlap
+    assert st.committed == []
+    st.update([(" warmer", 0.1, 0.9)], 0.0, 1.5)
+    assert st.stable == "warmer"
+
+
+def test_commit_without_new_words_is_a_change():
+    st = StreamState()
+    st.update([(" lights", 0.1, 0.4), (" off", 0.5, 0.7)], 0.0, 1.0)
+    # the user paused: same words, now all agreed → stable == text
+    assert st.update([(" lights", 0.1, 0.4), (" off", 0.5, 0.7)], 0.0, 1.5)
+    assert st.stable == st.text == "lights off"
+    assert not st.update([], st.tail_start(), 2.0)
+
+
+def test_tail_pass_drops_repeated_words_and_finishes():
+    st = StreamState()
+    for _ in range(2):
+        st.update([(" open", 0.0, 0.4), (" the", 0.5, 0.6), (" window", 0.7, 1.0)],
+                  0.0, 2.0)
+    assert st.stable == "open the window"
+    off = st.tail_start()
+    # the tail starts inside "window": whisper repeats it
+    text = st.finish([(" window.", 0.0, 0.3), (" Please", 0.4, 0.8)], off)
+    assert text == "open the window Please"
+    assert st.final
+
+
+def test_covers_checks_the_committed_audio():
+    st = StreamState()
+    st.append(_pcm(1.0))
+    for _ in range(2):
+        st.update([(" hi", 0.0, 0.5)], 0.0, 1.0)
+    full = bytes(st.audio) + _pcm(0.7)
+    assert st.covers(full)
+    off, tail = st.tail(full)
+    assert len(tail) == len(full) - int(off * SAMPLE_RATE) * 2
+    assert not st.covers(b"\x01\x00" * SAMPLE_RATE)
+
+
+def test_due_respects_cadence_and_busy():
+    st = StreamState()
+    st.append(_pcm(0.4))
+    assert not st.due(500)
+    st.append(_pcm(0.2))
+    assert st.due(500)
+    st.busy = True
+    assert not st.due(500)
+    st.busy, st.closed = False, True
+    assert not st.due(500)
@@ -0,0 +1,111 @@
+"""
+fsttm.two_pass.approach_a — pass ordering around the intent JSON: the early
+on_intent callback fires before pass 2, an ack template skips pass 2, and a
+set cancel event aborts between tokens.
+Runs against a scripted byte-level fake model (no KV ops → full-eval path).
+"""
+import threading
+
+import pytest
+
+from fsttm.two_pass import Cancelled, approach_a
+
+
+class _ScriptedModel:
+    """tokenize/detokenize are bytes; each generate() call replays the next
+    scripted text one byte-token at a time."""
+
+    def __init__(self, *outputs):
+        self.outputs = [o.encode() for o in outputs]
+        self.log = []
+        self.resets = 0
+
+    def tokenize(self, b, add_bos=True, special=False):
+        return list(b)
+
+    def detokenize(self, ids):
+        return bytes(ids)
+
+    def token_eos(self):
+        return 0
+
+    def token_bos(self):
+        return 1
+
+    def reset(self):
+        self.resets += 1
+
+    def eval(self, toks):
+        self.log.append(("eval", bytes(toks).decode(errors="replace")))
+
+    def generate(self, toks, reset=False, grammar=None, temp=0.0, top_k=40):
+        out = self.outputs.pop(0)
+        self.log.append(("generate", grammar is not None))
+        yield from out
+        yield 0
+
+
+JSON = '{"intent":"WARMER","area":0}'
+
+
+def test_on_intent_fires_between_passes():
+    m = _ScriptedModel(JSON, " Turning up the heat.\n")
+    seen = []
+    intent, tts, _, _ = approach_a(
+        m, "SYS", "warmer", grammar=object(),
+        on_intent=lambda i: seen.append((i, len(m.log))))
+    assert intent == {"intent": "WARMER", "area": 0}
+    assert tts == "Turning up the heat."
+    # parsed after the JSON pass (eval + generate), before the cue eval
+    assert seen == [(intent, 2)]
+    assert m.log[2] == ("eval", "\nSpoken response:")
+
+
+def test_ack_template_skips_pass_two():
+    m = _ScriptedModel(JSON)
+    intent, tts, _, t_tts = approach_a(m, "SYS", "warmer", grammar=object(),
+                                       ack=lambda i: "Warming up.")
+    assert (intent["intent"], tts, t_tts) == ("WARMER", "Warming up.", 0.0)
+    assert [k for k, _ in m.log] == ["eval", "generate"]     # no cue, no pass 2
+
+
+def test_ack_none_falls_back_to_llm_pass():
+    m = _ScriptedModel(JSON, " Okay.\n")
+    _, tts, _, _ = approach_a(m, "SYS", "warmer", grammar=object(),
+                              ack=lambda i: None)
+    assert tts == "Okay."
+
+
+def test_on_token_streams_first_line_of_the_ack():
+    m = _ScriptedModel(JSON, " Turning up\n the heat.")
+    pieces = []
+    _, tts, _, _ = approach_a(m, "SYS", "warmer", grammar=object(),
+                              on_token=pieces.append)
+    assert "".join(pieces) == " Turning up"
+    assert len(pieces) == len(" Turning up")            # one per byte-token
+    assert tts == "Turning up"
+
+
+def test_cancel_before_start_skips_every_pass():
+    m = _ScriptedModel(JSON, " Okay.\n")
+    stop = threading.Event()
+    stop.set()
+    with pytest.raises(Cancelled):
+        approach_a(m, "SYS", "warmer", grammar=object(), cancel=stop)
+    assert m.log == [] and m.resets == 1                  # KV left empty
+
+
+def test_cancel_after_intent_aborts_the_ack_between_tokens():
+    m = _ScriptedModel(JSON, " Turning up the heat.\n")
+    stop = threading.Event()
+    pieces = []
+
+    def on_token(t):
+        pieces.append(t)
+        stop.set()                    # e.g. StopGenerate from a barge-in
+
+    with pytest.raises(Cancelled):
+        approach_a(m, "SYS", "warmer", grammar=object(),
+                   on_intent=lambda i: None, on_token=on_token, cancel=stop)
+    assert pieces == [" "]
+    assert m.resets == 2                 # full-eval reset + abort rollback
@@ -0,0 +1,82 @@
+"""
+fsttm.wire — compact intent encoding: short keys/enum codes on the wire,
+expanded back to the canonical intent dict. Pure schema/text logic.
+"""
+import json
+
+from fsttm.fastforward import forced_text
+from fsttm.wire import WireCodec, codec_for
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent": {"type": "string",
+                   "enum": ["WARMER", "WINDOW_OPEN", "WINDOW_CLOSE", "LIGHTS_ON"]},
+        "area": {"type": "integer", "enum": [0, 1, 4]},
+        "light_type": {"type": "string", "enum": ["head", "hazard"]},
+        "target": {"type": "object",
+                   "properties": {"type": {"type": "string",
+                                           "enum": ["OBJECT", "ROOM"]},
+                                  "description": {"type": "string"}},
+                   "required": ["type"], "additionalProperties": False},
+        "tags": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["intent", "area"],
+    "additionalProperties": False,
+}
+
+
+def test_derived_keys_and_codes_are_short_and_unique():
+    c = WireCodec.derive(SCHEMA)
+    assert c.keys == {"intent": "i", "area": "a", "light_type": "lt",
+                      "target": "t", "type": "ty", "description": "d",
+                      "tags": "ta"}
+    assert c.codes["intent"] == {"WARMER": "W", "WINDOW_OPEN": "WO",
+                                 "WINDOW_CLOSE": "WC", "LIGHTS_ON": "LO"}
+    assert c.codes["light_type"] == {"head": "h", "hazard": "ha"}
+    assert "area" not in c.codes                 # integer enums stay as-is
+
+
+def test_round_trip_restores_canonical_intent():
+    c = codec_for(SCHEMA)
+    intent = {"intent": "LIGHTS_ON", "area": 1, "light_type": "hazard",
+              "target": {"type": "ROOM", "description": "the kitchen"},
+              "tags": ["x"]}
+    wire = c.encode(intent)
+    assert wire == {"i": "LO", "a": 1, "lt": "ha",
+                    "t": {"ty": "R", "d": "the kitchen"}, "ta": ["x"]}
+    assert c.decode(wire) == intent
+    assert c.decode({"i": "NOPE", "zz": 3}) == {"intent": "NOPE", "zz": 3}
+
+
+def test_wire_schema_keeps_order_and_required_for_the_grammar():
+    ws = codec_for(SCHEMA).encode_schema(SCHEMA)
+    assert list(ws["properties"]) == ["i", "a", "lt", "t", "ta"]
+    assert ws["required"] == ["i", "a"]
+    assert ws["properties"]["t"]["required"] == ["ty"]
+    assert ws["properties"]["i"]["enum"] == ["W", "WO", "WC", "LO"]
+    assert SCHEMA["properties"]["intent"]["enum"][0] == "WARMER"  # not mutated
+    # the wire schema still fast-forwards: `{"i":"` then `","a":` after a code
+    assert forced_text(ws, "") == '{"i":"'
+    assert forced_text(ws, '{"i":"W') == ""                  # W, WO or WC
+    assert forced_text(ws, '{"i":"L') == 'O","a":'
+
+
+def test_prompt_examples_rewritten_and_legend_appended():
+    c = codec_for(SCHEMA)
+    prompt = ('Use {braces} freely.\n'
+              '"warmer" → {"intent":"WARMER","area":0}\n'
+              '"config" → {"other":1}\n')
+    out = c.encode_prompt(prompt)
+    assert '"warmer" → {"i":"W","a":0}' in out
+    assert '{"other":1}' in out and "Use {braces} freely." in out
+    assert "W=WARMER" in out and "lt=light_type" in out
+    assert json.loads(out.split("→ ")[1].split("\n")[0]) == {"i": "W", "a": 0}
+
+
+def test_codec_recovered_from_the_prompt_legend():
+    c = codec_for(SCHEMA)
+    got = WireCodec.from_legend(c.encode_prompt("Examples:\n"))
+    assert got.keys == c.keys and got.codes == c.codes
+    assert WireCodec.from_legend("Examples:\n") is None
+